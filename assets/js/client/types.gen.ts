@@ -109,6 +109,10 @@ export type PagedSessionListSchema = {
      * Count
      */
     count: number;
+    /**
+     * Next
+     */
+    next: string | null;
 };
 
 /**
@@ -619,6 +623,10 @@ export type TotemSpacesApiListEventsData = {
          * Limit
          */
         limit?: number;
+        /**
+         * Cursor
+         */
+        cursor?: string | null;
         /**
          * Offset
          */
@@ -102,6 +102,7 @@ LOCAL_APPS = [
     "totem.users",
     "totem.utils",
     "totem.notifications",
+    "totem.jobs",
 ]
 
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
@@ -505,3 +506,5 @@ SOCIAL_LINKS = {
 LIVEKIT_URL = env("LIVEKIT_URL", default=None)
 LIVEKIT_API_KEY = env("LIVEKIT_API_KEY", default=None)
 LIVEKIT_API_SECRET = env("LIVEKIT_API_SECRET", default=None)
+# Respond to room events before the LiveKit publish/mute/remove calls finish.
+LIVEKIT_DEFER_ROOM_EFFECTS = env.bool("LIVEKIT_DEFER_ROOM_EFFECTS", default=False)
@@ -15,6 +15,7 @@ from totem.blog.urls import BlogSitemap
 from totem.pages.urls import PagesSitemap
 from totem.plans.urls import PlansSitemap
 from totem.repos.urls import ReposSitemap
+from totem.rooms.webhooks import livekit_webhook
 from totem.spaces.urls import SpacesSitemap
 from totem.users import views as user_views
 from totem.utils.exports import get_url_patterns as export_url_patterns
@@ -129,6 +130,7 @@ urlpatterns = [
     path("dev/", include("totem.dev.urls", namespace="dev")),
     # Reverse-proxy the Flutter web "room" app so it shares this origin.
     path("room/", include("totem.rooms.urls", namespace="rooms")),
+    path("webhooks/livekit/", livekit_webhook, name="livekit_webhook"),
     # Redirects
     path("circles/", RedirectView.as_view(url="/spaces/", permanent=True)),
     path("circles/<path:path>", RedirectView.as_view(url="/spaces/%(path)s", permanent=True)),
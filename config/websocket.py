@@ -1,4 +1,15 @@
+import re
+
+from totem.rooms.stream import room_state_socket
+
+ROOM_STATE_PATH = re.compile(r"^/ws/rooms/(?P<session_slug>[\w-]+)/$")
+
+
 async def websocket_application(scope, receive, send):
+    if match := ROOM_STATE_PATH.match(scope["path"]):
+        await room_state_socket(scope, receive, send, match["session_slug"])
+        return
+
     while True:
         event = await receive()
 
@@ -70,6 +70,23 @@ def generate_jwt_token(user: User, expire_at: datetime | None = None) -> str:
     return jwt.encode(payload.model_dump(), settings.SECRET_KEY, algorithm="HS256")
 
 
+def user_for_jwt_token(token: str) -> User | None:
+    """The active user a JWT access token belongs to, or None if it's invalid or expired."""
+    try:
+        # Decode JWT token
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        data = JWTSchema(**payload)
+    except jwt.PyJWTError:
+        return None
+
+    # Check if token is expired
+    if not data.exp or timezone.now() > data.exp:
+        return None
+
+    # Get user, if still active
+    return User.objects.filter(api_key=data.api_key, pk=data.pk, is_active=True).first()
+
+
 # Check if account is deactivated
 def check_account_deactivated(user: User) -> bool:
     return not user.is_active
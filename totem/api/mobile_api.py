@@ -1,5 +1,3 @@
-import jwt
-from django.conf import settings
 from django.http import HttpRequest
 from django.utils import timezone
 from ninja import Router, Status
@@ -16,33 +14,15 @@ from totem.spaces.mobile_api.mobile_api import spaces_router
 from totem.users.mobile_api import user_router
 from totem.users.models import User
 
-from .auth import JWTSchema
+from .auth import user_for_jwt_token
 
 
 class JWTAuth(HttpBearer):
     def authenticate(self, request: HttpRequest, token: str) -> User | None:
-        try:
-            # Decode JWT token
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            data = JWTSchema(**payload)
-
-            # Check if token is expired
-            if not data.exp or timezone.now() > data.exp:
-                return None
-
-            # Get user
-            try:
-                user = User.objects.get(api_key=data.api_key, pk=data.pk)
-
-                # Check if user is active
-                if not user.is_active:
-                    return None
-                request.user = user
-                return user
-            except User.DoesNotExist:
-                return None
-        except jwt.PyJWTError:
-            return None
+        user = user_for_jwt_token(token)
+        if user is not None:
+            request.user = user
+        return user
 
 
 # Create router. JWTAuth is tried first for the native Flutter app; django_auth
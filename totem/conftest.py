@@ -1,18 +1,53 @@
+import os
 from unittest.mock import patch
 
 import pytest
 from django.test import Client
 
 from totem.api.auth import generate_jwt_token
+from totem.spaces import catalog
 from totem.users.models import User
 from totem.users.tests.factories import UserFactory
 
 
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: slow performance measurement, run with TOTEM_BENCHMARKS=1")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("TOTEM_BENCHMARKS"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; set TOTEM_BENCHMARKS=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def benchmark_report(capsys):
+    """Print a benchmark's results past pytest's output capture."""
+
+    def report(name: str, **metrics: float | int | str):
+        line = ", ".join(
+            f"{key}={value:.4g}" if isinstance(value, float) else f"{key}={value}" for key, value in metrics.items()
+        )
+        with capsys.disabled():
+            print(f"\n[benchmark] {name}: {line}")
+
+    return report
+
+
 @pytest.fixture(autouse=True)
 def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def spaces_catalog():
+    """The catalog snapshot outlives a test's rolled back data; start each test from a new version."""
+    catalog.invalidate()
+
+
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import urllib.parse
+from collections.abc import Sequence
 from datetime import datetime
 from typing import TYPE_CHECKING
 
 from django.conf import settings
+from django.core.mail import get_connection
 from django.urls import reverse
 
 if TYPE_CHECKING:
@@ -15,6 +17,7 @@ import mrml
 from django.template.loader import render_to_string
 from pydantic import AnyHttpUrl, BaseModel, TypeAdapter
 
+from .exceptions import EmailBounced
 from .models import EmailLog
 from .utils import send_brevo_email, send_mail
 
@@ -47,23 +50,19 @@ class Email(BaseModel):
     def render_text(self) -> str:
         return render_to_string(f"email/emails/{self.template}.txt", context=self.model_dump())
 
-    def send(self):
-        # if blocking:
+    def send(self, connection=None, log: bool = True):
         send_mail(
             subject=self.subject,
             html_message=self.render_html(),
             text_message=self.render_text(),
             recipient_list=[self.recipient],
+            connection=connection,
         )
-        # else:
-        #     global_pool.add_task(
-        #         send_mail,
-        #         subject=self.subject,
-        #         html_message=self.render_html(),
-        #         text_message=self.render_text(),
-        #         recipient_list=[self.recipient],
-        #     )
-        EmailLog.objects.create(
+        if log:
+            self.log_entry().save()
+
+    def log_entry(self) -> EmailLog:
+        return EmailLog(
             subject=self.subject,
             template=self.template,
             context=self.model_dump(mode="json"),
@@ -71,6 +70,24 @@ class Email(BaseModel):
         )
 
 
+def send_emails(emails: Sequence[Email]) -> list[bool]:
+    """
+    Send many emails over a single mail connection and log them with one query.
+    Returns whether each email was sent, in order. Bounced emails are reported as False
+    instead of raising, so one blocked address doesn't stop the rest of the batch.
+    """
+    sent: list[bool] = []
+    with get_connection() as connection:
+        for email in emails:
+            try:
+                email.send(connection=connection, log=False)
+                sent.append(True)
+            except EmailBounced:
+                sent.append(False)
+    EmailLog.objects.bulk_create([email.log_entry() for email, ok in zip(emails, sent) if ok])
+    return sent
+
+
 class BrevoEmail(BaseModel):
     template_id: int
     recipient: str
@@ -193,14 +210,14 @@ def welcome_email(user: User) -> BrevoEmail:
     return WelcomeEmail(recipient=user.email)
 
 
-def notify_session_starting(event: Session, user: User) -> Email:
+def notify_session_starting(event: Session, user: User, join_url: str | None = None) -> Email:
     start = _to_human_time(user, event.start)
     return SessionStartingEmail(
         recipient=user.email,
         start=start,
         event_title=event.space.title,
         event_link=_make_email_url(event.get_absolute_url()),
-        link=type_url(event.email_join_url(user)),
+        link=type_url(join_url or event.email_join_url(user)),
     )
 
 
@@ -217,7 +234,7 @@ def notify_session_tomorrow(event: Session, user: User) -> Email:
     )
 
 
-def notify_session_advertisement(event: Session, user: User) -> Email:
+def notify_session_advertisement(event: Session, user: User, unsubscribe_url: str | None = None) -> Email:
     start = _to_human_time(user, event.start)
     title = event.title or event.space.subtitle
     subtitle = event.space.title
@@ -243,7 +260,7 @@ def notify_session_advertisement(event: Session, user: User) -> Email:
         author=event.space.author.name,
         image_url=image_url,
         author_image_url=author_image_url,
-        unsubscribe_url=type_url(event.space.subscribe_url(user, subscribe=False)),
+        unsubscribe_url=type_url(unsubscribe_url or event.space.subscribe_url(user, subscribe=False)),
     )
 
 
@@ -1,3 +1,7 @@
+from datetime import timedelta
+
+from totem.jobs.scheduler import PeriodicTask
+
 from .models import EmailActivity, EmailLog
 
 
@@ -10,4 +14,8 @@ def backup_email_activity():
     EmailActivity.fetch_email_activity()
 
 
-tasks = [clear_old_logs, backup_email_activity]
+tasks = [
+    PeriodicTask(clear_old_logs, interval=timedelta(days=1)),
+    # fetch_email_activity only pulls from MailerSend twice a day anyway.
+    PeriodicTask(backup_email_activity, interval=timedelta(hours=1)),
+]
@@ -18,6 +18,7 @@ def send_mail(
     recipient_list: list[str],
     from_email: str = settings.DEFAULT_FROM_EMAIL,
     fail_silently: bool = False,
+    connection=None,
 ) -> int:
     # remove newlines from subject
     subject = subject.replace("\n", " ")
@@ -29,6 +30,7 @@ def send_mail(
             recipient_list=recipient_list,
             fail_silently=fail_silently,
             html_message=html_message,
+            connection=connection,
         )
     except AnymailRecipientsRefused:
         raise EmailBounced(f"Email to {recipient_list} with subject {subject} was blocked.")
@@ -0,0 +1,36 @@
+from django.contrib import admin, messages
+from django.db.models import QuerySet
+
+from .models import Job, ScheduledTask
+from .queue import retry
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("func", "status", "attempts", "max_attempts", "run_at", "date_created")
+    list_filter = ("status", "func")
+    search_fields = ("func", "idempotency_key")
+    readonly_fields = ("date_created", "date_modified", "locked_at", "last_error")
+    actions = ["retry_jobs"]
+
+    @admin.action(description="Retry selected jobs")
+    def retry_jobs(self, request, queryset: QuerySet[Job]):
+        count = retry(queryset)
+        self.message_user(request, f"Requeued {count} job(s).", level=messages.SUCCESS)
+
+
+@admin.register(ScheduledTask)
+class ScheduledTaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_status", "last_duration", "last_started", "last_success")
+    list_filter = ("last_status",)
+    readonly_fields = (
+        "name",
+        "last_started",
+        "last_finished",
+        "last_success",
+        "last_duration",
+        "last_status",
+        "last_error",
+        "date_created",
+        "date_modified",
+    )
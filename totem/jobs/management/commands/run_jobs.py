@@ -0,0 +1,36 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from totem.jobs.queue import run_pending
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the due jobs and exit.")
+        parser.add_argument("--batch-size", type=int, default=10, help="Jobs claimed per round trip.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when idle.")
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        # Finish the job in hand on SIGTERM (deploys, worker rotation) instead of dying mid-job.
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        while not self._stopping:
+            processed = run_pending(options["batch_size"])
+            if processed:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
+            # Long-lived process: drop connections that broke or outlived CONN_MAX_AGE while idle.
+            close_old_connections()
+
+    def _stop(self, signum, frame):
+        self.stdout.write("Stopping after the current batch...")
+        self._stopping = True
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+from totem.utils.models import BaseModel
+
+
+class JobStatus(models.TextChoices):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    DEAD = "dead"  # gave up after max_attempts, kept for inspection and manual retry
+
+
+class Job(BaseModel):
+    """
+    A unit of background work, persisted so it survives worker restarts.
+
+    `func` is the dotted import path of a module-level function, called with the
+    JSON-serialized `args`/`kwargs`. Workers claim rows with SELECT ... FOR UPDATE
+    SKIP LOCKED, so any number of them can drain the queue without double-running a job.
+    """
+
+    func = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:  # pyright: ignore[reportIncompatibleVariableOverride]
+        ordering = ["run_at"]
+        indexes = [models.Index(fields=["status", "run_at"])]
+
+    def __str__(self):
+        return f"{self.func} ({self.status})"
+
+    @classmethod
+    def clear_old(cls):
+        cls.objects.filter(status=JobStatus.DONE, date_modified__lte=timezone.now() - timedelta(days=7)).delete()
+
+
+class TaskRunStatus(models.TextChoices):
+    SUCCESS = "success"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+
+
+class ScheduledTask(BaseModel):
+    """
+    Bookkeeping for one periodic task run by `totem_tasks`.
+
+    One row per task, updated after every run. The scheduler uses `last_success`
+    to decide whether the task is due; the rest is there for monitoring.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    last_started = models.DateTimeField(null=True, blank=True)
+    last_finished = models.DateTimeField(null=True, blank=True)
+    last_success = models.DateTimeField(null=True, blank=True)
+    last_duration = models.FloatField(null=True, blank=True, help_text="Seconds")
+    last_status = models.CharField(max_length=20, choices=TaskRunStatus.choices, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:  # pyright: ignore[reportIncompatibleVariableOverride]
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,208 @@
+"""
+Durable background job queue backed by Postgres.
+
+Request code calls `add_task` (or `enqueue` for the extra options) and returns
+immediately; the row is written in the caller's transaction, so a rolled-back
+request never leaves a job behind. The `run_jobs` management command executes
+jobs in a separate process, retrying failures with exponential backoff and
+dead-lettering jobs that keep failing.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import traceback
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any, ParamSpec, TypeVar
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from sentry_sdk import capture_exception
+
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+DEFAULT_MAX_ATTEMPTS = 5
+# First retry waits this long, then doubles on every attempt, up to BACKOFF_MAX.
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+# A RUNNING job whose lock hasn't been refreshed within this long is assumed lost
+# (worker killed mid-job) and becomes claimable again.
+LOCK_TIMEOUT = timedelta(minutes=10)
+# Workers refresh the lock on the jobs they hold this often, so a job can run for
+# longer than LOCK_TIMEOUT without being claimed a second time.
+HEARTBEAT_INTERVAL = LOCK_TIMEOUT / 5
+
+
+def _func_path(fn: Callable) -> str:
+    path = f"{fn.__module__}.{fn.__qualname__}"
+    if "<" in path:
+        raise ValueError(f"Background jobs must be module-level functions, got {path}")
+    return path
+
+
+def enqueue(
+    fn: Callable,
+    args: tuple | list = (),
+    kwargs: dict[str, Any] | None = None,
+    *,
+    idempotency_key: str | None = None,
+    run_at: datetime | None = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> Job | None:
+    """
+    Persist a call to `fn(*args, **kwargs)` for a worker to run.
+
+    Arguments must be JSON serializable. If `idempotency_key` is given and a job with
+    that key already exists, no new job is created and the existing one is returned.
+
+    When TOTEM_ASYNC_WORKER_QUEUE_ENABLED is False (tests, local dev without a worker),
+    the function runs inline instead and None is returned.
+    """
+    kwargs = kwargs or {}
+    func = _func_path(fn)
+
+    if settings.TOTEM_ASYNC_WORKER_QUEUE_ENABLED is False:
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            capture_exception(e)
+        return None
+
+    fields = {
+        "func": func,
+        "args": list(args),
+        "kwargs": kwargs,
+        "run_at": run_at or timezone.now(),
+        "max_attempts": max_attempts,
+    }
+    if idempotency_key is None:
+        return Job.objects.create(**fields)
+    job, _ = Job.objects.get_or_create(idempotency_key=idempotency_key, defaults=fields)
+    return job
+
+
+def add_task(fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> None:
+    """Run `fn(*args, **kwargs)` in the background. Thin wrapper around `enqueue`."""
+    enqueue(fn, args, kwargs)
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before the next try, after `attempts` failed tries."""
+    return min(BACKOFF_BASE * 2 ** min(attempts - 1, 16), BACKOFF_MAX)
+
+
+def claim_jobs(limit: int = 10) -> list[Job]:
+    """
+    Atomically claim up to `limit` due jobs for this worker.
+
+    Rows locked by another worker's claim are skipped rather than waited on. A
+    lost job that has used up its attempts is dead-lettered instead of claimed:
+    it may be what keeps killing its workers.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=JobStatus.PENDING, run_at__lte=now)
+                | Q(status=JobStatus.RUNNING, locked_at__lt=now - LOCK_TIMEOUT)
+            )
+            .order_by("run_at")[:limit]
+        )
+        claimed = []
+        for job in jobs:
+            if job.status == JobStatus.RUNNING and job.attempts >= job.max_attempts:
+                job.status = JobStatus.DEAD
+                job.locked_at = None
+                job.last_error = f"Worker lost while running attempt {job.attempts}"
+                logger.error("Job %s (%s) lost its worker %d times, giving up", job.pk, job.func, job.attempts)
+                continue
+            job.status = JobStatus.RUNNING
+            job.locked_at = now
+            job.attempts += 1
+            claimed.append(job)
+        Job.objects.bulk_update(jobs, ["status", "locked_at", "attempts", "last_error"])
+    return claimed
+
+
+class _Heartbeat:
+    """While a batch runs, refreshes locked_at on its unfinished jobs from a thread."""
+
+    def __init__(self, jobs: list[Job]):
+        # Replaced rather than mutated, so the thread always reads a whole set.
+        self.pending = frozenset(job.pk for job in jobs)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-heartbeat", daemon=True)
+
+    def __enter__(self) -> _Heartbeat:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def finished(self, job: Job) -> None:
+        self.pending = self.pending - {job.pk}
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.wait(HEARTBEAT_INTERVAL.total_seconds()):
+                try:
+                    Job.objects.filter(pk__in=self.pending, status=JobStatus.RUNNING).update(locked_at=timezone.now())
+                except Exception:
+                    logger.exception("Could not refresh the lock on jobs %s", sorted(self.pending))
+        finally:
+            connection.close()
+
+
+def run_job(job: Job) -> bool:
+    """Execute a claimed job and record the outcome. Returns True on success."""
+    try:
+        fn = import_string(job.func)
+        fn(*job.args, **job.kwargs)
+    except Exception as e:
+        capture_exception(e)
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = JobStatus.DEAD
+            logger.error("Job %s (%s) failed %d times, giving up", job.pk, job.func, job.attempts)
+        else:
+            job.status = JobStatus.PENDING
+            job.run_at = timezone.now() + backoff(job.attempts)
+            logger.warning("Job %s (%s) failed, retrying at %s", job.pk, job.func, job.run_at)
+        job.save(update_fields=["status", "run_at", "locked_at", "last_error", "date_modified"])
+        return False
+
+    job.status = JobStatus.DONE
+    job.locked_at = None
+    job.save(update_fields=["status", "locked_at", "date_modified"])
+    return True
+
+
+def run_pending(limit: int = 10) -> int:
+    """Claim and run one batch of due jobs. Returns the number of jobs processed."""
+    jobs = claim_jobs(limit)
+    if not jobs:
+        return 0
+    with _Heartbeat(jobs) as heartbeat:
+        for job in jobs:
+            run_job(job)
+            heartbeat.finished(job)
+    return len(jobs)
+
+
+def retry(jobs: QuerySet[Job]) -> int:
+    """Requeue dead (or any) jobs to run now with a fresh attempt budget."""
+    return jobs.update(status=JobStatus.PENDING, attempts=0, run_at=timezone.now(), locked_at=None)
@@ -0,0 +1,193 @@
+"""
+Periodic task scheduler behind the `totem_tasks` cron command.
+
+Every task has its own interval and timeout. Due tasks run concurrently on a
+bounded set of threads, each holding a Postgres advisory lock while it runs, so
+a cron invocation that overlaps a slow previous one skips the tasks that are
+still running instead of piling up behind them.
+
+Python threads can't be killed: a task that overruns its timeout is recorded as
+timed out and abandoned. Its thread is a daemon, so it dies with the cron
+process, and Postgres releases its lock when the connection goes away. If it
+finishes first anyway, the timeout stays: each run's outcome is recorded once.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import traceback
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.utils import timezone
+from sentry_sdk import capture_exception
+
+from .models import ScheduledTask, TaskRunStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = timedelta(0)  # every cron tick
+# Shorter than the 10 minute cron period, so a stuck task is reported before the next tick.
+DEFAULT_TIMEOUT = timedelta(minutes=8)
+DEFAULT_MAX_WORKERS = 4
+# Cron ticks drift by a few seconds; without some slack a task whose interval is a
+# multiple of the cron period would only run every other time.
+SCHEDULE_SLACK = timedelta(minutes=1)
+POLL_INTERVAL = 0.1  # seconds
+
+# Outcomes that aren't recorded on the ScheduledTask row.
+NOT_DUE = "not_due"
+LOCKED = "locked"
+
+
+@dataclass(frozen=True)
+class PeriodicTask:
+    fn: Callable[[], object]
+    interval: timedelta = DEFAULT_INTERVAL
+    timeout: timedelta = DEFAULT_TIMEOUT
+
+    @property
+    def name(self) -> str:
+        return f"{self.fn.__module__}.{self.fn.__name__}"
+
+    def is_due(self, last_success: datetime | None, now: datetime) -> bool:
+        if last_success is None or not self.interval:
+            return True
+        return now >= last_success + self.interval - SCHEDULE_SLACK
+
+
+def run_periodic_tasks(
+    tasks: Iterable[PeriodicTask | Callable[[], object]],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> dict[str, str]:
+    """
+    Run every due task, at most `max_workers` at a time, and wait for them to
+    finish or time out. Plain callables run on every tick with the default timeout.
+
+    Returns the outcome of each task by name: a TaskRunStatus, NOT_DUE, or LOCKED
+    when another invocation is still running it.
+    """
+    periodic = [task if isinstance(task, PeriodicTask) else PeriodicTask(task) for task in tasks]
+    last_success = dict(
+        ScheduledTask.objects.filter(name__in=[task.name for task in periodic]).values_list("name", "last_success")
+    )
+    now = timezone.now()
+    slots = threading.BoundedSemaphore(max_workers)
+    outcomes: dict[str, str] = {}
+    runs: list[_TaskRun] = []
+    for task in periodic:
+        if task.is_due(last_success.get(task.name), now):
+            runs.append(_TaskRun(task, slots))
+        else:
+            outcomes[task.name] = NOT_DUE
+
+    for run in runs:
+        run.thread.start()
+    while pending := [run for run in runs if run.thread.is_alive() and not run.timed_out]:
+        for run in pending:
+            if run.overran():
+                run.abandon()
+        time.sleep(POLL_INTERVAL)
+
+    for run in runs:
+        outcomes[run.task.name] = TaskRunStatus.TIMEOUT if run.timed_out else (run.outcome or TaskRunStatus.FAILED)
+    return outcomes
+
+
+class _TaskRun:
+    def __init__(self, task: PeriodicTask, slots: threading.BoundedSemaphore):
+        self.task = task
+        self.outcome: str | None = None
+        self.timed_out = False
+        self._slots = slots
+        self._holds_slot = False
+        self._started: float | None = None
+        self.started_at: datetime | None = None  # the run's last_started
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=f"totem_tasks:{task.name}", daemon=True)
+
+    def overran(self) -> bool:
+        started = self._started
+        return started is not None and time.monotonic() - started > self.task.timeout.total_seconds()
+
+    def abandon(self):
+        """Give up on a task that overran, freeing its slot for the tasks still waiting."""
+        self.timed_out = True
+        self._release_slot()
+        logger.error("Task %s timed out after %s", self.task.name, self.task.timeout)
+        if self.started_at is not None:
+            _record(
+                self.task,
+                self.started_at,
+                TaskRunStatus.TIMEOUT,
+                self.task.timeout.total_seconds(),
+                f"Timed out after {self.task.timeout}",
+            )
+
+    def _run(self):
+        self._slots.acquire()
+        with self._lock:
+            self._holds_slot = True
+            self._started = time.monotonic()
+            self.started_at = timezone.now()
+        try:
+            self.outcome = _run_locked(self.task, self.started_at)
+        finally:
+            self._release_slot()
+            connection.close()
+
+    def _release_slot(self):
+        with self._lock:
+            if self._holds_slot:
+                self._holds_slot = False
+                self._slots.release()
+
+
+def _run_locked(task: PeriodicTask, started_at: datetime) -> str:
+    key = f"totem_tasks:{task.name}"
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", [key])
+        (acquired,) = cursor.fetchone()
+    if not acquired:
+        logger.warning("Skipping task %s, it is still running in another process", task.name)
+        return LOCKED
+    try:
+        return _run(task, started_at)
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", [key])
+
+
+def _run(task: PeriodicTask, started_at: datetime) -> str:
+    ScheduledTask.objects.update_or_create(name=task.name, defaults={"last_started": started_at, "last_finished": None})
+    started = time.monotonic()
+    try:
+        task.fn()
+    except Exception as e:
+        capture_exception(e)
+        logger.exception("Task %s failed", task.name)
+        _record(task, started_at, TaskRunStatus.FAILED, time.monotonic() - started, traceback.format_exc())
+        return TaskRunStatus.FAILED
+    _record(task, started_at, TaskRunStatus.SUCCESS, time.monotonic() - started)
+    return TaskRunStatus.SUCCESS
+
+
+def _record(task: PeriodicTask, started_at: datetime, status: TaskRunStatus, duration: float, error: str = ""):
+    """
+    Record how the run that started at `started_at` ended, unless that run has
+    already been recorded (it timed out) or a newer one has started.
+    """
+    now = timezone.now()
+    fields = {
+        "last_finished": now,
+        "last_duration": duration,
+        "last_status": status,
+        "last_error": error,
+    }
+    if status == TaskRunStatus.SUCCESS:
+        fields["last_success"] = now
+    ScheduledTask.objects.filter(name=task.name, last_started=started_at, last_finished__isnull=True).update(**fields)
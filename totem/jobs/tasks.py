@@ -0,0 +1,11 @@
+from datetime import timedelta
+
+from .models import Job
+from .scheduler import PeriodicTask
+
+
+def clear_old_jobs():
+    Job.clear_old()
+
+
+tasks = [PeriodicTask(clear_old_jobs, interval=timedelta(days=1))]
@@ -0,0 +1,205 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from totem.jobs import queue
+from totem.jobs.models import Job, JobStatus
+from totem.jobs.queue import BACKOFF_BASE, LOCK_TIMEOUT, add_task, backoff, claim_jobs, enqueue, retry, run_pending
+
+CALLS: list[tuple] = []
+
+
+def record(*args, **kwargs):
+    CALLS.append((args, kwargs))
+
+
+def explode():
+    raise RuntimeError("boom")
+
+
+def outlive_heartbeats():
+    """Runs for a few heartbeats, recording its lock before and after."""
+    before = Job.objects.get().locked_at
+    time.sleep(queue.HEARTBEAT_INTERVAL.total_seconds() * 5)
+    CALLS.append((before, Job.objects.get().locked_at))
+
+
+@pytest.fixture(autouse=True)
+def queue_enabled(settings):
+    CALLS.clear()
+    settings.TOTEM_ASYNC_WORKER_QUEUE_ENABLED = True
+
+
+@pytest.mark.django_db
+class TestEnqueue:
+    def test_add_task_persists_without_running(self):
+        add_task(record, "a", key="value")
+
+        job = Job.objects.get()
+        assert job.func == "totem.jobs.tests.test_queue.record"
+        assert job.args == ["a"]
+        assert job.kwargs == {"key": "value"}
+        assert job.status == JobStatus.PENDING
+        assert CALLS == []
+
+    def test_idempotency_key_dedupes(self):
+        first = enqueue(record, ("a",), idempotency_key="once")
+        second = enqueue(record, ("b",), idempotency_key="once")
+
+        assert first == second
+        assert Job.objects.count() == 1
+
+    def test_rejects_local_functions(self):
+        def local():
+            pass
+
+        with pytest.raises(ValueError):
+            add_task(local)
+
+    def test_rolled_back_transaction_drops_job(self):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                add_task(record)
+                raise RuntimeError("request failed")
+
+        assert Job.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_runs_inline_when_queue_disabled(settings):
+    settings.TOTEM_ASYNC_WORKER_QUEUE_ENABLED = False
+    add_task(record, "a")
+
+    assert CALLS == [(("a",), {})]
+    assert Job.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestWorker:
+    def test_runs_due_jobs(self):
+        add_task(record, "a")
+        add_task(record, "b")
+
+        assert run_pending() == 2
+
+        assert CALLS == [(("a",), {}), (("b",), {})]
+        assert set(Job.objects.values_list("status", flat=True)) == {JobStatus.DONE}
+
+    def test_skips_future_jobs(self):
+        enqueue(record, run_at=timezone.now() + timedelta(minutes=5))
+
+        assert run_pending() == 0
+        assert CALLS == []
+
+    def test_failure_retries_with_backoff(self):
+        add_task(explode)
+
+        run_pending()
+
+        job = Job.objects.get()
+        assert job.status == JobStatus.PENDING
+        assert job.attempts == 1
+        assert job.run_at > timezone.now() + BACKOFF_BASE - timedelta(seconds=5)
+        assert "boom" in job.last_error
+        # Not due yet, so a second pass doesn't pick it up
+        assert run_pending() == 0
+
+    def test_dead_letters_after_max_attempts(self):
+        job = enqueue(explode, max_attempts=2)
+        assert job is not None
+
+        for _ in range(2):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            run_pending()
+
+        job.refresh_from_db()
+        assert job.status == JobStatus.DEAD
+        assert job.attempts == 2
+
+        retry(Job.objects.filter(pk=job.pk))
+        job.refresh_from_db()
+        assert job.status == JobStatus.PENDING
+        assert job.attempts == 0
+
+    def test_reclaims_jobs_from_lost_workers(self):
+        add_task(record)
+        Job.objects.update(status=JobStatus.RUNNING, locked_at=timezone.now() - LOCK_TIMEOUT - timedelta(minutes=1))
+
+        assert run_pending() == 1
+        assert Job.objects.get().status == JobStatus.DONE
+
+    def test_dead_letters_lost_jobs_after_max_attempts(self):
+        job = enqueue(record, max_attempts=2)
+        assert job is not None
+        Job.objects.update(
+            status=JobStatus.RUNNING, attempts=2, locked_at=timezone.now() - LOCK_TIMEOUT - timedelta(minutes=1)
+        )
+
+        assert run_pending() == 0
+
+        job.refresh_from_db()
+        assert job.status == JobStatus.DEAD
+        assert job.locked_at is None
+        assert "Worker lost" in job.last_error
+        assert CALLS == []
+
+    def test_does_not_reclaim_running_jobs(self):
+        add_task(record)
+        Job.objects.update(status=JobStatus.RUNNING, locked_at=timezone.now())
+
+        assert run_pending() == 0
+
+    def test_run_jobs_command_once(self):
+        add_task(record, "a")
+
+        call_command("run_jobs", "--once")
+
+        assert CALLS == [(("a",), {})]
+
+    def test_backoff_is_capped(self):
+        assert backoff(1) == BACKOFF_BASE
+        assert backoff(2) == BACKOFF_BASE * 2
+        assert backoff(100) == timedelta(hours=1)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_workers_skip_locked_jobs():
+    add_task(record, "a")
+    add_task(record, "b")
+    locked = threading.Event()
+    release = threading.Event()
+
+    def hold_first_job():
+        with transaction.atomic():
+            list(Job.objects.select_for_update().order_by("run_at")[:1])
+            locked.set()
+            release.wait(timeout=10)
+        connection.close()
+
+    holder = threading.Thread(target=hold_first_job)
+    holder.start()
+    locked.wait(timeout=10)
+    try:
+        claimed = claim_jobs()
+    finally:
+        release.set()
+        holder.join()
+
+    assert [job.args for job in claimed] == [["b"]]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_heartbeat_keeps_long_jobs_locked(monkeypatch):
+    monkeypatch.setattr(queue, "HEARTBEAT_INTERVAL", timedelta(milliseconds=50))
+    add_task(outlive_heartbeats)
+
+    assert run_pending() == 1
+
+    [(before, after)] = CALLS
+    assert after > before
+    assert Job.objects.get().status == JobStatus.DONE
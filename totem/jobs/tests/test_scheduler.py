@@ -0,0 +1,144 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from totem.jobs.models import ScheduledTask, TaskRunStatus
+from totem.jobs.scheduler import LOCKED, NOT_DUE, PeriodicTask, run_periodic_tasks
+
+CALLS: list[str] = []
+
+
+def first():
+    CALLS.append("first")
+
+
+def second():
+    CALLS.append("second")
+
+
+def explode():
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    CALLS.clear()
+
+
+def _name(fn) -> str:
+    return PeriodicTask(fn).name
+
+
+# Tasks run on their own threads and connections, so they only see committed data.
+@pytest.mark.django_db(transaction=True)
+class TestRunPeriodicTasks:
+    def test_runs_tasks_and_records_success(self):
+        outcomes = run_periodic_tasks([first, PeriodicTask(second)])
+
+        assert sorted(CALLS) == ["first", "second"]
+        assert outcomes == {_name(first): TaskRunStatus.SUCCESS, _name(second): TaskRunStatus.SUCCESS}
+        state = ScheduledTask.objects.get(name=_name(first))
+        assert state.last_status == TaskRunStatus.SUCCESS
+        assert state.last_success is not None
+        assert state.last_started is not None
+        assert state.last_duration is not None
+
+    def test_failure_is_recorded_and_does_not_stop_other_tasks(self):
+        last_success = timezone.now() - timedelta(days=1)
+        ScheduledTask.objects.create(name=_name(explode), last_success=last_success)
+
+        outcomes = run_periodic_tasks([explode, first])
+
+        assert CALLS == ["first"]
+        assert outcomes[_name(explode)] == TaskRunStatus.FAILED
+        state = ScheduledTask.objects.get(name=_name(explode))
+        assert state.last_status == TaskRunStatus.FAILED
+        assert "boom" in state.last_error
+        assert state.last_success == last_success
+
+    def test_skips_tasks_that_are_not_due(self):
+        ScheduledTask.objects.create(name=_name(first), last_success=timezone.now() - timedelta(minutes=30))
+        ScheduledTask.objects.create(name=_name(second), last_success=timezone.now() - timedelta(hours=2))
+
+        outcomes = run_periodic_tasks(
+            [PeriodicTask(first, interval=timedelta(hours=1)), PeriodicTask(second, interval=timedelta(hours=1))]
+        )
+
+        assert CALLS == ["second"]
+        assert outcomes[_name(first)] == NOT_DUE
+
+    def test_skips_task_locked_by_another_invocation(self):
+        key = f"totem_tasks:{_name(first)}"
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", [key])
+        try:
+            outcomes = run_periodic_tasks([first, second])
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", [key])
+
+        assert CALLS == ["second"]
+        assert outcomes[_name(first)] == LOCKED
+        assert not ScheduledTask.objects.filter(name=_name(first)).exists()
+
+    def test_runs_tasks_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def left():
+            barrier.wait()
+
+        def right():
+            barrier.wait()
+
+        outcomes = run_periodic_tasks([left, right], max_workers=2)
+
+        assert set(outcomes.values()) == {TaskRunStatus.SUCCESS}
+
+    def test_overrunning_task_times_out_and_frees_its_slot(self):
+        release = threading.Event()
+
+        def hang():
+            release.wait(timeout=10)
+
+        try:
+            outcomes = run_periodic_tasks(
+                [PeriodicTask(hang, timeout=timedelta(milliseconds=200)), first], max_workers=1
+            )
+            state = ScheduledTask.objects.get(name=_name(hang))
+        finally:
+            release.set()
+            # Let the abandoned thread finish before the database is flushed.
+            for thread in threading.enumerate():
+                if thread.name == f"totem_tasks:{_name(hang)}":
+                    thread.join(timeout=10)
+
+        assert outcomes[_name(hang)] == TaskRunStatus.TIMEOUT
+        assert outcomes[_name(first)] == TaskRunStatus.SUCCESS
+        assert CALLS == ["first"]
+        assert state.last_status == TaskRunStatus.TIMEOUT
+        assert state.last_success is None
+
+    def test_task_finishing_after_its_timeout_stays_timed_out(self):
+        release = threading.Event()
+
+        def hang():
+            release.wait(timeout=10)
+
+        task = PeriodicTask(hang, timeout=timedelta(milliseconds=200))
+        assert run_periodic_tasks([task]) == {_name(hang): TaskRunStatus.TIMEOUT}
+        release.set()
+        for thread in threading.enumerate():
+            if thread.name == f"totem_tasks:{_name(hang)}":
+                thread.join(timeout=10)
+
+        state = ScheduledTask.objects.get(name=_name(hang))
+        assert state.last_status == TaskRunStatus.TIMEOUT
+        assert state.last_duration == pytest.approx(0.2)
+        assert state.last_success is None
+
+        # The next run is recorded as usual.
+        assert run_periodic_tasks([task]) == {_name(hang): TaskRunStatus.SUCCESS}
+        assert ScheduledTask.objects.get(name=_name(hang)).last_status == TaskRunStatus.SUCCESS
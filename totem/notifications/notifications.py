@@ -56,10 +56,10 @@ class MissedSessionNotification(Notification):
     category: str = NotificationType.MISSED_SESSION
 
 
-def session_starting_notification(event: space_models.Session, user: User) -> Notification:
+def session_starting_notification(event: space_models.Session, *users: User) -> Notification:
     """Creates a notification that a session is starting soon."""
     return SessionStartingNotification(
-        recipients=[user],
+        recipients=list(users),
         title="🚨 Your Space is starting soon!",
         message=event.space.title,
         extra_data={
@@ -69,14 +69,14 @@ def session_starting_notification(event: space_models.Session, user: User) -> No
     )
 
 
-def session_advertisement_notification(event: space_models.Session, user: User) -> Notification:
+def session_advertisement_notification(event: space_models.Session, *users: User) -> Notification:
     """Creates a notification to advertise a new session."""
     title = event.title or event.space.subtitle
     author_name = event.space.author.name
     image_url = event.space.image.url if event.space.image else None
 
     return SessionAdvertisementNotification(
-        recipients=[user],
+        recipients=list(users),
         title=f"New Space Available: {title}",
         message=f"A new session by {author_name} has been posted. Reserve a spot now!",
         extra_data={
@@ -87,11 +87,11 @@ def session_advertisement_notification(event: space_models.Session, user: User)
     )
 
 
-def missed_session_notification(event: space_models.Session, user: User) -> Notification:
-    """Creates a notification for a user who missed a session."""
+def missed_session_notification(event: space_models.Session, *users: User) -> Notification:
+    """Creates a notification for users who missed a session."""
     title = event.title or event.space.title
     return MissedSessionNotification(
-        recipients=[user],
+        recipients=list(users),
         title="We missed you!",
         message=f"We missed you at the {title} session.",
         extra_data={
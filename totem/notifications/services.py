@@ -1,4 +1,6 @@
 import logging
+from collections import defaultdict
+from typing import NamedTuple
 
 import firebase_admin
 from django.conf import settings
@@ -10,6 +12,26 @@ from totem.users.models import User
 
 logger = logging.getLogger(__name__)
 
+# FCM rejects batches larger than 500 messages. send_each sends every message of
+# a batch on its own thread, so this is also how many threads a send starts.
+FCM_BATCH_SIZE = 100
+
+# Errors that mean the token will never work again, so the device should be deactivated.
+# Anything else (network, quota, server errors) leaves the device active.
+_INVALID_TOKEN_ERRORS = (
+    messaging.UnregisteredError,
+    messaging.SenderIdMismatchError,
+    messaging.ThirdPartyAuthError,
+)
+
+
+class PushMessage(NamedTuple):
+    """The payload of a single push notification."""
+
+    title: str
+    body: str
+    data: dict[str, str] | None = None
+
 
 def initialize_firebase():
     """
@@ -79,45 +101,101 @@ def send_notification(tokens: list[str], title: str, body: str, data: dict[str,
     if not initialize_firebase():
         return False
 
-    notification = messaging.Notification(
-        title=title,
-        body=body,
-    )
-    data_payload = data or {}
-
-    success_count = 0
-    invalid_tokens = []  # Tokens that are no longer valid (should be deactivated)
-    successful_tokens = []
-
-    for token in tokens:
-        message = messaging.Message(notification=notification, data=data_payload, token=token)
-
-        try:
-            messaging.send(message)
-            success_count += 1
-            successful_tokens.append(token)
-        except messaging.UnregisteredError:
-            # Token is no longer valid - mark for deactivation
-            invalid_tokens.append(token)
-            logger.info("FCM token invalid and marked as inactive: %s...", token[:20])
-        except messaging.SenderIdMismatchError:
-            # Token was registered with a different sender - mark for deactivation
-            invalid_tokens.append(token)
-            logger.warning("FCM token sender mismatch: %s...", token[:20])
-        except messaging.ThirdPartyAuthError:
-            # APNs or Web Push auth error - token's platform has invalid auth config
-            # These tokens will never work, so deactivate them
-            invalid_tokens.append(token)
-            logger.warning("FCM token has third-party auth error (APNs/Web Push): %s...", token[:20])
-        except Exception as e:
-            # Don't deactivate token for server-side errors (network, quota, etc.)
-            logger.error("Failed to send FCM notification (%s): %s", type(e).__name__, e)
-
-    # Bulk update the device records to avoid individual DB queries
-    if successful_tokens:
-        FCMDevice.objects.filter(token__in=successful_tokens).update(last_used=timezone.now())
-
-    if invalid_tokens:
-        FCMDevice.objects.filter(token__in=invalid_tokens).update(active=False)
-
-    return success_count > 0
+    message = PushMessage(title, body, data)
+    delivered = _dispatch([(token, _build_message(token, message)) for token in tokens])
+    return any(delivered)
+
+
+def send_notifications(messages: list[tuple[User, PushMessage]]) -> dict[int, bool]:
+    """
+    Send push notifications to many users at once, each with its own payload.
+
+    All active device tokens are resolved with a single query, then sent through
+    FCM's batch API in chunks of FCM_BATCH_SIZE, one chunk at a time.
+
+    Args:
+        messages: list of (user, payload) pairs
+
+    Returns:
+        dict: Mapping of user IDs to success status (True if sent to at least one device)
+    """
+    results: dict[int, bool] = {user.pk: False for user, _ in messages}
+    if not messages:
+        return results
+
+    tokens_by_user: dict[int, list[str]] = defaultdict(list)
+    devices = FCMDevice.objects.filter(user_id__in=results.keys(), active=True).values_list("user_id", "token")
+    for user_id, token in devices:
+        tokens_by_user[user_id].append(token)
+
+    if not tokens_by_user or not initialize_firebase():
+        return results
+
+    outgoing: list[tuple[str, messaging.Message]] = []
+    owners: list[int] = []
+    for user, message in messages:
+        for token in tokens_by_user.get(user.pk, []):
+            outgoing.append((token, _build_message(token, message)))
+            owners.append(user.pk)
+
+    for user_id, delivered in zip(owners, _dispatch(outgoing)):
+        if delivered:
+            results[user_id] = True
+    return results
+
+
+def _build_message(token: str, message: PushMessage) -> messaging.Message:
+    notification = messaging.Notification(title=message.title, body=message.body)
+    return messaging.Message(notification=notification, data=message.data or {}, token=token)
+
+
+def _dispatch(outgoing: list[tuple[str, messaging.Message]]) -> list[bool]:
+    """
+    Send (token, message) pairs through FCM in batches and return per-message
+    delivery status, in the same order as `outgoing`.
+
+    Batches go one after another: send_each already sends a batch's messages
+    in parallel, on a thread each.
+    """
+    delivered: list[bool] = []
+    for i in range(0, len(outgoing), FCM_BATCH_SIZE):
+        batch = outgoing[i : i + FCM_BATCH_SIZE]
+        batch_results = _send_batch(batch)
+        successful_tokens = [token for (token, _), (ok, _) in zip(batch, batch_results) if ok]
+        invalid_tokens = [token for (token, _), (_, invalid) in zip(batch, batch_results) if invalid]
+
+        # Bulk update the device records to avoid individual DB queries
+        if successful_tokens:
+            FCMDevice.objects.filter(token__in=successful_tokens).update(last_used=timezone.now())
+        if invalid_tokens:
+            FCMDevice.objects.filter(token__in=invalid_tokens).update(active=False)
+
+        delivered.extend(ok for ok, _ in batch_results)
+    return delivered
+
+
+def _send_batch(batch: list[tuple[str, messaging.Message]]) -> list[tuple[bool, bool]]:
+    """Send one batch with FCM. Returns (delivered, token_invalid) for each message."""
+    try:
+        response = messaging.send_each([message for _, message in batch])
+    except Exception as e:
+        # The whole batch failed (auth, network). Don't deactivate tokens for server-side errors.
+        logger.error("Failed to send FCM batch of %d (%s): %s", len(batch), type(e).__name__, e)
+        return [(False, False)] * len(batch)
+
+    results: list[tuple[bool, bool]] = []
+    for (token, _), send_response in zip(batch, response.responses):
+        if send_response.success:
+            results.append((True, False))
+        elif isinstance(send_response.exception, _INVALID_TOKEN_ERRORS):
+            logger.info(
+                "FCM token invalid and marked as inactive (%s): %s...",
+                type(send_response.exception).__name__,
+                token[:20],
+            )
+            results.append((False, True))
+        else:
+            error = send_response.exception
+            logger.error("Failed to send FCM notification (%s): %s", type(error).__name__, error)
+            results.append((False, False))
+    return results
@@ -1,15 +1,33 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+from firebase_admin import messaging
 
+from totem.notifications.models import FCMDevice
 from totem.notifications.services import (
+    PushMessage,
     send_notification,
     send_notification_to_user,
+    send_notifications,
 )
 from totem.notifications.tests.factories import FCMDeviceFactory
 from totem.users.tests.factories import UserFactory
 
 
+def _batch_response(messages, failures: dict[str, Exception] | None = None):
+    """Build a fake messaging.BatchResponse for a send_each call."""
+    failures = failures or {}
+    responses = []
+    for message in messages:
+        response = MagicMock()
+        response.exception = failures.get(message.token)
+        response.success = response.exception is None
+        responses.append(response)
+    batch = MagicMock()
+    batch.responses = responses
+    return batch
+
+
 @pytest.mark.django_db
 class TestNotificationServices:
     """Test notification services functionality."""
@@ -35,10 +53,7 @@ class TestNotificationServices:
     def test_send_notification_success(self, mock_messaging, mock_firebase_initialized):
         """Test successful notification sending."""
         # Set up mock for successful send
-        mock_response = MagicMock()
-        mock_response.success_count = 2
-        mock_response.failure_count = 0
-        mock_messaging.send.return_value = mock_response
+        mock_messaging.send_each.side_effect = _batch_response
 
         # Call the function
         tokens = ["token1", "token2"]
@@ -47,9 +62,9 @@ class TestNotificationServices:
         # Verify the result
         assert result is True
         mock_messaging.Message.assert_called()
-        mock_messaging.send.assert_called()
+        mock_messaging.send_each.assert_called_once()
 
-    @patch("totem.notifications.services.messaging.send")
+    @patch("totem.notifications.services.messaging.send_each")
     def test_send_notification_all_failed(self, mock_messaging, mock_firebase_initialized):
         """Test notification sending with all tokens failing."""
         # Set up mock for complete failure
@@ -91,3 +106,104 @@ class TestNotificationServices:
         # Verify the result
         assert result is False
         mock_send_notification.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestSendNotifications:
+    """Test the batched fan-out path."""
+
+    @pytest.fixture(autouse=True)
+    def mock_firebase_initialized(self):
+        with patch("totem.notifications.services.initialize_firebase", return_value=True):
+            yield
+
+    @patch("totem.notifications.services.messaging.send_each")
+    def test_resolves_devices_in_one_query(self, mock_send_each, django_assert_num_queries):
+        mock_send_each.side_effect = _batch_response
+        users = [UserFactory() for _ in range(5)]
+        for user in users:
+            FCMDeviceFactory(user=user)
+            FCMDeviceFactory(user=user)
+        message = PushMessage("Title", "Body", {"key": "value"})
+
+        # One query for tokens, one bulk update for last_used
+        with django_assert_num_queries(2):
+            results = send_notifications([(user, message) for user in users])
+
+        assert results == {user.pk: True for user in users}
+        mock_send_each.assert_called_once()
+        assert len(mock_send_each.call_args[0][0]) == 10
+
+    @patch("totem.notifications.services.FCM_BATCH_SIZE", 3)
+    @patch("totem.notifications.services.messaging.send_each")
+    def test_sends_in_chunks(self, mock_send_each):
+        mock_send_each.side_effect = _batch_response
+        users = [UserFactory() for _ in range(7)]
+        for user in users:
+            FCMDeviceFactory(user=user)
+
+        send_notifications([(user, PushMessage("Title", "Body")) for user in users])
+
+        batch_sizes = sorted(len(call[0][0]) for call in mock_send_each.call_args_list)
+        assert batch_sizes == [1, 3, 3]
+
+    @patch("totem.notifications.services.messaging.send_each")
+    def test_reports_per_user_results(self, mock_send_each):
+        ok_user = UserFactory()
+        ok_device = FCMDeviceFactory(user=ok_user, last_used=None)
+        failing_user = UserFactory()
+        failing_device = FCMDeviceFactory(user=failing_user)
+        no_device_user = UserFactory()
+        mock_send_each.side_effect = lambda messages: _batch_response(
+            messages, {failing_device.token: Exception("Server error")}
+        )
+
+        message = PushMessage("Title", "Body")
+        results = send_notifications([(ok_user, message), (failing_user, message), (no_device_user, message)])
+
+        assert results == {ok_user.pk: True, failing_user.pk: False, no_device_user.pk: False}
+        ok_device.refresh_from_db()
+        failing_device.refresh_from_db()
+        assert ok_device.last_used is not None
+        # Server-side errors don't deactivate the device
+        assert failing_device.active is True
+
+    @patch("totem.notifications.services.messaging.send_each")
+    def test_deactivates_invalid_tokens(self, mock_send_each):
+        user = UserFactory()
+        valid = FCMDeviceFactory(user=user)
+        invalid = FCMDeviceFactory(user=user)
+        mock_send_each.side_effect = lambda messages: _batch_response(
+            messages, {invalid.token: messaging.UnregisteredError("gone")}
+        )
+
+        results = send_notifications([(user, PushMessage("Title", "Body"))])
+
+        assert results == {user.pk: True}
+        valid.refresh_from_db()
+        invalid.refresh_from_db()
+        assert valid.active is True
+        assert invalid.active is False
+
+    @patch("totem.notifications.services.messaging.send_each")
+    def test_batch_failure_keeps_devices_active(self, mock_send_each):
+        mock_send_each.side_effect = Exception("Boom!")
+        user = UserFactory()
+        device = FCMDeviceFactory(user=user)
+
+        results = send_notifications([(user, PushMessage("Title", "Body"))])
+
+        assert results == {user.pk: False}
+        device.refresh_from_db()
+        assert device.active is True
+
+    @patch("totem.notifications.services.messaging.send_each")
+    def test_skips_users_without_devices(self, mock_send_each):
+        user = UserFactory()
+        FCMDeviceFactory(user=user, active=False)
+
+        results = send_notifications([(user, PushMessage("Title", "Body"))])
+
+        assert results == {user.pk: False}
+        mock_send_each.assert_not_called()
+        assert FCMDevice.objects.filter(user=user, active=True).count() == 0
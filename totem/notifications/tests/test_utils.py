@@ -2,6 +2,7 @@ from unittest.mock import patch
 
 import pytest
 
+from totem.notifications.services import PushMessage
 from totem.notifications.utils import notify_users
 from totem.users.tests.factories import UserFactory
 
@@ -10,14 +11,14 @@ from totem.users.tests.factories import UserFactory
 class TestNotificationUtils:
     """Test notification utility functions."""
 
-    @patch("totem.notifications.utils.send_notification_to_user")
+    @patch("totem.notifications.utils.send_notifications")
     def test_notify_users(self, mock_send):
         """Test notify_users function with multiple users."""
         # Create test users
         users = [UserFactory() for _ in range(3)]
 
-        # Configure mock to return True for first two users and False for the third
-        mock_send.side_effect = [True, True, False]
+        # Configure mock to report the first two users as notified
+        mock_send.return_value = {users[0].pk: True, users[1].pk: True, users[2].pk: False}
 
         # Call the function
         result = notify_users(users, "Test Title", "Test Body", {"key": "value"})
@@ -28,32 +29,28 @@ class TestNotificationUtils:
         assert result[users[1].pk] is True
         assert result[users[2].pk] is False
 
-        # Verify that send_notification_to_user was called for each user
-        assert mock_send.call_count == 3
+        # All users should be handed to the batch sender in one call
+        message = PushMessage("Test Title", "Test Body", {"key": "value"})
+        mock_send.assert_called_once_with([(user, message) for user in users])
 
-        # Check the arguments for each call
-        for i, user in enumerate(users):
-            mock_send.assert_any_call(user, "Test Title", "Test Body", {"key": "value"})
-
-    @patch("totem.notifications.utils.send_notification_to_user")
+    @patch("totem.notifications.utils.send_notifications")
     def test_notify_users_empty_list(self, mock_send):
         """Test notify_users with an empty user list."""
+        mock_send.return_value = {}
+
         # Call with empty list
         result = notify_users([], "Test Title", "Test Body")
 
         # Should return empty dict
         assert result == {}
 
-        # Should not call send_notification_to_user
-        mock_send.assert_not_called()
-
-    @patch("totem.notifications.utils.send_notification_to_user")
+    @patch("totem.notifications.utils.send_notifications")
     def test_notify_users_without_data(self, mock_send):
         """Test notify_users without data payload."""
         user = UserFactory()
-        mock_send.return_value = True
+        mock_send.return_value = {user.pk: True}
 
         result = notify_users([user], "Test Title", "Test Body")
 
         assert result[user.pk] is True
-        mock_send.assert_called_once_with(user, "Test Title", "Test Body", None)
+        mock_send.assert_called_once_with([(user, PushMessage("Test Title", "Test Body", None))])
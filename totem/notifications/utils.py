@@ -1,4 +1,4 @@
-from totem.notifications.services import send_notification_to_user
+from totem.notifications.services import PushMessage, send_notifications
 from totem.users.models import User
 
 
@@ -7,7 +7,7 @@ def notify_users(users: list[User], title: str, body: str, data: dict[str, str]
     Send a notification to multiple users
 
     Args:
-        users: List of User instances or user IDs
+        users: List of User instances
         title: Notification title
         body: Notification body
         data: Additional data payload
@@ -15,7 +15,5 @@ def notify_users(users: list[User], title: str, body: str, data: dict[str, str]
     Returns:
         dict: Mapping of user IDs to success status
     """
-    results = {}
-    for user in users:
-        results[user.pk] = send_notification_to_user(user, title, body, data)
-    return results
+    message = PushMessage(title, body, data)
+    return send_notifications([(user, message) for user in users])
@@ -15,7 +15,7 @@ class RoomEventLogInline(admin.TabularInline):
     model = RoomEventLog
     extra = 0
     can_delete = False
-    readonly_fields = ("version", "event_type", "actor", "snapshot")
+    readonly_fields = ("version", "event_type", "actor", "snapshot", "delta")
 
     @override
     def has_add_permission(self, request, obj=None):
@@ -3,13 +3,20 @@ Room API endpoints.
 
 This is the composition root — it wires together the state machine,
 LiveKit integration, and HTTP concerns. Kept as thin as possible.
+
+The views are async: Room reads use the async ORM and LiveKit calls are awaited
+on the shared client, so under ASGI a request waiting on LiveKit holds no
+thread. apply_event's transaction, and Session logic with no async form, run
+in sync_to_async.
 """
 
 from __future__ import annotations
 
 import logging
 
-from django.http import HttpRequest
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
 from django.utils import timezone
 from ninja import Router, Status
 
@@ -17,16 +24,21 @@ from totem.spaces.models import Session, Space
 from totem.users import analytics
 from totem.users.models import User
 
+from . import state_cache
 from .livekit import (
     LiveKitConfigurationError,
+    RoomEffects,
+    aapply_room_effects,
+    aget_connected_participants,
+    aget_participants,
+    amute_all_participants,
+    amute_participant,
+    aremove_participant,
+    connected_identities,
     create_access_token,
-    get_connected_participants,
-    mute_all_participants,
-    mute_participant,
-    publish_state,
-    remove_participant,
 )
 from .models import Room
+from .presence import acached_connected, arecord_snapshot
 from .schemas import (
     AcceptStickEvent,
     BanParticipantEvent,
@@ -35,6 +47,7 @@ from .schemas import (
     EventRequest,
     ForcePassStickEvent,
     JoinResponse,
+    RejoinResponse,
     RemoveParticipantPayload,
     RemoveReason,
     RoomErrorResponse,
@@ -72,17 +85,26 @@ logger = logging.getLogger(__name__)
         "and broadcasts the new state to LiveKit."
     ),
 )
-def post_event(
+async def post_event(
     request: HttpRequest,
     session_slug: str,
     body: EventRequest,
 ):
     user: User = request.user  # type: ignore
     actor = user.slug
-    connected = get_connected_participants(session_slug) or set()
+    # Presence comes from the webhook-fed cache when it's fresh. Otherwise ask
+    # LiveKit, and keep the participant list so muting doesn't list the room again.
+    connected = await acached_connected(session_slug)
+    participants = None
+    if connected is None:
+        participants = await aget_participants(session_slug)
+        connected = set()
+        if participants is not None:
+            connected = connected_identities(participants)
+            await arecord_snapshot(session_slug, connected)
 
     try:
-        state = apply_event(
+        state = await sync_to_async(apply_event)(
             session_slug=session_slug,
             actor=actor,
             event=body.event,
@@ -98,20 +120,25 @@ def post_event(
 
     # Side effects outside the DB transaction — best-effort.
     # If these fail, clients will catch up via polling.
-    publish_state(session_slug, state)
-
+    effects = RoomEffects(state=state)
     match body.event:
         case StartRoomEvent() | ForcePassStickEvent():
-            mute_all_participants(session_slug, except_identity=state.current_speaker)
+            effects.mute_all, effects.mute_except = True, state.current_speaker
         case AcceptStickEvent():
-            mute_all_participants(session_slug, except_identity=actor)
+            effects.mute_all, effects.mute_except = True, actor
         case EndRoomEvent():
-            mute_all_participants(session_slug)
+            effects.mute_all = True
         case BanParticipantEvent(participant_slug=slug):
-            banned_user = User.objects.filter(slug=slug).first()
+            banned_user = await User.objects.filter(slug=slug).afirst()
             if banned_user is not None:
                 analytics.user_banned_from_room(banned_user, session_slug)
-            remove_participant(session_slug, slug, reason=RemoveReason.BAN)
+            effects.remove, effects.remove_reason = slug, RemoveReason.BAN
+    await aapply_room_effects(
+        session_slug,
+        effects,
+        participants=participants,
+        wait=not settings.LIVEKIT_DEFER_ROOM_EFFECTS,
+    )
 
     return Status(200, state)
 
@@ -123,25 +150,29 @@ def post_event(
     description=(
         "Returns the current state snapshot. Used by clients on reconnect "
         "or as a fallback poll when LiveKit data messages may have been missed. "
+        "Send the ETag from the last response as If-None-Match to get a 304 "
+        "when the state hasn't changed."
     ),
 )
-def get_state(
+async def get_state(
     request: HttpRequest,
     session_slug: str,
 ):
     user: User = request.user  # type: ignore
-    room = Room.objects.for_session(session_slug).first()  # type: ignore
-
-    if not room:
-        return Status(
-            404,
-            RoomErrorResponse(
-                code=ErrorCode.NOT_FOUND,
-                message="Room not found",
-            ),
-        )
-
-    if not room.session.attendees.filter(slug=user.slug).exists():
+    cached = state_cache.get_state(session_slug)
+    if cached is None:
+        room = await Room.objects.for_session(session_slug).afirst()  # type: ignore
+        if not room:
+            return Status(
+                404,
+                RoomErrorResponse(
+                    code=ErrorCode.NOT_FOUND,
+                    message="Room not found",
+                ),
+            )
+        cached = state_cache.set_state(room.to_state())
+
+    if not await state_cache.ais_attendee(session_slug, user.slug):
         return Status(
             403,
             RoomErrorResponse(
@@ -150,7 +181,14 @@ def get_state(
             ),
         )
 
-    return Status(200, room.to_state())
+    version, body = cached
+    etag = state_cache.etag(session_slug, version)
+    if etag in request.headers.get("If-None-Match", ""):
+        response: HttpResponse = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    return response
 
 
 # ---------------------------------------------------------------------------
@@ -158,64 +196,62 @@ def get_state(
 # ---------------------------------------------------------------------------
 
 
-@router.post(
-    "/{session_slug}/join",
-    response={200: JoinResponse, **ERROR_RESPONSES},
-    summary="Join a session room",
-    description="Returns a LiveKit access token. Creates the Room if needed.",
-)
-def join_room(
-    request: HttpRequest,
-    session_slug: str,
-):
-    user: User = request.user  # type: ignore
-
-    session = Session.objects.filter(slug=session_slug).first()
+async def _connected_participants(session_slug: str) -> set[str] | None:
+    """Who's in the LiveKit room, from the presence cache or LiveKit. None if LiveKit can't be reached."""
+    connected = await acached_connected(session_slug)
+    if connected is None:
+        try:
+            connected = await aget_connected_participants(session_slug)
+        except Exception:
+            logger.exception("Failed to fetch connected participants from LiveKit")
+        if connected is not None:
+            await arecord_snapshot(session_slug, connected)
+    return connected
+
+
+async def _join(
+    user: User, session_slug: str, with_presence: bool = False
+) -> tuple[Room, str, set[str] | None] | RoomErrorResponse:
+    """
+    Helper: check the user may join and mint their token. Returns (room, token,
+    connected) or an ErrorResponse. `connected` is only looked up when the join
+    needs it, or always for a LiveKit session `with_presence`.
+    """
+    session = await Session.objects.select_related("space__author").filter(slug=session_slug).afirst()
     if not session:
-        return Status(
-            404,
-            RoomErrorResponse(
-                code=ErrorCode.NOT_FOUND,
-                message="Session not found",
-            ),
-        )
+        return RoomErrorResponse(code=ErrorCode.NOT_FOUND, message="Session not found")
 
-    if not session.can_join(user):
+    if not await sync_to_async(session.can_join)(user):
         return RoomErrorResponse(
             code=ErrorCode.NOT_JOINABLE,
             message="Session is not joinable at this time",
-        ).as_http_response()
+        )
 
-    room = Room.objects.get_or_create_for_session(session)
+    room = await Room.objects.aget_or_create_for_session(session)
     if room.status == RoomStatus.ENDED:
         return RoomErrorResponse(
             code=ErrorCode.ROOM_ALREADY_ENDED,
             message="This session has ended",
-        ).as_http_response()
+        )
 
     now = timezone.now()
     need_participants = session.space.meeting_provider == Space.MeetingProviderChoices.LIVEKIT and (
-        (now > session.end() and user != session.space.author) or session.joined.count() > 0
+        with_presence or (now > session.end() and user != session.space.author) or await session.joined.aexists()
     )
-    connected: set[str] | None = None
-    if need_participants:
-        try:
-            connected = get_connected_participants(session_slug)
-        except Exception:
-            logger.exception("Failed to fetch connected participants from LiveKit")
+    connected = await _connected_participants(session_slug) if need_participants else None
 
     if now > session.end() and user != session.space.author:
         if connected is not None and len(connected) == 0:
             return RoomErrorResponse(
                 code=ErrorCode.NOT_JOINABLE,
                 message="This session has ended",
-            ).as_http_response()
+            )
 
     if user.slug in room.banned_participants:
         return RoomErrorResponse(
             code=ErrorCode.BANNED,
             message="You have been banned from this session",
-        ).as_http_response()
+        )
 
     try:
         token = create_access_token(user, session.slug)
@@ -224,19 +260,65 @@ def join_room(
         return RoomErrorResponse(
             code=ErrorCode.LIVEKIT_ERROR,
             message="LiveKit service is not properly configured",
-        ).as_http_response()
-
-    is_already_connected = bool(connected and user.slug in connected)
+        )
 
-    session.joined.add(user)
+    await session.joined.aadd(user)
     analytics.event_joined(user, session)
+    return room, token, connected
+
+
+@router.post(
+    "/{session_slug}/join",
+    response={200: JoinResponse, **ERROR_RESPONSES},
+    summary="Join a session room",
+    description="Returns a LiveKit access token. Creates the Room if needed.",
+)
+async def join_room(
+    request: HttpRequest,
+    session_slug: str,
+):
+    user: User = request.user  # type: ignore
+    result = await _join(user, session_slug)
+    if isinstance(result, RoomErrorResponse):
+        return result.as_http_response()
+
+    _, token, connected = result
+    return Status(200, JoinResponse(token=token, is_already_present=bool(connected and user.slug in connected)))
+
 
-    return Status(200, JoinResponse(token=token, is_already_present=is_already_connected))
+@router.post(
+    "/{session_slug}/rejoin",
+    response={200: RejoinResponse, **ERROR_RESPONSES},
+    summary="Join a session room with its current state",
+    description=(
+        "Like join, but also returns the current state snapshot and who's connected, "
+        "so a reconnecting client needs a single request."
+    ),
+)
+async def rejoin_room(
+    request: HttpRequest,
+    session_slug: str,
+):
+    user: User = request.user  # type: ignore
+    result = await _join(user, session_slug, with_presence=True)
+    if isinstance(result, RoomErrorResponse):
+        return result.as_http_response()
+
+    room, token, connected = result
+    return Status(
+        200,
+        RejoinResponse(
+            token=token,
+            is_already_present=bool(connected and user.slug in connected),
+            state=room.to_state(),
+            connected=sorted(connected) if connected is not None else None,
+        ),
+    )
 
 
-def _get_room_and_require_keeper(user: User, session_slug: str) -> Room | RoomErrorResponse:
+async def _get_room_and_require_keeper(user: User, session_slug: str) -> Room | RoomErrorResponse:
     """Helper: load the Room and verify the user is the keeper. Returns Room or ErrorResponse tuple."""
-    room = Room.objects.for_session(session_slug).first()  # type: ignore
+    room = await Room.objects.for_session(session_slug).afirst()  # type: ignore
     if not room:
         return RoomErrorResponse(code=ErrorCode.NOT_FOUND, message="Room not found")
 
@@ -252,18 +334,18 @@ def _get_room_and_require_keeper(user: User, session_slug: str) -> Room | RoomEr
     summary="Mute a participant",
     description="Keeper mutes a specific participant's audio.",
 )
-def mute(
+async def mute(
     request: HttpRequest,
     session_slug: str,
     participant_identity: str,
 ):
     user: User = request.user  # type: ignore
-    result = _get_room_and_require_keeper(user, session_slug)
+    result = await _get_room_and_require_keeper(user, session_slug)
     if isinstance(result, RoomErrorResponse):
         return result.as_http_response()
 
     try:
-        mute_participant(session_slug, participant_identity)
+        await amute_participant(session_slug, participant_identity)
     except LiveKitConfigurationError:
         return RoomErrorResponse(
             code=ErrorCode.LIVEKIT_ERROR, message="LiveKit service is not properly configured"
@@ -278,17 +360,17 @@ def mute(
     summary="Mute all participants",
     description="Keeper mutes everyone except themselves.",
 )
-def mute_all(
+async def mute_all(
     request: HttpRequest,
     session_slug: str,
 ):
     user: User = request.user  # type: ignore
-    result = _get_room_and_require_keeper(user, session_slug)
+    result = await _get_room_and_require_keeper(user, session_slug)
     if isinstance(result, RoomErrorResponse):
         return result.as_http_response()
 
     try:
-        mute_all_participants(session_slug, except_identity=user.slug)
+        await amute_all_participants(session_slug, except_identity=user.slug)
     except LiveKitConfigurationError:
         return RoomErrorResponse(
             code=ErrorCode.LIVEKIT_ERROR, message="LiveKit service is not properly configured"
@@ -303,14 +385,14 @@ def mute_all(
     summary="Remove a participant",
     description="Emits a remove event to a specific participant",
 )
-def remove(
+async def remove(
     request: HttpRequest,
     session_slug: str,
     participant_identity: str,
     reason: RemoveReason = RemoveReason.REMOVE,
 ):
     user: User = request.user  # type: ignore
-    result = _get_room_and_require_keeper(user, session_slug)
+    result = await _get_room_and_require_keeper(user, session_slug)
     if isinstance(result, RoomErrorResponse):
         return result.as_http_response()
 
@@ -321,13 +403,13 @@ def remove(
         ).as_http_response()
 
     try:
-        remove_participant(session_slug, participant_identity, reason=reason)
+        await aremove_participant(session_slug, participant_identity, reason=reason)
     except LiveKitConfigurationError:
         return RoomErrorResponse(
             code=ErrorCode.LIVEKIT_ERROR, message="LiveKit service is not properly configured"
         ).as_http_response()
 
-    removed_user = User.objects.filter(slug=participant_identity).first()
+    removed_user = await User.objects.filter(slug=participant_identity).afirst()
     if removed_user:
         analytics.user_removed_from_room(removed_user, session_slug)
 
@@ -0,0 +1,197 @@
+"""
+Room event log storage.
+
+Storing the full RoomState on every transition makes the log grow with the
+room: a long session writes the whole talking order hundreds of times. Instead
+a row carries a full snapshot every SNAPSHOT_INTERVAL versions and otherwise
+only the top-level fields the transition changed, so a stick pass costs the
+same however many people are in the room.
+
+Once a room has been ended for ARCHIVE_AFTER, archive_ended_rooms folds its
+rows into a single RoomArchive. replay() rebuilds any logged version from
+either form.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Room, RoomArchive, RoomEventLog
+from .schemas import RoomEvent, RoomState, RoomStatus
+
+SNAPSHOT_INTERVAL = 20
+ARCHIVE_AFTER = timedelta(days=1)
+
+StateDict = dict[str, Any]
+
+
+def diff(before: StateDict, after: StateDict) -> StateDict:
+    """The top-level fields of `after` that differ from `before`."""
+    return {key: value for key, value in after.items() if before.get(key) != value}
+
+
+@dataclass(frozen=True)
+class LoggedTransition:
+    version: int
+    event_type: str
+    actor: str  # user slug
+    event: StateDict | None  # the RoomEvent as JSON; None for rows logged before events were stored
+    connected: list[str]  # user slugs
+    state: RoomState  # the state after the transition
+
+
+def record(
+    room: Room,
+    event: RoomEvent,
+    actor: str,
+    connected: set[str],
+    before: RoomState,
+    after: RoomState,
+) -> RoomEventLog:
+    """Append the transition from `before` to `after`. Call inside the transaction that applied it."""
+    state = after.model_dump(mode="json")
+    log = RoomEventLog(
+        room=room,
+        version=after.version,
+        event_type=event.type,
+        actor=actor,
+        event=event.model_dump(mode="json"),
+        connected=sorted(connected),
+    )
+    if (after.version - 1) % SNAPSHOT_INTERVAL == 0:
+        log.snapshot = state
+    else:
+        log.delta = diff(before.model_dump(mode="json"), state)
+    log.save()
+    return log
+
+
+def history(room: Room) -> Iterator[LoggedTransition]:
+    """Every logged transition of the room in version order, archived ones first."""
+    state: StateDict | None = None
+    archive = RoomArchive.objects.filter(room=room).first()
+    if archive is not None:
+        state = archive.snapshot
+        for entry in archive.events:
+            state = {**state, **entry["delta"]}
+            yield LoggedTransition(
+                version=entry["version"],
+                event_type=entry["event_type"],
+                actor=entry["actor"],
+                event=entry.get("event"),
+                connected=entry.get("connected", []),
+                state=RoomState.model_validate(state),
+            )
+    for log in RoomEventLog.objects.filter(room=room).order_by("version").iterator():
+        state = log.snapshot if log.snapshot is not None else {**(state or {}), **(log.delta or {})}
+        yield LoggedTransition(
+            version=log.version,
+            event_type=log.event_type,
+            actor=log.actor,
+            event=log.event,
+            connected=log.connected,
+            state=RoomState.model_validate(state),
+        )
+
+
+def replay(room: Room, version: int) -> RoomState:
+    """
+    Rebuild the room's state as of `version`.
+
+    Raises RoomEventLog.DoesNotExist if that version isn't in the log or archive.
+    """
+    archive = RoomArchive.objects.filter(room=room).first()
+    if archive is not None and archive.events and version <= archive.events[-1]["version"]:
+        state: StateDict = archive.snapshot
+        if version < state["version"]:
+            raise RoomEventLog.DoesNotExist(f"Version {version} is not logged")
+        for event in archive.events:
+            if event["version"] > version:
+                break
+            state = {**state, **event["delta"]}
+        return RoomState.model_validate(state)
+
+    base = (
+        RoomEventLog.objects.filter(room=room, version__lte=version, snapshot__isnull=False)
+        .order_by("-version")
+        .values_list("version", "snapshot")
+        .first()
+    )
+    if base is None:
+        # Rows logged after the room was archived build on the archive's last state.
+        if archive is None or not archive.events:
+            raise RoomEventLog.DoesNotExist(f"Version {version} is not logged")
+        base_version = archive.events[-1]["version"]
+        state = replay(room, base_version).model_dump(mode="json")
+    else:
+        base_version, snapshot = base
+        assert snapshot is not None  # filtered on above
+        state = snapshot
+    deltas = list(
+        RoomEventLog.objects.filter(room=room, version__gt=base_version, version__lte=version)
+        .order_by("version")
+        .values_list("version", "delta")
+    )
+    if (deltas[-1][0] if deltas else base_version) != version:
+        raise RoomEventLog.DoesNotExist(f"Version {version} is not logged")
+    for _, delta in deltas:
+        state = {**state, **(delta or {})}
+    return RoomState.model_validate(state)
+
+
+def archive_room(room: Room) -> RoomArchive | None:
+    """Fold the room's log rows into its archive. Returns None if there was nothing to fold."""
+    with transaction.atomic():
+        logs = list(RoomEventLog.objects.select_for_update().filter(room=room).order_by("version"))
+        if not logs:
+            return None
+        archive = RoomArchive.objects.select_for_update().filter(room=room).first()
+        current: StateDict | None = None
+        if archive is None:
+            archive = RoomArchive(room=room, events=[])
+        elif archive.events:
+            current = replay(room, archive.events[-1]["version"]).model_dump(mode="json")
+
+        for log in logs:
+            state = log.snapshot if log.snapshot is not None else {**(current or {}), **(log.delta or {})}
+            if current is None:
+                archive.snapshot = state
+            archive.events.append(
+                {
+                    "version": log.version,
+                    "event_type": log.event_type,
+                    "actor": log.actor,
+                    "event": log.event,
+                    "connected": log.connected,
+                    "date_created": log.date_created.isoformat(),
+                    "delta": diff(current, state) if current is not None else {},
+                }
+            )
+            current = state
+
+        archive.save()
+        RoomEventLog.objects.filter(pk__in=[log.pk for log in logs]).delete()
+        return archive
+
+
+def archive_ended_rooms() -> int:
+    """Archive the logs of rooms that ended at least ARCHIVE_AFTER ago. Returns how many were archived."""
+    room_ids = (
+        RoomEventLog.objects.filter(
+            room__status=RoomStatus.ENDED,
+            room__date_modified__lte=timezone.now() - ARCHIVE_AFTER,
+        )
+        .values_list("room_id", flat=True)
+        .distinct()
+    )
+    archived = 0
+    for room in Room.objects.filter(pk__in=list(room_ids)):
+        if archive_room(room) is not None:
+            archived += 1
+    return archived
@@ -7,10 +7,19 @@ All LiveKit API calls live here — nowhere else in the app talks to LiveKit.
 from __future__ import annotations
 
 import asyncio
+import atexit
+import concurrent.futures
 import logging
+import os
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Concatenate, ParamSpec, TypeVar
 
-from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.core.cache import cache
 from livekit import api
 
 from totem.users.models import User
@@ -19,53 +28,308 @@ from .schemas import RemoveParticipantPayload, RemoveReason, RoomState
 
 logger = logging.getLogger(__name__)
 
+P = ParamSpec("P")
+T = TypeVar("T")
+
 
 def _get_api():
     if not settings.LIVEKIT_API_KEY or not settings.LIVEKIT_API_SECRET:
         raise LiveKitConfigurationError("LiveKit API key or secret not configured")
     return api.LiveKitAPI(
+        url=settings.LIVEKIT_URL,
         api_key=settings.LIVEKIT_API_KEY,
         api_secret=settings.LIVEKIT_API_SECRET,
     )
 
 
-async def _get_connected_participants(room_name: str) -> set[str]:
-    async with _get_api() as lkapi:
-        resp = await lkapi.room.list_participants(api.ListParticipantsRequest(room=room_name))
-        return {p.identity for p in resp.participants if p.state != api.ParticipantInfo.State.DISCONNECTED}
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
 
 
-async def _publish_state(room_name: str, state: RoomState) -> None:
-    async with _get_api() as lkapi:
-        await lkapi.room.update_room_metadata(
-            update=api.UpdateRoomMetadataRequest(
-                room=room_name,
-                metadata=state.model_dump_json(),
-            )
+@dataclass
+class RpcLatency:
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+class LiveKitClient:
+    """
+    One LiveKitAPI for the whole process, on an event loop in a daemon thread.
+
+    LiveKitAPI wraps an aiohttp session, so keeping a single instance alive lets
+    every call reuse its keep-alive TLS connections. Sync callers (WSGI request
+    threads, cron tasks) submit coroutines to the loop and block on the result,
+    which is safe from any number of threads at once. Async callers (ASGI views)
+    await the result from their own loop instead, so a call holds no thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._api: api.LiveKitAPI | None = None
+        self._pid: int | None = None
+        self.latency: dict[str, RpcLatency] = {}
+        # Pending mute-all sweeps by room name. Like _api, only touched on the loop thread.
+        self.mute_sweeps: dict[str, _MuteSweep] = {}
+
+    def run(self, fn: Callable[Concatenate[api.LiveKitAPI, P], Awaitable[T]], *args: P.args, **kwargs: P.kwargs) -> T:
+        """Call `fn(lkapi, *args, **kwargs)` on the client's loop and wait for its result."""
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=RPC_TIMEOUT_SECONDS)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def arun(
+        self, fn: Callable[Concatenate[api.LiveKitAPI, P], Awaitable[T]], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        """Like run(), for async callers: awaits the result without blocking the caller's loop."""
+        future = asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+        return await asyncio.wait_for(future, RPC_TIMEOUT_SECONDS)
+
+    def submit(
+        self, fn: Callable[Concatenate[api.LiveKitAPI, P], Awaitable[T]], *args: P.args, **kwargs: P.kwargs
+    ) -> concurrent.futures.Future[T]:
+        """Schedule `fn(lkapi, *args, **kwargs)` on the client's loop without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(self._call(fn, *args, **kwargs), self._ensure_loop())
+
+    def close(self) -> None:
+        """Close the HTTP session and stop the loop. The next call starts a fresh one."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None or self._pid != os.getpid():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._aclose(), loop).result(timeout=RPC_TIMEOUT_SECONDS)
+        except Exception:
+            logger.exception("Failed to close LiveKit client")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=RPC_TIMEOUT_SECONDS)
+        loop.close()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                # First use, or we're a forked child and the parent's loop thread didn't come with us.
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="livekit-client", daemon=True)
+                thread.start()
+                self._loop, self._thread, self._api, self._pid = loop, thread, None, os.getpid()
+                self.mute_sweeps = {}
+            return self._loop
+
+    async def _call(self, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        # Runs on the loop thread, which is the only thread touching _api and latency.
+        if self._api is None:
+            self._api = _get_api()
+        started = time.monotonic()
+        try:
+            return await fn(self._api, *args, **kwargs)
+        finally:
+            self._record(fn.__name__.lstrip("_"), time.monotonic() - started)
+
+    async def _aclose(self) -> None:
+        if self._api is not None:
+            await self._api.aclose()
+            self._api = None
+
+    def _record(self, name: str, seconds: float) -> None:
+        stats = self.latency.setdefault(name, RpcLatency())
+        stats.calls += 1
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        logger.debug("LiveKit %s took %.1fms", name, seconds * 1000)
+
+
+client = LiveKitClient()
+atexit.register(client.close)
+
+
+# ---------------------------------------------------------------------------
+# Presence and state
+# ---------------------------------------------------------------------------
+
+
+def connected_identities(participants: list[api.ParticipantInfo]) -> set[str]:
+    return {p.identity for p in participants if p.state != api.ParticipantInfo.State.DISCONNECTED}
+
+
+async def _get_participants(lkapi: api.LiveKitAPI, room_name: str) -> list[api.ParticipantInfo]:
+    resp = await lkapi.room.list_participants(api.ListParticipantsRequest(room=room_name))
+    return list(resp.participants)
+
+
+async def _get_connected_participants(lkapi: api.LiveKitAPI, room_name: str) -> set[str]:
+    return connected_identities(await _get_participants(lkapi, room_name))
+
+
+async def _get_connected_participants_by_room(
+    lkapi: api.LiveKitAPI, room_names: list[str]
+) -> dict[str, set[str] | None]:
+    """
+    One list_rooms call tells us which rooms have anyone in them; only those need
+    a list_participants call, and those run concurrently over the same client.
+    """
+    resp = await lkapi.room.list_rooms(api.ListRoomsRequest(names=room_names))
+    occupied = [room.name for room in resp.rooms if room.num_participants]
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PRESENCE_LOOKUPS)
+
+    async def lookup(room_name: str) -> set[str] | None:
+        async with semaphore:
+            try:
+                return await _get_connected_participants(lkapi, room_name)
+            except api.TwirpError:
+                logger.debug("Could not fetch participants for room %s", room_name, exc_info=True)
+                return None
+
+    results: dict[str, set[str] | None] = {name: set() for name in room_names}
+    results.update(zip(occupied, await asyncio.gather(*(lookup(name) for name in occupied)), strict=True))
+    return results
+
+
+async def _publish_state(lkapi: api.LiveKitAPI, room_name: str, state: RoomState) -> None:
+    await lkapi.room.update_room_metadata(
+        update=api.UpdateRoomMetadataRequest(
+            room=room_name,
+            metadata=state.model_dump_json(),
         )
+    )
 
 
-@async_to_sync
-async def get_connected_participants(room_name: str) -> set[str] | None:
+def get_participants(room_name: str) -> list[api.ParticipantInfo] | None:
+    """
+    Returns everyone LiveKit knows about in the room, tracks included, so callers
+    can derive the connected set and hand the same list to apply_room_effects.
+    Returns None when LiveKit is unreachable.
+    """
+    try:
+        return client.run(_get_participants, room_name)
+    except (api.TwirpError, TimeoutError):
+        logger.debug("Could not fetch participants for room %s", room_name, exc_info=True)
+        return None
+
+
+async def aget_participants(room_name: str) -> list[api.ParticipantInfo] | None:
+    try:
+        return await client.arun(_get_participants, room_name)
+    except (api.TwirpError, TimeoutError):
+        logger.debug("Could not fetch participants for room %s", room_name, exc_info=True)
+        return None
+
+
+def get_connected_participants(room_name: str) -> set[str] | None:
     """
     Returns the set of user slugs currently connected to the LiveKit room.
-    Returns None when LiveKit is unreachable so callers can distinguish
-    "empty room" from "could not check room".
+    Returns None when LiveKit is unreachable or doesn't answer within
+    RPC_TIMEOUT_SECONDS, so callers can distinguish "empty room" from "could
+    not check room".
     """
     try:
-        return await _get_connected_participants(room_name)
-    except api.TwirpError:
+        return client.run(_get_connected_participants, room_name)
+    except (api.TwirpError, TimeoutError):
+        logger.debug("Could not fetch participants for room %s", room_name, exc_info=True)
+        return None
+
+
+async def aget_connected_participants(room_name: str) -> set[str] | None:
+    try:
+        return await client.arun(_get_connected_participants, room_name)
+    except (api.TwirpError, TimeoutError):
         logger.debug("Could not fetch participants for room %s", room_name, exc_info=True)
         return None
 
 
-@async_to_sync
-async def publish_state(room_name: str, state: RoomState) -> None:
+def get_connected_participants_by_room(room_names: list[str]) -> dict[str, set[str] | None]:
+    """
+    Batched get_connected_participants: maps each room name to its connected user
+    slugs, or to None when that room could not be checked.
+    """
+    if not room_names:
+        return {}
+    try:
+        return client.run(_get_connected_participants_by_room, room_names)
+    except (api.TwirpError, TimeoutError):
+        logger.debug("Could not list rooms %s", room_names, exc_info=True)
+        return dict.fromkeys(room_names)
+
+
+def publish_state(room_name: str, state: RoomState) -> None:
     """
     Publishes the state snapshot to LiveKit room metadata.
     Fire-and-forget — failures are logged but don't raise.
     """
-    await _publish_state(room_name, state)
+    client.run(_publish_state, room_name, state)
+
+
+# ---------------------------------------------------------------------------
+# Room event side effects
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class RoomEffects:
+    """What LiveKit has to do after a room event: always publish the new state, sometimes mute or remove."""
+
+    state: RoomState
+    mute_all: bool = False
+    mute_except: str | None = None
+    remove: str | None = None
+    remove_reason: RemoveReason = RemoveReason.REMOVE
+
+
+async def _apply_room_effects(
+    lkapi: api.LiveKitAPI,
+    room_name: str,
+    effects: RoomEffects,
+    participants: list[api.ParticipantInfo] | None,
+) -> None:
+    calls = [_publish_state(lkapi, room_name, effects.state)]
+    if effects.mute_all:
+        calls.append(_mute_all_participants(lkapi, room_name, effects.mute_except, participants))
+    if effects.remove:
+        calls.append(_remove_participant(lkapi, room_name, effects.remove, effects.remove_reason))
+    for result in await asyncio.gather(*calls, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.error("LiveKit side effect failed for room %s", room_name, exc_info=result)
+
+
+def apply_room_effects(
+    room_name: str,
+    effects: RoomEffects,
+    participants: list[api.ParticipantInfo] | None = None,
+    wait: bool = True,
+) -> None:
+    """
+    Publish, mute and remove concurrently over the shared client, so a room event
+    costs about one LiveKit round trip. Muting uses `participants` when given
+    instead of listing the room again. Failures are logged, not raised: clients
+    catch up via polling. With `wait=False` this returns as soon as the calls are
+    scheduled.
+    """
+    future = client.submit(_apply_room_effects, room_name, effects, participants)
+    if wait:
+        future.result(timeout=RPC_TIMEOUT_SECONDS)
+
+
+async def aapply_room_effects(
+    room_name: str,
+    effects: RoomEffects,
+    participants: list[api.ParticipantInfo] | None = None,
+    wait: bool = True,
+) -> None:
+    if wait:
+        await client.arun(_apply_room_effects, room_name, effects, participants)
+    else:
+        client.submit(_apply_room_effects, room_name, effects, participants)
 
 
 # ---------------------------------------------------------------------------
@@ -73,7 +337,18 @@ async def publish_state(room_name: str, state: RoomState) -> None:
 # ---------------------------------------------------------------------------
 
 ROOM_EMPTY_TIMEOUT_SECONDS = 60 * 60  # 1 hour
+TOKEN_TTL = timedelta(hours=6)
+# A cached token is replaced once it has less than this left, so a client never gets one about to expire.
+TOKEN_REISSUE_BEFORE = timedelta(hours=1)
 MAX_PARTICIPANTS = 10
+# Upper bound on list_participants calls in flight during a presence sweep.
+MAX_CONCURRENT_PRESENCE_LOOKUPS = 8
+# Upper bound on mute_published_track calls in flight in one mute-all sweep.
+MAX_CONCURRENT_MUTES = 8
+# Upper bound on create_room calls in flight while pre-warming rooms.
+MAX_CONCURRENT_ROOM_CREATES = 8
+# How long a caller waits on the client before giving up on a call.
+RPC_TIMEOUT_SECONDS = 15
 
 
 # ---------------------------------------------------------------------------
@@ -90,18 +365,33 @@ class LiveKitConfigurationError(Exception):
 # ---------------------------------------------------------------------------
 
 
+def _token_key(user: User, room_name: str) -> str:
+    # The grants only depend on the room, so they don't need to be part of the key.
+    return f"rooms:token:{settings.LIVEKIT_API_KEY}:{room_name}:{user.slug}"
+
+
 def create_access_token(user: User, room_name: str) -> str:
     """
     Create a LiveKit access token for a user to join a session room.
     Raises LiveKitConfigurationError if LiveKit is not configured.
+
+    Tokens are cached and handed out again until TOKEN_REISSUE_BEFORE their
+    expiry, so a client reconnecting in a loop doesn't cost a signature per
+    attempt. A token minted under the user's old name isn't reused.
     """
     if not settings.LIVEKIT_API_KEY or not settings.LIVEKIT_API_SECRET:
         raise LiveKitConfigurationError("LiveKit API key and secret are not configured.")
 
+    name = user.name or "Anonymous"
+    cached: tuple[str, str] | None = cache.get(_token_key(user, room_name))
+    if cached is not None and cached[0] == name:
+        return cached[1]
+
     token = (
         api.AccessToken(settings.LIVEKIT_API_KEY, settings.LIVEKIT_API_SECRET)
+        .with_ttl(TOKEN_TTL)
         .with_identity(user.slug)
-        .with_name(user.name or "Anonymous")
+        .with_name(name)
         .with_grants(
             api.VideoGrants(
                 room=room_name,
@@ -116,9 +406,46 @@ def create_access_token(user: User, room_name: str) -> str:
                 max_participants=MAX_PARTICIPANTS,
             )
         )
-    )
+    ).to_jwt()
+    cache.set(_token_key(user, room_name), (name, token), (TOKEN_TTL - TOKEN_REISSUE_BEFORE).total_seconds())
+    return token
 
-    return token.to_jwt()
+
+# ---------------------------------------------------------------------------
+# Room creation
+# ---------------------------------------------------------------------------
+
+
+async def _create_rooms(lkapi: api.LiveKitAPI, room_names: list[str]) -> set[str]:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_ROOM_CREATES)
+
+    async def create(room_name: str) -> str | None:
+        async with semaphore:
+            try:
+                await lkapi.room.create_room(
+                    api.CreateRoomRequest(
+                        name=room_name,
+                        empty_timeout=ROOM_EMPTY_TIMEOUT_SECONDS,
+                        max_participants=MAX_PARTICIPANTS,
+                    )
+                )
+            except api.TwirpError:
+                logger.warning("Could not create LiveKit room %s", room_name, exc_info=True)
+                return None
+            return room_name
+
+    return {name for name in await asyncio.gather(*(create(name) for name in room_names)) if name}
+
+
+def create_rooms(room_names: list[str]) -> set[str]:
+    """
+    Create LiveKit rooms ahead of the first join, with the same configuration a
+    join token would create them with. Creating a room that exists is a no-op.
+    Returns the names that were created; failures are logged, not raised.
+    """
+    if not room_names:
+        return set()
+    return client.run(_create_rooms, room_names)
 
 
 # ---------------------------------------------------------------------------
@@ -126,94 +453,165 @@ def create_access_token(user: User, room_name: str) -> str:
 # ---------------------------------------------------------------------------
 
 
-async def _mute_participant(room_name: str, identity: str) -> None:
-    async with _get_api() as lkapi:
-        participant = await lkapi.room.get_participant(api.RoomParticipantIdentity(room=room_name, identity=identity))
-        if not participant:
-            return
+async def _mute_participant(lkapi: api.LiveKitAPI, room_name: str, identity: str) -> None:
+    participant = await lkapi.room.get_participant(api.RoomParticipantIdentity(room=room_name, identity=identity))
+    if not participant:
+        return
 
-        track_sid = None
-        for track in participant.tracks:
-            if track.type == api.TrackType.AUDIO:
-                track_sid = track.sid
-                break
+    track_sid = None
+    for track in participant.tracks:
+        if track.type == api.TrackType.AUDIO:
+            track_sid = track.sid
+            break
 
-        if track_sid is None:
-            return
+    if track_sid is None:
+        return
 
-        await lkapi.room.mute_published_track(
-            api.MuteRoomTrackRequest(
-                room=room_name,
-                identity=identity,
-                track_sid=track_sid,
-                muted=True,
-            )
+    await lkapi.room.mute_published_track(
+        api.MuteRoomTrackRequest(
+            room=room_name,
+            identity=identity,
+            track_sid=track_sid,
+            muted=True,
         )
+    )
 
 
-async def _mute_all_participants(room_name: str, except_identity: str | None = None) -> None:
-    """
-    Mute all participants in a room except for the specified identity. Optimization: Use asyncio.gather to make
-    all the api calls concurrently.
-    """
-    async with _get_api() as lkapi:
-        resp = await lkapi.room.list_participants(api.ListParticipantsRequest(room=room_name))
-        tasks = []
-        for participant in resp.participants:
-            if except_identity and participant.identity == except_identity:
-                continue
-            if participant.state == api.ParticipantInfo.State.DISCONNECTED:
-                continue
-            for track in participant.tracks:
-                if track.type == api.TrackType.AUDIO:
-                    tasks.append(
-                        lkapi.room.mute_published_track(
-                            api.MuteRoomTrackRequest(
-                                room=room_name,
-                                identity=participant.identity,
-                                track_sid=track.sid,
-                                muted=True,
-                            )
-                        )
-                    )
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        for result in results:
-            if isinstance(result, Exception):
-                logger.exception("Failed to mute participant in room %s", room_name, exc_info=result)
+@dataclass
+class _MuteSweep:
+    """A pending mute-all for one room. Requests that arrive before it starts update it instead of adding another."""
 
+    except_identity: str | None
+    participants: list[api.ParticipantInfo] | None
+    done: asyncio.Future[None]
+    started: bool = False
+    task: asyncio.Task[None] | None = None
 
-async def _remove_participant(room_name: str, identity: str, reason: RemoveReason = RemoveReason.REMOVE) -> None:
-    async with _get_api() as lkapi:
-        try:
-            await lkapi.room.send_data(
-                api.SendDataRequest(
-                    room=room_name,
-                    topic="lk-participant-removed-topic",
-                    data=RemoveParticipantPayload(identity=identity, reason=reason).model_dump_json().encode(),
-                    destination_identities=[identity],
-                    kind=api.DataPacket.Kind.RELIABLE,
-                )
+
+async def _mute_all_participants(
+    lkapi: api.LiveKitAPI,
+    room_name: str,
+    except_identity: str | None = None,
+    participants: list[api.ParticipantInfo] | None = None,
+) -> None:
+    """
+    Mute all participants in a room except for the specified identity.
+
+    Sweeps of a room never overlap. A request that arrives while one is running
+    is folded into a single follow-up sweep that uses the latest request's
+    arguments, so a burst of stick passes costs at most two sweeps however
+    many requests it makes. Every caller returns once a sweep that started
+    after their request has finished.
+    """
+    sweeps = client.mute_sweeps
+    sweep = sweeps.get(room_name)
+    if sweep is not None and not sweep.started:
+        sweep.except_identity, sweep.participants = except_identity, participants
+    else:
+        previous = sweep.done if sweep is not None else None
+        sweep = _MuteSweep(except_identity, participants, asyncio.get_running_loop().create_future())
+        # Callers that time out stop waiting; don't warn about an error nobody is left to see.
+        sweep.done.add_done_callback(lambda done: done.cancelled() or done.exception())
+        sweep.task = asyncio.ensure_future(_run_mute_sweep(lkapi, room_name, sweep, previous))
+        sweeps[room_name] = sweep
+    await asyncio.shield(sweep.done)
+
+
+async def _run_mute_sweep(
+    lkapi: api.LiveKitAPI, room_name: str, sweep: _MuteSweep, previous: asyncio.Future[None] | None
+) -> None:
+    if previous is not None:
+        await asyncio.wait([previous])
+    sweep.started = True
+    try:
+        await _mute_sweep(lkapi, room_name, sweep.except_identity, sweep.participants)
+    except Exception as e:
+        sweep.done.set_exception(e)
+    else:
+        sweep.done.set_result(None)
+    finally:
+        if client.mute_sweeps.get(room_name) is sweep:
+            del client.mute_sweeps[room_name]
+
+
+async def _mute_sweep(
+    lkapi: api.LiveKitAPI,
+    room_name: str,
+    except_identity: str | None,
+    participants: list[api.ParticipantInfo] | None,
+) -> None:
+    """
+    Mute every unmuted audio track, MAX_CONCURRENT_MUTES at a time. Uses
+    `participants` when given instead of listing the room. Tracks LiveKit
+    reports as muted already are skipped.
+    """
+    if participants is None:
+        participants = await _get_participants(lkapi, room_name)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_MUTES)
+
+    async def mute(identity: str, track_sid: str) -> None:
+        async with semaphore:
+            await lkapi.room.mute_published_track(
+                api.MuteRoomTrackRequest(room=room_name, identity=identity, track_sid=track_sid, muted=True)
             )
-        except Exception:
-            logger.exception(
-                "Failed to send remove data message to %s in room %s, falling back to hard remove", identity, room_name
+
+    tasks = []
+    for participant in participants:
+        if except_identity and participant.identity == except_identity:
+            continue
+        if participant.state == api.ParticipantInfo.State.DISCONNECTED:
+            continue
+        for track in participant.tracks:
+            if track.type == api.TrackType.AUDIO and not track.muted:
+                tasks.append(mute(participant.identity, track.sid))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.exception("Failed to mute participant in room %s", room_name, exc_info=result)
+
+
+async def _remove_participant(
+    lkapi: api.LiveKitAPI, room_name: str, identity: str, reason: RemoveReason = RemoveReason.REMOVE
+) -> None:
+    try:
+        await lkapi.room.send_data(
+            api.SendDataRequest(
+                room=room_name,
+                topic="lk-participant-removed-topic",
+                data=RemoveParticipantPayload(identity=identity, reason=reason).model_dump_json().encode(),
+                destination_identities=[identity],
+                kind=api.DataPacket.Kind.RELIABLE,
             )
-            await lkapi.room.remove_participant(api.RoomParticipantIdentity(room=room_name, identity=identity))
+        )
+    except Exception:
+        logger.exception(
+            "Failed to send remove data message to %s in room %s, falling back to hard remove", identity, room_name
+        )
+        await lkapi.room.remove_participant(api.RoomParticipantIdentity(room=room_name, identity=identity))
 
 
-@async_to_sync
-async def mute_participant(room_name: str, identity: str) -> None:
+def mute_participant(room_name: str, identity: str) -> None:
     """Mute a specific participant's audio track."""
-    await _mute_participant(room_name, identity)
+    client.run(_mute_participant, room_name, identity)
+
 
+async def amute_participant(room_name: str, identity: str) -> None:
+    await client.arun(_mute_participant, room_name, identity)
 
-@async_to_sync
-async def mute_all_participants(room_name: str, except_identity: str | None = None) -> None:
+
+def mute_all_participants(room_name: str, except_identity: str | None = None) -> None:
     """Mute all participants, optionally skipping one. Logs and continues on individual failures."""
-    await _mute_all_participants(room_name, except_identity)
+    client.run(_mute_all_participants, room_name, except_identity)
+
 
+async def amute_all_participants(room_name: str, except_identity: str | None = None) -> None:
+    await client.arun(_mute_all_participants, room_name, except_identity)
 
-@async_to_sync
-async def remove_participant(room_name: str, identity: str, reason: RemoveReason = RemoveReason.REMOVE) -> None:
+
+def remove_participant(room_name: str, identity: str, reason: RemoveReason = RemoveReason.REMOVE) -> None:
     """Remove a participant from the room."""
-    await _remove_participant(room_name, identity, reason)
+    client.run(_remove_participant, room_name, identity, reason)
+
+
+async def aremove_participant(room_name: str, identity: str, reason: RemoveReason = RemoveReason.REMOVE) -> None:
+    await client.arun(_remove_participant, room_name, identity, reason)
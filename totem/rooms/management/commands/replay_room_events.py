@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from totem.rooms.models import Room
+from totem.rooms.replay import check_room
+
+
+class Command(BaseCommand):
+    help = "Re-run room event logs through the state machine and report states that don't match."
+
+    def add_arguments(self, parser):
+        parser.add_argument("session_slugs", nargs="*", help="Sessions to check. Defaults to every room with a log.")
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.select_related("session")
+        if options["session_slugs"]:
+            rooms = rooms.filter(session__slug__in=options["session_slugs"])
+        else:
+            rooms = rooms.filter(events__isnull=False).distinct()
+
+        failed = 0
+        for room in rooms:
+            result = check_room(room)
+            for mismatch in result.mismatches:
+                reason = mismatch.error or f"expected {mismatch.expected}, got {mismatch.actual}"
+                self.stderr.write(f"{room.session.slug} v{mismatch.version}: {reason}")
+            self.stdout.write(
+                f"{room.session.slug}: {result.checked} checked, {result.skipped} skipped, "
+                f"{len(result.mismatches)} mismatched"
+            )
+            failed += bool(result.mismatches)
+
+        if failed:
+            raise CommandError(f"{failed} room(s) did not replay cleanly")
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.6 on 2026-10-17 04:25
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0004_room_round_message_room_round_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomPresence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('room_name', models.CharField(max_length=255, unique=True)),
+                ('connected', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), default=list)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
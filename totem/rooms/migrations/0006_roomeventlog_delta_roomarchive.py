@@ -0,0 +1,38 @@
+# Generated by Django 6.0.6 on 2026-10-17 04:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0005_roompresence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomeventlog',
+            name='delta',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='roomeventlog',
+            name='snapshot',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='RoomArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('snapshot', models.JSONField()),
+                ('events', models.JSONField(default=list)),
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='rooms.room')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.6 on 2026-10-17 04:45
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0006_roomeventlog_delta_roomarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomeventlog',
+            name='connected',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), default=list),
+        ),
+        migrations.AddField(
+            model_name='roomeventlog',
+            name='event',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.6 on 2026-10-17 05:18
+
+import django.contrib.postgres.fields
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import migrations, models
+
+
+def backfill_attendees(apps, schema_editor):
+    Room = apps.get_model("rooms", "Room")
+    User = apps.get_model("users", "User")
+    slugs = User.objects.filter(sessions_attending=models.OuterRef("session_id")).order_by("slug").values("slug")
+    Room.objects.update(attendees=ArraySubquery(slugs))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0007_roomeventlog_event_connected'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='attendees',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), default=list),
+        ),
+        migrations.RunPython(backfill_attendees, reverse_code=migrations.RunPython.noop),
+    ]
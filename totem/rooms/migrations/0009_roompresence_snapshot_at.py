@@ -0,0 +1,26 @@
+# Generated by Django 6.0.6 on 2026-10-17 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_snapshot_at(apps, schema_editor):
+    RoomPresence = apps.get_model("rooms", "RoomPresence")
+    RoomPresence.objects.update(snapshot_at=models.F("synced_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0008_room_attendees'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roompresence',
+            name='snapshot_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_snapshot_at, reverse_code=migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ from typing import TYPE_CHECKING, ClassVar
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
 
+from totem.users.models import User
 from totem.utils.models import BaseModel
 
 from .schemas import (
@@ -28,15 +29,65 @@ class RoomManager(models.Manager["Room"]):
 
     def get_or_create_for_session(self, session: Session) -> Room:
         """Get or create a Room for a Session, initializing from Session data."""
+        room = self.filter(session=session).first()
+        if room is not None:
+            # Pre-warmed rooms (see create_for_sessions) take this path, so joining only reads.
+            return room
+        attendees = [a.slug for a in session.attendees.all()]
         room, _created = self.get_or_create(
             session=session,
             defaults={
                 "keeper": session.space.author.slug,
-                "talking_order": [a.slug for a in session.attendees.all()],
+                "talking_order": attendees,
+                "attendees": sorted(attendees),
             },
         )
         return room
 
+    async def aget_or_create_for_session(self, session: Session) -> Room:
+        # Callers read room.session (to_state() does), which can't load lazily in async code.
+        room = await self.filter(session=session).afirst()
+        if room is not None:
+            room.session = session
+            return room
+        attendees = [a.slug async for a in session.attendees.all()]
+        room, _created = await self.aget_or_create(
+            session=session,
+            defaults={
+                "keeper": session.space.author.slug,
+                "talking_order": attendees,
+                "attendees": sorted(attendees),
+            },
+        )
+        room.session = session
+        return room
+
+    def create_for_sessions(self, sessions: list[Session]) -> list[Room]:
+        """
+        Create Rooms for the sessions that don't have one yet, initialized like
+        get_or_create_for_session, in three queries however many sessions there
+        are. Select `space__author` on the sessions. Returns the new rooms; one
+        that a first join created in the meantime is listed but not inserted.
+        """
+        existing = set(self.filter(session__in=sessions).values_list("session_id", flat=True))
+        sessions = [session for session in sessions if session.pk not in existing]
+        attendees: dict[int, list[str]] = {session.pk: [] for session in sessions}
+        for session_id, slug in User.objects.filter(sessions_attending__in=sessions).values_list(
+            "sessions_attending", "slug"
+        ):
+            attendees[session_id].append(slug)
+        rooms = [
+            Room(
+                session=session,
+                keeper=session.space.author.slug,
+                talking_order=attendees[session.pk],
+                attendees=sorted(attendees[session.pk]),
+            )
+            for session in sessions
+        ]
+        # A first join can race us to a room; theirs wins and ours is skipped.
+        return self.bulk_create(rooms, ignore_conflicts=True)
+
 
 class Room(BaseModel):
     """
@@ -73,6 +124,9 @@ class Room(BaseModel):
     next_speaker = models.CharField(max_length=50, null=True)  # user slug
     talking_order = ArrayField(models.CharField(max_length=50), default=list)  # user slugs
     banned_participants = ArrayField(models.CharField(max_length=50), default=list)  # user slugs
+    # Copy of session.attendees, kept in step by signals.sync_room_attendees so
+    # apply_event can authorize the actor from the row it already read.
+    attendees = ArrayField(models.CharField(max_length=50), default=list)  # user slugs
     round_number = models.PositiveIntegerField(default=0)
     round_message = models.TextField(null=True, blank=True, default=None)
     state_version = models.PositiveIntegerField(default=0)
@@ -108,15 +162,78 @@ class Room(BaseModel):
             round_message=self.round_message,
         )
 
+    def update_from_state(self, state: RoomState) -> list[str]:
+        """Copy a state produced by the state machine onto this row. Doesn't save; returns the fields that changed."""
+        values = {
+            "state_version": state.version,
+            "status": state.status,
+            "turn_state": state.turn_state,
+            "end_reason": state.status_detail.reason if isinstance(state.status_detail, EndedDetail) else None,
+            "current_speaker": state.current_speaker,
+            "next_speaker": state.next_speaker,
+            "talking_order": state.talking_order,
+            "keeper": state.keeper,
+            "banned_participants": state.banned_participants,
+            "round_number": state.round_number,
+            "round_message": state.round_message,
+        }
+        changed = [field for field, value in values.items() if getattr(self, field) != value]
+        for field in changed:
+            setattr(self, field, values[field])
+        return changed
+
 
 class RoomEventLog(BaseModel):
-    """Append-only log of every state transition."""
+    """
+    Append-only log of every state transition.
+
+    Every SNAPSHOT_INTERVAL versions a row stores the full RoomState in
+    `snapshot`; the rows in between only store `delta`, the top-level fields
+    that changed. `event` and `connected` are the state machine's inputs, so
+    the transition can be re-run. See totem.rooms.event_log for writing and
+    replaying.
+    """
 
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="events")
     version = models.PositiveIntegerField()
     event_type = models.CharField(max_length=50)
     actor = models.CharField(max_length=50)  # user slug
-    snapshot = models.JSONField()
+    event = models.JSONField(null=True, blank=True)  # null for rows logged before events were stored
+    connected = ArrayField(models.CharField(max_length=50), default=list)  # user slugs
+    snapshot = models.JSONField(null=True, blank=True)
+    delta = models.JSONField(null=True, blank=True)
 
     class Meta:  # pyright: ignore[reportIncompatibleVariableOverride]
         ordering = ["version"]
+
+
+class RoomArchive(BaseModel):
+    """
+    The event log of an ended room, folded into one row.
+
+    `snapshot` is the state at the first archived version and `events` lists
+    every archived transition in order, each with its delta.
+    """
+
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, related_name="archive")
+    snapshot = models.JSONField()
+    events = models.JSONField(default=list)  # [{version, event_type, actor, event, connected, date_created, delta}]
+
+
+class RoomPresence(BaseModel):
+    """
+    Who is connected to a LiveKit room, kept current by LiveKit webhooks.
+
+    Keyed by LiveKit room name (the session slug) rather than a Room FK, since
+    LiveKit may report on a room before its Room row exists. `synced_at` is the
+    time of the last snapshot or webhook applied, and `snapshot_at` the time of
+    the last full snapshot; see totem.rooms.presence.
+    """
+
+    room_name = models.CharField(max_length=255, unique=True)
+    connected = ArrayField(models.CharField(max_length=50), default=list)  # user slugs
+    synced_at = models.DateTimeField()
+    snapshot_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.room_name
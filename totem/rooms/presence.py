@@ -0,0 +1,99 @@
+"""
+Cached LiveKit presence.
+
+LiveKit webhooks (see webhooks.py) keep a RoomPresence row per room up to date,
+so the room endpoints can read who's connected from the database instead of
+calling list_participants on every request. A row is only trusted for
+PRESENCE_MAX_AGE after its last full snapshot: webhooks can be dropped, and a
+lost participant_left would otherwise leave a ghost in the room for as long as
+other events kept arriving. After that, callers fall back to LiveKit and store
+the result as a new snapshot; events in between only update who's connected.
+
+Webhooks can also arrive out of order. Each row remembers the time of the last
+snapshot or event applied to it, and events older than that are ignored.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RoomPresence
+
+PRESENCE_MAX_AGE = timedelta(minutes=5)
+
+
+def cached_connected(room_name: str) -> set[str] | None:
+    """Connected user slugs from the cache, or None when there is no fresh entry."""
+    connected = (
+        RoomPresence.objects.filter(room_name=room_name, snapshot_at__gte=timezone.now() - PRESENCE_MAX_AGE)
+        .values_list("connected", flat=True)
+        .first()
+    )
+    return None if connected is None else set(connected)
+
+
+async def acached_connected(room_name: str) -> set[str] | None:
+    connected = await (
+        RoomPresence.objects.filter(room_name=room_name, snapshot_at__gte=timezone.now() - PRESENCE_MAX_AGE)
+        .values_list("connected", flat=True)
+        .afirst()
+    )
+    return None if connected is None else set(connected)
+
+
+def record_snapshot(room_name: str, connected: set[str], at: datetime | None = None) -> None:
+    """Replace the cached presence with a full list, e.g. from list_participants."""
+    # Webhook timestamps have one-second resolution; truncate so an event from the
+    # same second as the snapshot still counts as newer.
+    at = (at or timezone.now()).replace(microsecond=0)
+    RoomPresence.objects.update_or_create(
+        room_name=room_name,
+        defaults={"connected": sorted(connected), "synced_at": at, "snapshot_at": at},
+    )
+
+
+async def arecord_snapshot(room_name: str, connected: set[str], at: datetime | None = None) -> None:
+    at = (at or timezone.now()).replace(microsecond=0)
+    await RoomPresence.objects.aupdate_or_create(
+        room_name=room_name,
+        defaults={"connected": sorted(connected), "synced_at": at, "snapshot_at": at},
+    )
+
+
+def participant_joined(room_name: str, identity: str, at: datetime) -> None:
+    _apply(room_name, at, lambda connected: connected | {identity})
+
+
+def participant_left(room_name: str, identity: str, at: datetime) -> None:
+    _apply(room_name, at, lambda connected: connected - {identity})
+
+
+def room_finished(room_name: str, at: datetime) -> None:
+    record_snapshot(room_name, set(), at)
+
+
+def clear_old() -> int:
+    deleted, _ = RoomPresence.objects.filter(synced_at__lte=timezone.now() - timedelta(days=1)).delete()
+    return deleted
+
+
+def event_time(created_at: int) -> datetime:
+    """LiveKit webhook `created_at` (unix seconds) as an aware datetime."""
+    return datetime.fromtimestamp(created_at, tz=UTC)
+
+
+def _apply(room_name: str, at: datetime, change) -> None:
+    with transaction.atomic():
+        presence = RoomPresence.objects.select_for_update().filter(room_name=room_name).first()
+        if presence is None:
+            # Nothing to apply a delta to. The next lookup takes a full snapshot.
+            return
+        if at < presence.synced_at:
+            return
+        # Not a snapshot: snapshot_at stays, so the row still expires on time.
+        presence.connected = sorted(change(set(presence.connected)))
+        presence.synced_at = at
+        presence.save(update_fields=["connected", "synced_at", "date_modified"])
@@ -0,0 +1,58 @@
+"""
+Re-run a room's event log through the in-memory state machine.
+
+Each logged event is applied with transition() to the state logged just before
+it, using the connected participants recorded with it, and the result is
+compared with the state that was logged. A mismatch means the state machine no
+longer reproduces what happened, or the log is inconsistent.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from pydantic import TypeAdapter
+
+from . import event_log
+from .models import Room
+from .schemas import RoomEvent, RoomState, TransitionError
+from .state_machine import transition
+
+_events: TypeAdapter[RoomEvent] = TypeAdapter(RoomEvent)
+
+
+@dataclass(frozen=True)
+class Mismatch:
+    version: int
+    expected: RoomState
+    actual: RoomState | None  # None if the transition was rejected
+    error: str | None = None
+
+
+@dataclass
+class ReplayResult:
+    checked: int = 0
+    skipped: int = 0  # rows with no stored event, or with a gap before them
+    mismatches: list[Mismatch] = field(default_factory=list)
+
+
+def check_room(room: Room) -> ReplayResult:
+    result = ReplayResult()
+    previous: RoomState | None = None
+    for logged in event_log.history(room):
+        if previous is None or logged.event is None or logged.version != previous.version + 1:
+            if previous is not None:
+                result.skipped += 1
+            previous = logged.state
+            continue
+
+        result.checked += 1
+        try:
+            actual = transition(previous, logged.actor, _events.validate_python(logged.event), set(logged.connected))
+        except TransitionError as e:
+            result.mismatches.append(Mismatch(logged.version, logged.state, None, e.message))
+        else:
+            if actual != logged.state:
+                result.mismatches.append(Mismatch(logged.version, logged.state, actual))
+        previous = logged.state
+    return result
@@ -236,6 +236,13 @@ class JoinResponse(Schema):
     is_already_present: bool
 
 
+class RejoinResponse(JoinResponse):
+    """Join token with the room's current state and presence, for reconnecting clients."""
+
+    state: RoomState
+    connected: Optional[list[str]] = None  # user slugs; None unless LiveKit could be checked
+
+
 class RoomErrorResponse(Schema):
     """
     Structured error. Clients switch on `code`, display `message`.
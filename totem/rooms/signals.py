@@ -0,0 +1,43 @@
+"""
+Keep Room.attendees in step with Session.attendees.
+
+Every way of changing the m2m goes through m2m_changed: Session.add_attendee
+and remove_attendee, bounced emails, the admin, and user.sessions_attending
+from the other side. Each change rewrites the affected rooms' column from the
+join table in one UPDATE, so the copy can't drift from an add and remove
+racing each other.
+"""
+
+from __future__ import annotations
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import OuterRef
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from totem.spaces.models import Session
+from totem.users.models import User
+
+from . import state_cache
+from .models import Room
+
+
+def refresh_attendees(rooms) -> None:
+    """Rewrite `rooms`' attendee slugs from their sessions."""
+    slugs = User.objects.filter(sessions_attending=OuterRef("session_id")).order_by("slug").values("slug")
+    for session_slug in rooms.values_list("session__slug", flat=True):
+        state_cache.forget_attendees(session_slug)
+    rooms.update(attendees=ArraySubquery(slugs))
+
+
+@receiver(m2m_changed, sender=Session.attendees.through)
+def sync_room_attendees(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        rooms = Room.objects.filter(session=instance)
+    elif action == "post_clear":
+        rooms = Room.objects.filter(attendees__contains=[instance.slug])
+    else:
+        rooms = Room.objects.filter(session__in=pk_set)
+    refresh_attendees(rooms)
@@ -0,0 +1,72 @@
+"""
+Caches behind the room state poll (`GET /{session_slug}/state`).
+
+Every client in a room polls this endpoint, so it avoids the database:
+
+- The serialized RoomState is cached per room with its version. apply_event
+  refreshes it on commit, so in this process a poll never sees an older version
+  than the last transition. Other processes (the cron tasks, other workers)
+  have their own cache, hence the short STATE_TTL.
+- The room's attendee slugs (Room.attendees) are cached as a set. Signing up
+  or leaving drops this process's entry. Only membership is trusted: a user
+  missing from the set is re-checked against the database, so someone who just
+  signed up through another process isn't locked out until the entry expires.
+"""
+
+from __future__ import annotations
+
+from django.core.cache import cache
+
+from .models import Room
+from .schemas import RoomState
+
+STATE_TTL = 10  # seconds
+ATTENDEES_TTL = 5 * 60  # seconds
+
+
+def _state_key(session_slug: str) -> str:
+    return f"rooms:state:{session_slug}"
+
+
+def _attendees_key(session_slug: str) -> str:
+    return f"rooms:attendees:{session_slug}"
+
+
+def get_state(session_slug: str) -> tuple[int, str] | None:
+    """The cached (version, JSON body) for a room, if any."""
+    return cache.get(_state_key(session_slug))
+
+
+def set_state(state: RoomState) -> tuple[int, str]:
+    entry = (state.version, state.model_dump_json())
+    cache.set(_state_key(state.session_slug), entry, STATE_TTL)
+    return entry
+
+
+def etag(session_slug: str, version: int) -> str:
+    return f'"{session_slug}:{version}"'
+
+
+def is_attendee(session_slug: str, user_slug: str) -> bool:
+    attendees: frozenset[str] | None = cache.get(_attendees_key(session_slug))
+    if attendees is not None and user_slug in attendees:
+        return True
+    slugs = Room.objects.filter(session__slug=session_slug).values_list("attendees", flat=True).first()
+    attendees = frozenset(slugs or ())
+    cache.set(_attendees_key(session_slug), attendees, ATTENDEES_TTL)
+    return user_slug in attendees
+
+
+async def ais_attendee(session_slug: str, user_slug: str) -> bool:
+    # The cache is in-process memory, so reading it doesn't block the loop; only the fallback is awaited.
+    attendees: frozenset[str] | None = cache.get(_attendees_key(session_slug))
+    if attendees is not None and user_slug in attendees:
+        return True
+    slugs = await Room.objects.filter(session__slug=session_slug).values_list("attendees", flat=True).afirst()
+    attendees = frozenset(slugs or ())
+    cache.set(_attendees_key(session_slug), attendees, ATTENDEES_TTL)
+    return user_slug in attendees
+
+
+def forget_attendees(session_slug: str) -> None:
+    cache.delete(_attendees_key(session_slug))
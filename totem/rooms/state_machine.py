@@ -1,19 +1,29 @@
 """
 Room state machine.
 
-Pure function of (DB state + event + connected participants) → new state.
-No LiveKit calls, no HTTP concerns. Side effects are limited to the database.
+transition() is a pure function of (state + event + connected participants) →
+new state, with no database access. apply_event() is the entry point the rest
+of the app uses: it loads the room, runs transition() on its state and saves
+the result if nobody else changed the room meanwhile. No LiveKit calls, no
+HTTP concerns. Side effects are limited to the database, a NOTIFY for the
+websocket stream (delivered when the transaction commits) and, once that
+commits, the room state cache.
 """
 
 from __future__ import annotations
 
+from collections.abc import KeysView
+
 from django.db import transaction
 from django.utils import timezone
 
-from .models import Room, RoomEventLog
+from . import event_log, state_cache, stream
+from .models import Room
 from .schemas import (
     AcceptStickEvent,
+    ActiveDetail,
     BanParticipantEvent,
+    EndedDetail,
     EndReason,
     EndRoomEvent,
     ErrorCode,
@@ -38,67 +48,134 @@ def apply_event(
     connected: set[str],  # user slugs currently in the LiveKit room
 ) -> RoomState:
     """
-    The state machine entry point. Acquires a row lock on the room,
-    validates the transition, applies it, and appends to the event log.
+    The state machine entry point. Validates the transition, applies it,
+    and appends to the event log.
+
+    The room is read without a lock and written back with an UPDATE that
+    only matches the version it was read at, so concurrent events don't
+    queue up on a row lock. If another event got there first, the event is
+    retried under the row lock, where it's checked against the fresh state.
 
     Returns the new RoomState on success.
     Raises TransitionError on any invalid transition.
     """
+    room = _require_room(Room.objects.for_session(session_slug).first())
+    before, state = _transition_room(room, actor, event, last_seen_version, connected)
     with transaction.atomic():
-        room = Room.objects.for_session(session_slug).select_for_update().first()  # type: ignore
+        if _save_transition(room, before, state, event, actor, connected):
+            return state
 
-        if not room:
-            raise TransitionError(
-                code=ErrorCode.NOT_FOUND,
-                message="Room not found",
-            )
+    # Someone else moved the room on since we read it.
+    with transaction.atomic():
+        room = _require_room(Room.objects.for_session(session_slug).select_for_update().first())
+        before, state = _transition_room(room, actor, event, last_seen_version, connected)
+        saved = _save_transition(room, before, state, event, actor, connected)
+        assert saved, "locked room changed underneath us"
+    return state
 
-        _require_attendee(room, actor)
 
-        if room.state_version != last_seen_version:
-            raise TransitionError(
-                code=ErrorCode.STALE_VERSION,
-                message="State has changed since your last read. Re-fetch state and try again.",
-                detail=f"expected {last_seen_version}, current {room.state_version}",
-            )
+def _require_room(room: Room | None) -> Room:
+    if room is None:
+        raise TransitionError(
+            code=ErrorCode.NOT_FOUND,
+            message="Room not found",
+        )
+    return room
+
 
-        # Reconcile talking order with who's actually connected
-        _reconcile_talking_order(room, connected)
-
-        match event:
-            case StartRoomEvent():
-                _handle_start(room, actor, connected)
-            case PassStickEvent(prompt=prompt):
-                _handle_pass(room, actor, connected, prompt)
-            case AcceptStickEvent():
-                _handle_accept(room, actor, connected)
-            case ForcePassStickEvent():
-                _handle_force_pass(room, actor, connected)
-            case ReorderEvent(talking_order=new_order):
-                _handle_reorder(room, actor, new_order, connected)
-            case EndRoomEvent(reason=reason):
-                _handle_end(room, actor, reason)
-            case BanParticipantEvent(participant_slug=slug):
-                _handle_ban(room, actor, slug, connected)
-            case UnbanParticipantEvent(participant_slug=slug):
-                _handle_unban(room, actor, slug)
-            case _:
-                raise AssertionError(f"Unhandled event type: {type(event).__name__}")
-
-        room.state_version += 1
-        room.save()
-
-        state = room.to_state()
-
-        RoomEventLog.objects.create(
-            room=room,
-            version=room.state_version,
-            event_type=event.type,
-            actor=actor,
-            snapshot=state.dict(),
+def _transition_room(
+    room: Room,
+    actor: str,
+    event: RoomEvent,
+    last_seen_version: int,
+    connected: set[str],
+) -> tuple[RoomState, RoomState]:
+    _require_attendee(room, actor)
+
+    if room.state_version != last_seen_version:
+        raise TransitionError(
+            code=ErrorCode.STALE_VERSION,
+            message="State has changed since your last read. Re-fetch state and try again.",
+            detail=f"expected {last_seen_version}, current {room.state_version}",
         )
 
-    return state
+    before = room.to_state()
+    return before, transition(before, actor, event, connected)
+
+
+def _save_transition(
+    room: Room,
+    before: RoomState,
+    state: RoomState,
+    event: RoomEvent,
+    actor: str,
+    connected: set[str],
+) -> bool:
+    """
+    Write `state` if the room is still at `before.version`, with the event log
+    and notifications. Returns False, having written nothing, if it isn't.
+    Call inside a transaction.
+    """
+    changed = room.update_from_state(state)
+    room.date_modified = timezone.now()
+    updated = Room.objects.filter(pk=room.pk, state_version=before.version).update(
+        date_modified=room.date_modified, **{field: getattr(room, field) for field in changed}
+    )
+    if not updated:
+        return False
+
+    if state.status == RoomStatus.ENDED and before.status != RoomStatus.ENDED:
+        room.session.ended_at = timezone.now()
+        room.session.save(update_fields=["ended_at"])
+
+    event_log.record(room, event, actor, connected, before, state)
+    stream.notify_state(state)
+    transaction.on_commit(lambda: state_cache.set_state(state))
+    return True
+
+
+def transition(
+    state: RoomState,
+    actor: str,  # user slug
+    event: RoomEvent,
+    connected: set[str],  # user slugs currently in the LiveKit room
+) -> RoomState:
+    """
+    Apply `event` to `state` in memory and return the next state, one version
+    on. `state` is left untouched. The caller is responsible for checking that
+    `actor` may act in this room and that `state` is current.
+
+    Raises TransitionError on any invalid transition.
+    """
+    # A shallow copy is enough: the handlers replace lists rather than mutate them.
+    room = state.model_copy()
+
+    # Reconcile talking order with who's actually connected. The resulting
+    # index is shared by the handlers, so each transition builds it once.
+    order = _reconcile_talking_order(room, connected)
+
+    match event:
+        case StartRoomEvent():
+            _handle_start(room, order, actor, connected)
+        case PassStickEvent(prompt=prompt):
+            _handle_pass(room, order, actor, connected, prompt)
+        case AcceptStickEvent():
+            _handle_accept(room, order, actor, connected)
+        case ForcePassStickEvent():
+            _handle_force_pass(room, order, actor, connected)
+        case ReorderEvent(talking_order=new_order):
+            _handle_reorder(room, order, actor, new_order, connected)
+        case EndRoomEvent(reason=reason):
+            _handle_end(room, actor, reason)
+        case BanParticipantEvent(participant_slug=slug):
+            _handle_ban(room, actor, slug, connected)
+        case UnbanParticipantEvent(participant_slug=slug):
+            _handle_unban(room, actor, slug)
+        case _:
+            raise AssertionError(f"Unhandled event type: {type(event).__name__}")
+
+    room.version += 1
+    return room
 
 
 # ---------------------------------------------------------------------------
@@ -106,7 +183,7 @@ def apply_event(
 # ---------------------------------------------------------------------------
 
 
-def _require_keeper(room: Room, actor: str) -> None:
+def _require_keeper(room: RoomState, actor: str) -> None:
     if actor != room.keeper:
         raise TransitionError(
             code=ErrorCode.NOT_KEEPER,
@@ -114,17 +191,17 @@ def _require_keeper(room: Room, actor: str) -> None:
         )
 
 
-def _require_keeper_in_room(room: Room) -> None:
+def _require_keeper_in_room(room: RoomState, order: TalkingOrder) -> None:
     """Requires the keeper to be in the room to perform an action"""
 
-    if room.keeper not in room.talking_order:
+    if room.keeper not in order:
         raise TransitionError(
             code=ErrorCode.KEEPER_NOT_IN_ROOM,
             message="Keeper must be in the room to perform this action",
         )
 
 
-def _require_active(room: Room) -> None:
+def _require_active(room: RoomState) -> None:
     if room.status != RoomStatus.ACTIVE:
         raise TransitionError(
             code=ErrorCode.ROOM_NOT_ACTIVE,
@@ -132,7 +209,7 @@ def _require_active(room: Room) -> None:
         )
 
 
-def _require_not_ended(room: Room) -> None:
+def _require_not_ended(room: RoomState) -> None:
     if room.status == RoomStatus.ENDED:
         raise TransitionError(
             code=ErrorCode.ROOM_ALREADY_ENDED,
@@ -146,7 +223,7 @@ def _require_attendee(room: Room, actor: str) -> None:
         # This check is required because background tasks acting on behalf
         # of the keeper may not be in the attendees list
         return
-    if not room.session.attendees.filter(slug=actor).exists():
+    if actor not in room.attendees:
         raise TransitionError(
             code=ErrorCode.NOT_IN_ROOM,
             message="You are not an attendee of this session",
@@ -158,74 +235,101 @@ def _require_attendee(room: Room, actor: str) -> None:
 # ---------------------------------------------------------------------------
 
 
-def _next_in_order(
-    talking_order: list[str],
-    after: str,
-    connected: set[str],
-) -> str | None:
+class TalkingOrder:
     """
-    Walk the talking order starting after `after`, wrapping around.
-    Skips anyone not in `connected`. Returns `after` itself if they're
-    the only connected participant. Returns None if nobody is connected.
+    The talking order as a ring, with each slug's position indexed.
+
+    Built once per transition and shared by the handlers, so membership checks
+    and finding the next speaker don't rescan the list. The next connected
+    participant is usually the very next slot, so walking the ring stays cheap
+    however many people are in it.
     """
-    if after not in talking_order:
-        return None
 
-    start = talking_order.index(after) + 1
-    rotated = talking_order[start:] + talking_order[:start]
+    __slots__ = ("_positions", "slugs")
+
+    def __init__(self, slugs: list[str]):
+        self.slugs = slugs
+        # Built back to front so a duplicated slug maps to its first position.
+        self._positions = dict(zip(reversed(slugs), range(len(slugs) - 1, -1, -1)))
 
-    for slug in rotated:
-        if slug in connected:
-            return slug
+    def __contains__(self, slug: object) -> bool:
+        return slug in self._positions
 
-    # `after` wasn't in rotated (it was excluded by the split),
-    # but if they're connected, they're the only one.
-    if after in connected:
-        return after
+    def __len__(self) -> int:
+        return len(self.slugs)
 
-    return None
+    def members(self) -> KeysView[str]:
+        return self._positions.keys()
 
+    def first_connected(self, connected: set[str]) -> str | None:
+        return next((slug for slug in self.slugs if slug in connected), None)
 
-def _reconcile_talking_order(room: Room, connected: set[str]) -> None:
+    def next_after(self, after: str, connected: set[str]) -> str | None:
+        """
+        Walk the talking order starting after `after`, wrapping around.
+        Skips anyone not in `connected`. Returns `after` itself if they're
+        the only connected participant. Returns None if nobody is connected.
+        """
+        position = self._positions.get(after)
+        if position is None:
+            return None
+
+        slugs = self.slugs
+        size = len(slugs)
+        for step in range(1, size):
+            slug = slugs[(position + step) % size]
+            if slug in connected:
+                return slug
+
+        # Nobody else is connected; if `after` is, they're the only one.
+        if after in connected:
+            return after
+
+        return None
+
+
+def _reconcile_talking_order(room: RoomState, connected: set[str]) -> TalkingOrder:
     """
-    Reconcile talking_order with connected participants.
+    Reconcile talking_order with connected participants and return its index.
     - Keeps disconnected participants in the order (they may reconnect)
     - Appends newly connected participants
     - Keeps the keeper first
     - Fixes current_speaker/next_speaker to connected participants only
     """
-    reconciled: list[str] = []
-
-    # Keeper first
-    if room.keeper in set(room.talking_order) | connected:
-        reconciled.append(room.keeper)
-
-    # Preserve full existing order (connected and disconnected)
-    for slug in room.talking_order:
-        if slug not in reconciled:
-            reconciled.append(slug)
-
-    # Append any newly connected members (sorted for deterministic order)
-    for slug in sorted(connected):
-        if slug not in reconciled:
-            reconciled.append(slug)
-
-    room.talking_order = reconciled
-
-    connected_order = [s for s in reconciled if s in connected]
+    order = TalkingOrder(room.talking_order)
+    keeper = room.keeper
+    newcomers = connected - order.members()
+    keeper_placed = order.slugs[:1] == [keeper] if keeper in order or keeper in connected else True
+    has_duplicates = len(order.members()) != len(order)
+
+    # Usually nobody new has connected, so the existing order and its index stand.
+    if newcomers or not keeper_placed or has_duplicates:
+        # Keeper first, then the full existing order (connected and disconnected).
+        # Dicts keep insertion order, so they double as ordered sets here.
+        reconciled = dict.fromkeys([keeper]) if keeper in order or keeper in connected else {}
+        reconciled.update(dict.fromkeys(order.slugs))
+
+        # Append any newly connected members (sorted for deterministic order)
+        for slug in sorted(newcomers):
+            reconciled[slug] = None
+
+        room.talking_order = list(reconciled)
+        order = TalkingOrder(room.talking_order)
 
     # Fix current_speaker if absent from connected (disconnected or banned)
     if room.current_speaker and room.current_speaker not in connected:
-        room.current_speaker = connected_order[0] if connected_order else None
+        room.current_speaker = order.first_connected(connected)
         if room.turn_state == TurnState.PASSING:
             room.turn_state = TurnState.SPEAKING
 
     # Fix next_speaker if absent from connected (disconnected or banned)
     if room.next_speaker and room.next_speaker not in connected:
         if room.current_speaker:
-            room.next_speaker = _next_in_order(reconciled, room.current_speaker, connected)
+            room.next_speaker = order.next_after(room.current_speaker, connected)
         else:
-            room.next_speaker = connected_order[0] if connected_order else None
+            room.next_speaker = order.first_connected(connected)
+
+    return order
 
 
 # ---------------------------------------------------------------------------
@@ -233,7 +337,7 @@ def _reconcile_talking_order(room: Room, connected: set[str]) -> None:
 # ---------------------------------------------------------------------------
 
 
-def _handle_start(room: Room, actor: str, connected: set[str]) -> None:
+def _handle_start(room: RoomState, order: TalkingOrder, actor: str, connected: set[str]) -> None:
     _require_keeper(room, actor)
 
     if room.status != RoomStatus.WAITING_ROOM:
@@ -242,9 +346,10 @@ def _handle_start(room: Room, actor: str, connected: set[str]) -> None:
             message="Room can only be started from the waiting room",
         )
 
-    next_slug = _next_in_order(room.talking_order, room.keeper, connected)
+    next_slug = order.next_after(room.keeper, connected)
 
     room.status = RoomStatus.ACTIVE
+    room.status_detail = ActiveDetail()
     room.turn_state = TurnState.SPEAKING
     room.current_speaker = room.keeper
     room.next_speaker = next_slug or room.keeper
@@ -252,9 +357,9 @@ def _handle_start(room: Room, actor: str, connected: set[str]) -> None:
     room.round_message = None
 
 
-def _handle_pass(room: Room, actor: str, connected: set[str], prompt: str | None) -> None:
+def _handle_pass(room: RoomState, order: TalkingOrder, actor: str, connected: set[str], prompt: str | None) -> None:
     _require_active(room)
-    _require_keeper_in_room(room)
+    _require_keeper_in_room(room, order)
 
     if actor != room.current_speaker and actor != room.keeper:
         raise TransitionError(
@@ -282,7 +387,7 @@ def _handle_pass(room: Room, actor: str, connected: set[str], prompt: str | None
         # Keeper passes again while already passing — skip current next_speaker
         skipped = room.next_speaker
         candidates = connected - {skipped}
-        next_slug = _next_in_order(room.talking_order, skipped, candidates)
+        next_slug = order.next_after(skipped, candidates) if skipped else None
 
         if next_slug is None:
             raise TransitionError(
@@ -298,9 +403,9 @@ def _handle_pass(room: Room, actor: str, connected: set[str], prompt: str | None
         room.turn_state = TurnState.PASSING
 
 
-def _handle_accept(room: Room, actor: str, connected: set[str]) -> None:
+def _handle_accept(room: RoomState, order: TalkingOrder, actor: str, connected: set[str]) -> None:
     _require_active(room)
-    _require_keeper_in_room(room)
+    _require_keeper_in_room(room, order)
 
     if room.turn_state != TurnState.PASSING:
         raise TransitionError(
@@ -314,19 +419,19 @@ def _handle_accept(room: Room, actor: str, connected: set[str]) -> None:
             message="You are not the next speaker",
         )
 
-    next_slug = _next_in_order(room.talking_order, actor, connected)
+    next_slug = order.next_after(actor, connected)
 
     room.current_speaker = actor
     room.next_speaker = next_slug or actor
     room.turn_state = TurnState.SPEAKING
 
 
-def _handle_force_pass(room: Room, actor: str, connected: set[str]) -> None:
+def _handle_force_pass(room: RoomState, order: TalkingOrder, actor: str, connected: set[str]) -> None:
     _require_keeper(room, actor)
     _require_active(room)
 
     reference_speaker = room.current_speaker if room.turn_state == TurnState.SPEAKING else room.next_speaker
-    pass_to = _next_in_order(talking_order=room.talking_order, after=reference_speaker, connected=connected)
+    pass_to = order.next_after(reference_speaker, connected) if reference_speaker else None
 
     if not pass_to:
         raise TransitionError(
@@ -338,10 +443,12 @@ def _handle_force_pass(room: Room, actor: str, connected: set[str]) -> None:
     room.turn_state = TurnState.PASSING
 
 
-def _handle_reorder(room: Room, actor: str, new_order: list[str], connected: set[str]) -> None:
+def _handle_reorder(
+    room: RoomState, order: TalkingOrder, actor: str, new_order: list[str], connected: set[str]
+) -> None:
     _require_keeper(room, actor)
 
-    if set(new_order) != set(room.talking_order):
+    if set(new_order) != order.members():
         raise TransitionError(
             code=ErrorCode.INVALID_PARTICIPANT_ORDER,
             message="New order must contain exactly the same participants",
@@ -349,24 +456,21 @@ def _handle_reorder(room: Room, actor: str, new_order: list[str], connected: set
 
     room.talking_order = new_order
     if room.current_speaker:
-        room.next_speaker = _next_in_order(room.talking_order, room.current_speaker, connected)
+        room.next_speaker = TalkingOrder(new_order).next_after(room.current_speaker, connected)
 
 
-def _handle_end(room: Room, actor: str, reason: EndReason) -> None:
+def _handle_end(room: RoomState, actor: str, reason: EndReason) -> None:
     _require_keeper(room, actor)
     _require_not_ended(room)
 
     room.status = RoomStatus.ENDED
+    room.status_detail = EndedDetail(reason=reason)
     room.turn_state = TurnState.IDLE
     room.current_speaker = None
     room.next_speaker = None
-    room.end_reason = reason
-
-    room.session.ended_at = timezone.now()
-    room.session.save(update_fields=["ended_at"])
 
 
-def _handle_ban(room: Room, actor: str, participant_slug: str, connected: set[str]) -> None:
+def _handle_ban(room: RoomState, actor: str, participant_slug: str, connected: set[str]) -> None:
     _require_keeper(room, actor)
     _require_not_ended(room)
 
@@ -387,7 +491,7 @@ def _handle_ban(room: Room, actor: str, participant_slug: str, connected: set[st
     _reconcile_talking_order(room, connected - {participant_slug})
 
 
-def _handle_unban(room: Room, actor: str, participant_slug: str) -> None:
+def _handle_unban(room: RoomState, actor: str, participant_slug: str) -> None:
     _require_keeper(room, actor)
     _require_not_ended(room)
 
@@ -0,0 +1,243 @@
+"""
+Room state push over websockets.
+
+apply_event NOTIFYs each room's new state version on a Postgres channel.
+Postgres only delivers the notification when the transaction commits, and to
+every process LISTENing, so each ASGI worker runs one listener (StateHub) that
+fans notifications out to the sockets subscribed to that room. Clients connect
+to `/ws/rooms/<session_slug>/` and get the current state, then one message per
+transition, in place of polling GET /state.
+
+The notification carries only the session slug and version: a RoomState holds
+the keeper's free-text prompt and round message, and NOTIFY payloads must stay
+under 8000 bytes. Sockets read the body from state_cache, or from the database
+when this process's cache is behind the notified version.
+
+Sockets authenticate with a mobile API JWT in the `token` query parameter, or
+with the Django session cookie when the connection comes from our own origin.
+
+Websockets are only served under ASGI, which compose/production/django/start
+runs by default; under WSGI clients keep polling.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from http.cookies import SimpleCookie
+from importlib import import_module
+from typing import ParamSpec, TypeVar
+from urllib.parse import parse_qs, urlparse
+
+import psycopg
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections, connection
+from django.http import HttpRequest
+from psycopg.conninfo import make_conninfo
+
+from totem.api.auth import user_for_jwt_token
+from totem.users.models import User
+
+from . import state_cache
+from .models import Room
+from .schemas import RoomState
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+CHANNEL = "room_state"
+# Subscribers only need the newest state; a slow socket drops older ones.
+SUBSCRIBER_BUFFER = 8
+RECONNECT_DELAY = 1  # seconds
+
+# Django's own DATABASES OPTIONS; the rest (sslmode, sslrootcert, ...) are libpq parameters.
+DJANGO_DB_OPTIONS = {"isolation_level", "server_side_binding", "pool", "assume_role"}
+
+# Close codes in the 4000-4999 range are ours to define.
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+
+
+def notify_state(state: RoomState) -> None:
+    """Tell every listener the room is at `state.version`. Call inside the transaction that produced it."""
+    payload = json.dumps({"session_slug": state.session_slug, "version": state.version})
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+
+
+# ---------------------------------------------------------------------------
+# Fan-out
+# ---------------------------------------------------------------------------
+
+
+class StateHub:
+    """One LISTEN connection per process, dispatching notifications to per-room subscriber queues."""
+
+    def __init__(self):
+        self._subscribers: defaultdict[str, set[asyncio.Queue[str]]] = defaultdict(set)
+        self._listener: asyncio.Task | None = None
+
+    def subscribe(self, session_slug: str) -> asyncio.Queue[str]:
+        listener = self._listener
+        if listener is None or listener.done() or listener.get_loop() is not asyncio.get_running_loop():
+            self._listener = asyncio.create_task(self._listen())
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self._subscribers[session_slug].add(queue)
+        return queue
+
+    def unsubscribe(self, session_slug: str, queue: asyncio.Queue[str]) -> None:
+        subscribers = self._subscribers.get(session_slug)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[session_slug]
+
+    def dispatch(self, payload: str) -> None:
+        session_slug = json.loads(payload)["session_slug"]
+        for queue in self._subscribers.get(session_slug, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(_conninfo(), autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    async for notify in conn.notifies():
+                        self.dispatch(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Room state listener failed, reconnecting")
+                await asyncio.sleep(RECONNECT_DELAY)
+
+
+def _conninfo() -> str:
+    db = settings.DATABASES["default"]
+    options = {name: value for name, value in db.get("OPTIONS", {}).items() if name not in DJANGO_DB_OPTIONS}
+    return make_conninfo(
+        dbname=db["NAME"],
+        user=db.get("USER") or None,
+        password=db.get("PASSWORD") or None,
+        host=db.get("HOST") or None,
+        port=db.get("PORT") or None,
+        **options,
+    )
+
+
+hub = StateHub()
+
+
+# ---------------------------------------------------------------------------
+# Websocket
+# ---------------------------------------------------------------------------
+
+
+async def room_state_socket(scope, receive, send, session_slug: str) -> None:
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+
+    user = await _db_sync_to_async(_authenticate)(scope)
+    if user is None:
+        await send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+        return
+    current = await _db_sync_to_async(_current_state)(session_slug, user)
+    if current is None:
+        await send({"type": "websocket.close", "code": CLOSE_FORBIDDEN})
+        return
+
+    await send({"type": "websocket.accept"})
+    queue = hub.subscribe(session_slug)
+    receiving = asyncio.ensure_future(receive())
+    getting = asyncio.ensure_future(queue.get())
+    sent_version, text = current
+    try:
+        await send({"type": "websocket.send", "text": text})
+        while True:
+            done, _ = await asyncio.wait({receiving, getting}, return_when=asyncio.FIRST_COMPLETED)
+            if getting in done:
+                # A state read for an earlier notification may already be this version or newer.
+                version = json.loads(getting.result())["version"]
+                if version > sent_version:
+                    state = await _db_sync_to_async(_state)(session_slug, version)
+                    if state is not None:
+                        sent_version, text = state
+                        await send({"type": "websocket.send", "text": text})
+                getting = asyncio.ensure_future(queue.get())
+            if receiving in done:
+                message = receiving.result()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") == "ping":
+                    await send({"type": "websocket.send", "text": "pong!"})
+                receiving = asyncio.ensure_future(receive())
+    finally:
+        hub.unsubscribe(session_slug, queue)
+        receiving.cancel()
+        getting.cancel()
+
+
+def _db_sync_to_async(fn: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+    """
+    sync_to_async for ORM work outside a request. Closes connections that broke
+    or outlived CONN_MAX_AGE before and after, as Django's request signals do
+    around a view; a socket can live for hours.
+    """
+
+    def call(*args: P.args, **kwargs: P.kwargs) -> T:
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(call)
+
+
+def _current_state(session_slug: str, user: User) -> tuple[int, str] | None:
+    """The room's (version, state JSON), or None if the room doesn't exist or `user` isn't an attendee."""
+    state = _state(session_slug)
+    if state is None or not state_cache.is_attendee(session_slug, user.slug):
+        return None
+    return state
+
+
+def _state(session_slug: str, version: int = 0) -> tuple[int, str] | None:
+    """
+    The room's (version, state JSON) from state_cache, or from the database if
+    the cached one is older than `version`. None if the room doesn't exist.
+    """
+    cached = state_cache.get_state(session_slug)
+    if cached is None or cached[0] < version:
+        room = Room.objects.for_session(session_slug).first()
+        if room is None:
+            return None
+        cached = state_cache.set_state(room.to_state())
+    return cached
+
+
+def _authenticate(scope) -> User | None:
+    token = parse_qs(scope.get("query_string", b"").decode()).get("token")
+    if token:
+        return user_for_jwt_token(token[0])
+
+    headers = {name.decode().lower(): value.decode() for name, value in scope.get("headers", [])}
+    cookie = SimpleCookie(headers.get("cookie", "")).get(settings.SESSION_COOKIE_NAME)
+    # Browsers send cookies on cross-site websocket handshakes too, so only trust
+    # the session when the page that opened the socket is ours.
+    if cookie is None or urlparse(headers.get("origin", "")).netloc != headers.get("host"):
+        return None
+    request = HttpRequest()
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore(cookie.value)
+    user = get_user(request)
+    return user if isinstance(user, User) and user.is_active else None
@@ -1,13 +1,21 @@
 import logging
+from collections.abc import Callable
 from datetime import timedelta
 
 from django.utils import timezone
 
-from totem.rooms.livekit import get_connected_participants, publish_state
+from totem.jobs.scheduler import PeriodicTask
+from totem.rooms import event_log, presence
+from totem.rooms.livekit import (
+    LiveKitConfigurationError,
+    create_rooms,
+    get_connected_participants_by_room,
+    publish_state,
+)
 from totem.rooms.models import Room
 from totem.rooms.schemas import EndReason, EndRoomEvent, RoomStatus
 from totem.rooms.state_machine import apply_event
-from totem.spaces.models import Session
+from totem.spaces.models import Session, Space
 from totem.users.models import User
 
 
@@ -46,20 +54,25 @@ def end_sessions_without_keeper() -> int:
     """End sessions where the keeper has not joined within 5 minutes of the session start.
 
     Uses LiveKit presence when available, but skips sessions if participant
-    lookup fails so a LiveKit outage cannot terminate active rooms.
+    lookup fails so a LiveKit outage cannot terminate active rooms. Presence for
+    all sessions is fetched in one batch, so the sweep doesn't slow down as the
+    number of overlapping sessions grows.
     """
     grace_period = timedelta(minutes=5)
-    sessions_to_check = Session.objects.filter(
-        start__lte=timezone.now() - grace_period,
-        start__gte=timezone.now() - timedelta(hours=1),  # recent sessions
-        ended_at__isnull=True,
-        cancelled=False,
+    sessions_to_check = list(
+        Session.objects.filter(
+            start__lte=timezone.now() - grace_period,
+            start__gte=timezone.now() - timedelta(hours=1),  # recent sessions
+            ended_at__isnull=True,
+            cancelled=False,
+        ).select_related("space__author")
     )
+    presence = get_connected_participants_by_room([session.slug for session in sessions_to_check])
     ended_count = 0
     for session in sessions_to_check:
         keeper: User = session.space.author
 
-        connected_participants = get_connected_participants(session.slug)
+        connected_participants = presence.get(session.slug)
         if connected_participants is None:
             logging.warning("Skipped session %s because LiveKit participants could not be fetched", session.slug)
             continue
@@ -74,4 +87,52 @@ def end_sessions_without_keeper() -> int:
     return ended_count
 
 
-tasks = [end_sessions_without_keeper]
+# Longer than the 10 minute cron period plus the 15 minutes before start that
+# attendees can join, so every session is pre-warmed before its first join.
+PREWARM_AHEAD = timedelta(minutes=30)
+
+
+def prewarm_rooms() -> int:
+    """Create the Room rows, and LiveKit rooms, of LiveKit sessions starting soon.
+
+    Otherwise the first join creates them, in the same minute as everyone
+    else's joins; with the rooms in place joining only reads. Returns how many
+    rooms were created. The Room rows stay if creating the LiveKit rooms fails:
+    the first join creates those.
+    """
+    now = timezone.now()
+    sessions = list(
+        Session.objects.filter(
+            start__lte=now + PREWARM_AHEAD,
+            start__gte=now - timedelta(hours=1),  # recent sessions
+            ended_at__isnull=True,
+            cancelled=False,
+            room__isnull=True,
+            space__meeting_provider=Space.MeetingProviderChoices.LIVEKIT,
+        ).select_related("space__author")
+    )
+    rooms = Room.objects.create_for_sessions(sessions)
+    livekit_rooms = [room.session.slug for room in rooms]
+    try:
+        create_rooms(livekit_rooms)
+    except LiveKitConfigurationError:
+        logging.warning("Skipped creating LiveKit rooms because LiveKit is not configured")
+    except Exception:
+        logging.exception("Failed to create LiveKit rooms %s", livekit_rooms)
+    return len(rooms)
+
+
+def clear_old_presence():
+    presence.clear_old()
+
+
+def archive_ended_rooms():
+    event_log.archive_ended_rooms()
+
+
+tasks: list[PeriodicTask | Callable[[], object]] = [
+    end_sessions_without_keeper,
+    prewarm_rooms,
+    PeriodicTask(clear_old_presence, interval=timedelta(days=1)),
+    PeriodicTask(archive_ended_rooms, interval=timedelta(days=1)),
+]
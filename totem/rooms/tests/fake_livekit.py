@@ -0,0 +1,172 @@
+"""
+A local stand-in for LiveKit's RoomService, for load tests.
+
+Speaks the same Twirp protocol as LiveKit (protobuf over HTTP POST), so the
+app's real client code runs unchanged against it: point LIVEKIT_URL at `url`
+and reset the shared client. Rooms and participants live in memory. A test
+plays the part of the media server with connect() and disconnect(), and each
+call can be delayed by `latency` seconds to stand in for the network.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from livekit import api
+
+PREFIX = "/twirp/livekit.RoomService/"
+
+
+@dataclass
+class FakeRoom:
+    name: str
+    metadata: str = ""
+    participants: dict[str, api.ParticipantInfo] = field(default_factory=dict)
+
+    def info(self) -> api.Room:
+        return api.Room(name=self.name, metadata=self.metadata, num_participants=len(self.participants))
+
+
+class FakeLiveKit:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.rooms: dict[str, FakeRoom] = {}
+        self.calls: Counter[str] = Counter()
+        self.data_messages: list[api.SendDataRequest] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> FakeLiveKit:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # What the media server would do as clients come and go.
+
+    def connect(self, room_name: str, identity: str) -> None:
+        track = api.TrackInfo(sid=f"TR_{identity}", type=api.TrackType.AUDIO)
+        participant = api.ParticipantInfo(
+            sid=f"PA_{identity}", identity=identity, state=api.ParticipantInfo.State.ACTIVE, tracks=[track]
+        )
+        with self._lock:
+            self._room(room_name).participants[identity] = participant
+
+    def disconnect(self, room_name: str, identity: str) -> None:
+        with self._lock:
+            self._room(room_name).participants.pop(identity, None)
+
+    def _room(self, name: str) -> FakeRoom:
+        if name not in self.rooms:
+            self.rooms[name] = FakeRoom(name)
+        return self.rooms[name]
+
+    # RoomService. Each takes the request message and returns the response message.
+
+    def CreateRoom(self, request: api.CreateRoomRequest) -> api.Room:
+        return self._room(request.name).info()
+
+    def ListRooms(self, request: api.ListRoomsRequest) -> api.ListRoomsResponse:
+        names = request.names or list(self.rooms)
+        return api.ListRoomsResponse(rooms=[self.rooms[name].info() for name in names if name in self.rooms])
+
+    def UpdateRoomMetadata(self, request: api.UpdateRoomMetadataRequest) -> api.Room:
+        room = self._room(request.room)
+        room.metadata = request.metadata
+        return room.info()
+
+    def ListParticipants(self, request: api.ListParticipantsRequest) -> api.ListParticipantsResponse:
+        return api.ListParticipantsResponse(participants=list(self._room(request.room).participants.values()))
+
+    def GetParticipant(self, request: api.RoomParticipantIdentity) -> api.ParticipantInfo:
+        participant = self._room(request.room).participants.get(request.identity)
+        if participant is None:
+            raise _NotFound(f"participant {request.identity} not found")
+        return participant
+
+    def RemoveParticipant(self, request: api.RoomParticipantIdentity) -> api.RemoveParticipantResponse:
+        self._room(request.room).participants.pop(request.identity, None)
+        return api.RemoveParticipantResponse()
+
+    def MutePublishedTrack(self, request: api.MuteRoomTrackRequest) -> api.MuteRoomTrackResponse:
+        participant = self.GetParticipant(api.RoomParticipantIdentity(room=request.room, identity=request.identity))
+        for track in participant.tracks:
+            if track.sid == request.track_sid:
+                track.muted = request.muted
+                return api.MuteRoomTrackResponse(track=track)
+        raise _NotFound(f"track {request.track_sid} not found")
+
+    def SendData(self, request: api.SendDataRequest) -> api.SendDataResponse:
+        self.data_messages.append(request)
+        return api.SendDataResponse()
+
+
+class _NotFound(Exception):
+    pass
+
+
+_REQUEST_TYPES = {
+    "CreateRoom": api.CreateRoomRequest,
+    "ListRooms": api.ListRoomsRequest,
+    "UpdateRoomMetadata": api.UpdateRoomMetadataRequest,
+    "ListParticipants": api.ListParticipantsRequest,
+    "GetParticipant": api.RoomParticipantIdentity,
+    "RemoveParticipant": api.RoomParticipantIdentity,
+    "MutePublishedTrack": api.MuteRoomTrackRequest,
+    "SendData": api.SendDataRequest,
+}
+
+
+def _handler(livekit: FakeLiveKit) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like LiveKit
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            method = self.path.removeprefix(PREFIX)
+            request_type = _REQUEST_TYPES.get(method)
+            if not self.path.startswith(PREFIX) or request_type is None:
+                return self._error(404, "bad_route", f"no handler for {self.path}")
+
+            if livekit.latency:
+                time.sleep(livekit.latency)
+            try:
+                with livekit._lock:
+                    livekit.calls[method] += 1
+                    response = getattr(livekit, method)(request_type.FromString(body))
+            except _NotFound as e:
+                return self._error(404, "not_found", str(e))
+            payload = response.SerializeToString()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/protobuf")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _error(self, status: int, code: str, msg: str):
+            # Twirp errors are always JSON.
+            payload = json.dumps({"code": code, "msg": msg}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
@@ -2,8 +2,11 @@ import datetime
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from livekit import api
 
 from totem.rooms.livekit import LiveKitConfigurationError
 from totem.rooms.models import Room
@@ -14,6 +17,10 @@ from totem.users.models import User
 from totem.users.tests.factories import UserFactory
 
 
+def _participants(slugs) -> list[api.ParticipantInfo]:
+    return [api.ParticipantInfo(identity=slug, state=api.ParticipantInfo.State.ACTIVE) for slug in sorted(slugs)]
+
+
 def _post_event(client: Client, session_slug: str, event: dict, version: int):
     return client.post(
         f"/api/mobile/protected/rooms/{session_slug}/event",
@@ -35,12 +42,8 @@ class TestPostEvent:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value={user.slug},
-            ),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.mute_all_participants"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({user.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             resp = _post_event(client, session.slug, {"type": "start_room"}, 0)
 
@@ -60,12 +63,8 @@ class TestPostEvent:
         connected = {keeper.slug, user1.slug}
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value=connected,
-            ),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.mute_all_participants"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants(connected)),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             # Start
             resp = _post_event(client, session.slug, {"type": "start_room"}, 0)
@@ -83,12 +82,8 @@ class TestPostEvent:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value={user.slug},
-            ),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.mute_all_participants"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({user.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             _post_event(client, session.slug, {"type": "start_room"}, 0)
             resp = _post_event(client, session.slug, {"type": "pass_stick"}, 0)  # stale
@@ -104,11 +99,8 @@ class TestPostEvent:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value={keeper.slug},
-            ),
-            patch("totem.rooms.api.publish_state"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({keeper.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             resp = _post_event(client, session.slug, {"type": "start_room"}, 0)
 
@@ -119,11 +111,8 @@ class TestPostEvent:
         client, _ = client_with_user
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value=set(),
-            ),
-            patch("totem.rooms.api.publish_state"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants(set())),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             resp = _post_event(client, "nonexistent", {"type": "start_room"}, 0)
 
@@ -138,11 +127,8 @@ class TestPostEvent:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value={keeper.slug, user.slug},
-            ),
-            patch("totem.rooms.api.publish_state"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({keeper.slug, user.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             resp = _post_event(client, session.slug, {"type": "start_room"}, 0)
 
@@ -156,12 +142,8 @@ class TestPostEvent:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value={user.slug},
-            ),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.mute_all_participants"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({user.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             _post_event(client, session.slug, {"type": "start_room"}, 0)
             resp = _post_event(
@@ -183,12 +165,8 @@ class TestPostEvent:
         assert session.ended_at is None
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value={user.slug},
-            ),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.mute_all_participants"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({user.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             _post_event(client, session.slug, {"type": "start_room"}, 0)
             _post_event(
@@ -208,17 +186,36 @@ class TestPostEvent:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value={user.slug},
-            ),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.mute_all_participants") as mock_mute_all,
+            patch("totem.rooms.api.aget_participants", return_value=_participants({user.slug})),
+            patch("totem.rooms.api.aapply_room_effects") as mock_effects,
+        ):
+            resp = _post_event(client, session.slug, {"type": "start_room"}, 0)
+
+        assert resp.status_code == 200
+        mock_effects.assert_called_once()
+        _, effects = mock_effects.call_args[0]
+        assert effects.mute_all
+        assert effects.mute_except == user.slug
+
+    def test_side_effects_reuse_fetched_participants(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+        participants = _participants({user.slug})
+
+        with (
+            patch("totem.rooms.api.aget_participants", return_value=participants) as mock_get,
+            patch("totem.rooms.api.aapply_room_effects") as mock_effects,
         ):
             resp = _post_event(client, session.slug, {"type": "start_room"}, 0)
 
         assert resp.status_code == 200
-        mock_mute_all.assert_called_once_with(session.slug, except_identity=user.slug)
+        mock_get.assert_called_once_with(session.slug)
+        room_name, effects = mock_effects.call_args[0]
+        assert room_name == session.slug
+        assert effects.state.version == 1
+        assert mock_effects.call_args[1]["participants"] is participants
 
     def test_keeper_pass_can_include_optional_prompt(self, client_with_user: tuple[Client, User]):
         client, keeper = client_with_user
@@ -231,9 +228,8 @@ class TestPostEvent:
         connected = {keeper.slug, user1.slug, user2.slug}
 
         with (
-            patch("totem.rooms.api.get_connected_participants", return_value=connected),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.mute_all_participants"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants(connected)),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             start = _post_event(client, session.slug, {"type": "start_room"}, 0)
             assert start.status_code == 200
@@ -294,12 +290,8 @@ class TestGetState:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch(
-                "totem.rooms.api.get_connected_participants",
-                return_value={user.slug},
-            ),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.mute_all_participants"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({user.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             _post_event(client, session.slug, {"type": "start_room"}, 0)
 
@@ -308,6 +300,68 @@ class TestGetState:
         assert resp.json()["status"] == "active"
         assert resp.json()["version"] == 1
 
+    def test_unchanged_state_returns_304(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+
+        first = _get_state(client, session.slug)
+        resp = client.get(f"/api/mobile/protected/rooms/{session.slug}/state", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp["ETag"] == first["ETag"]
+
+    def test_cached_poll_does_not_query_room_or_attendees(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+        _get_state(client, session.slug)
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = _get_state(client, session.slug)
+
+        assert resp.status_code == 200
+        assert resp.json()["version"] == 0
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        assert "rooms_room" not in sql
+        assert "attendees" not in sql
+
+    def test_event_refreshes_cached_state_on_commit(
+        self, client_with_user: tuple[Client, User], django_capture_on_commit_callbacks
+    ):
+        client, user = client_with_user
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+        etag = _get_state(client, session.slug)["ETag"]
+
+        with (
+            patch("totem.rooms.api.aget_participants", return_value=_participants({user.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            _post_event(client, session.slug, {"type": "start_room"}, 0)
+
+        resp = client.get(f"/api/mobile/protected/rooms/{session.slug}/state", HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 200
+        assert resp.json()["version"] == 1
+        assert resp["ETag"] != etag
+
+    def test_new_attendee_is_not_locked_out_by_cached_attendees(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        keeper = UserFactory()
+        session = SessionFactory(space__author=keeper)
+        session.attendees.add(keeper)
+        Room.objects.get_or_create_for_session(session)
+        assert _get_state(client, session.slug).status_code == 403
+
+        session.attendees.add(user)
+
+        assert _get_state(client, session.slug).status_code == 200
+
 
 # ---------------------------------------------------------------------------
 # Join
@@ -335,7 +389,7 @@ class TestJoinRoom:
 
         with (
             patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
-            patch("totem.rooms.api.get_connected_participants", return_value={}),
+            patch("totem.rooms.api.aget_connected_participants", return_value={}),
         ):
             resp = client.post(f"{BASE}/{session.slug}/join")
 
@@ -344,6 +398,22 @@ class TestJoinRoom:
         assert user in session.joined.all()
         assert Room.objects.filter(session=session).exists()
 
+    def test_join_prewarmed_room_only_reads_room(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        session = _make_joinable_session(user)
+        Room.objects.create_for_sessions([session])
+
+        with (
+            patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
+            patch("totem.rooms.api.aget_connected_participants", return_value={}),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            resp = client.post(f"{BASE}/{session.slug}/join")
+
+        assert resp.status_code == 200
+        writes = [q["sql"] for q in queries.captured_queries if not q["sql"].startswith("SELECT")]
+        assert not [sql for sql in writes if "rooms_room" in sql]
+
     def test_join_not_joinable(self, client_with_user: tuple[Client, User]):
         client, user = client_with_user
         # Session in the future — can_join returns False
@@ -370,7 +440,7 @@ class TestJoinRoom:
         with (
             patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
             patch("totem.rooms.api.analytics") as mock_analytics,
-            patch("totem.rooms.api.get_connected_participants", return_value={}),
+            patch("totem.rooms.api.aget_connected_participants", return_value={}),
         ):
             resp = client.post(f"{BASE}/{session.slug}/join")
 
@@ -412,7 +482,7 @@ class TestJoinRoom:
 
         with (
             patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
-            patch("totem.rooms.api.get_connected_participants", return_value={user.slug}),
+            patch("totem.rooms.api.aget_connected_participants", return_value={user.slug}),
         ):
             resp = client.post(f"{BASE}/{session.slug}/join")
 
@@ -434,7 +504,7 @@ class TestJoinRoom:
 
         with (
             patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
-            patch("totem.rooms.api.get_connected_participants", return_value={}),
+            patch("totem.rooms.api.aget_connected_participants", return_value={}),
         ):
             resp = client.post(f"{BASE}/{session.slug}/join")
 
@@ -527,7 +597,7 @@ class TestJoinRoom:
         session.attendees.add(keeper, user)
         session.joined.add(user)
 
-        with patch("totem.rooms.api.get_connected_participants", return_value=set()):
+        with patch("totem.rooms.api.aget_connected_participants", return_value=set()):
             resp = client.post(f"{BASE}/{session.slug}/join")
 
         assert resp.status_code == 403
@@ -548,7 +618,7 @@ class TestJoinRoom:
 
         with (
             patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
-            patch("totem.rooms.api.get_connected_participants", return_value={keeper.slug}),
+            patch("totem.rooms.api.aget_connected_participants", return_value={keeper.slug}),
         ):
             resp = client.post(f"{BASE}/{session.slug}/join")
 
@@ -556,6 +626,78 @@ class TestJoinRoom:
         assert resp.json()["token"] == "fake-jwt-token"
 
 
+@pytest.mark.django_db
+class TestRejoinRoom:
+    def test_returns_token_state_and_presence(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        keeper = UserFactory()
+        session = _make_joinable_session(keeper, attendees=[user])
+        session.space.meeting_provider = Space.MeetingProviderChoices.LIVEKIT
+        session.space.save()
+
+        with (
+            patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
+            patch("totem.rooms.api.aget_connected_participants", return_value={keeper.slug, user.slug}),
+        ):
+            resp = client.post(f"{BASE}/{session.slug}/rejoin")
+
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["token"] == "fake-jwt-token"
+        assert body["is_already_present"] is True
+        assert body["state"]["session_slug"] == session.slug
+        assert body["state"]["version"] == 0
+        assert body["connected"] == sorted([keeper.slug, user.slug])
+        assert user in session.joined.all()
+
+    def test_existing_room(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        keeper = UserFactory()
+        session = _make_joinable_session(keeper, attendees=[user])
+        session.space.meeting_provider = Space.MeetingProviderChoices.LIVEKIT
+        session.space.save()
+        Room.objects.get_or_create_for_session(session)
+
+        with (
+            patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
+            patch("totem.rooms.api.aget_connected_participants", return_value={keeper.slug}),
+        ):
+            resp = client.post(f"{BASE}/{session.slug}/rejoin")
+
+        assert resp.status_code == 200
+        assert resp.json()["state"]["session_slug"] == session.slug
+        assert resp.json()["is_already_present"] is False
+
+    def test_presence_is_null_when_livekit_unreachable(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        session = _make_joinable_session(user)
+        session.space.meeting_provider = Space.MeetingProviderChoices.LIVEKIT
+        session.space.save()
+
+        with (
+            patch("totem.rooms.api.create_access_token", return_value="fake-jwt-token"),
+            patch("totem.rooms.api.aget_connected_participants", return_value=None),
+        ):
+            resp = client.post(f"{BASE}/{session.slug}/rejoin")
+
+        assert resp.status_code == 200
+        assert resp.json()["connected"] is None
+        assert resp.json()["is_already_present"] is False
+
+    def test_banned_returns_403(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        keeper = UserFactory()
+        session = _make_joinable_session(keeper, attendees=[user])
+        room = Room.objects.get_or_create_for_session(session)
+        room.banned_participants = [user.slug]
+        room.save()
+
+        resp = client.post(f"{BASE}/{session.slug}/rejoin")
+
+        assert resp.status_code == 403
+        assert resp.json()["code"] == "banned"
+
+
 # ---------------------------------------------------------------------------
 # Mute
 # ---------------------------------------------------------------------------
@@ -569,7 +711,7 @@ class TestMuteParticipant:
         session.attendees.add(keeper)
         Room.objects.get_or_create_for_session(session)
 
-        with patch("totem.rooms.api.mute_participant") as mock_mute:
+        with patch("totem.rooms.api.amute_participant") as mock_mute:
             resp = client.post(f"{BASE}/{session.slug}/mute/some-participant")
 
         assert resp.status_code == 200
@@ -608,7 +750,7 @@ class TestMuteAll:
         session.attendees.add(keeper)
         Room.objects.get_or_create_for_session(session)
 
-        with patch("totem.rooms.api.mute_all_participants") as mock_mute_all:
+        with patch("totem.rooms.api.amute_all_participants") as mock_mute_all:
             resp = client.post(f"{BASE}/{session.slug}/mute-all")
 
         assert resp.status_code == 200
@@ -640,7 +782,7 @@ class TestRemoveParticipant:
         session.attendees.add(keeper)
         Room.objects.get_or_create_for_session(session)
 
-        with patch("totem.rooms.api.remove_participant") as mock_remove:
+        with patch("totem.rooms.api.aremove_participant") as mock_remove:
             resp = client.post(f"{BASE}/{session.slug}/remove/some-participant")
 
         assert resp.status_code == 200
@@ -685,9 +827,8 @@ class TestBanParticipant:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch("totem.rooms.api.get_connected_participants", return_value={keeper.slug, participant.slug}),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.remove_participant"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({keeper.slug, participant.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             resp = _post_event(
                 client, session.slug, {"type": "ban_participant", "participant_slug": participant.slug}, 0
@@ -704,13 +845,14 @@ class TestBanParticipant:
         Room.objects.get_or_create_for_session(session)
 
         with (
-            patch("totem.rooms.api.get_connected_participants", return_value={keeper.slug, participant.slug}),
-            patch("totem.rooms.api.publish_state"),
-            patch("totem.rooms.api.remove_participant") as mock_remove,
+            patch("totem.rooms.api.aget_participants", return_value=_participants({keeper.slug, participant.slug})),
+            patch("totem.rooms.api.aapply_room_effects") as mock_effects,
         ):
             _post_event(client, session.slug, {"type": "ban_participant", "participant_slug": participant.slug}, 0)
 
-        mock_remove.assert_called_once_with(session.slug, participant.slug, reason=RemoveReason.BAN)
+        _, effects = mock_effects.call_args[0]
+        assert effects.remove == participant.slug
+        assert effects.remove_reason == RemoveReason.BAN
 
 
 @pytest.mark.django_db
@@ -725,8 +867,8 @@ class TestUnbanParticipant:
         room.save()
 
         with (
-            patch("totem.rooms.api.get_connected_participants", return_value={keeper.slug}),
-            patch("totem.rooms.api.publish_state"),
+            patch("totem.rooms.api.aget_participants", return_value=_participants({keeper.slug})),
+            patch("totem.rooms.api.aapply_room_effects"),
         ):
             resp = _post_event(
                 client, session.slug, {"type": "unban_participant", "participant_slug": participant.slug}, 0
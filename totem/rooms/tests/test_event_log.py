@@ -0,0 +1,160 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from totem.rooms.event_log import ARCHIVE_AFTER, archive_ended_rooms, archive_room, replay
+from totem.rooms.models import Room, RoomArchive, RoomEventLog
+from totem.rooms.replay import check_room
+from totem.rooms.schemas import (
+    AcceptStickEvent,
+    EndReason,
+    EndRoomEvent,
+    PassStickEvent,
+    RoomState,
+    StartRoomEvent,
+)
+from totem.rooms.state_machine import apply_event
+from totem.users.tests.factories import UserFactory
+
+from .test_state_machine import _setup_room
+
+
+def _run_session(passes: int) -> tuple[Room, list[RoomState]]:
+    """Start a three-person room, pass the stick around `passes` times and end it. Returns every state."""
+    keeper, user1, user2 = UserFactory(), UserFactory(), UserFactory()
+    room, slug = _setup_room(keeper, [keeper, user1, user2])
+    connected = {keeper.slug, user1.slug, user2.slug}
+
+    states = [apply_event(slug, keeper.slug, StartRoomEvent(), 0, connected)]
+    for _ in range(passes):
+        speaker = states[-1].current_speaker
+        assert speaker
+        states.append(apply_event(slug, speaker, PassStickEvent(), states[-1].version, connected))
+        next_speaker = states[-1].next_speaker
+        assert next_speaker
+        states.append(apply_event(slug, next_speaker, AcceptStickEvent(), states[-1].version, connected))
+    states.append(
+        apply_event(slug, keeper.slug, EndRoomEvent(reason=EndReason.KEEPER_ENDED), states[-1].version, connected)
+    )
+    room.refresh_from_db()
+    return room, states
+
+
+@pytest.mark.django_db
+class TestRecord:
+    def test_snapshots_every_interval_and_deltas_between(self):
+        with patch("totem.rooms.event_log.SNAPSHOT_INTERVAL", 4):
+            room, _ = _run_session(passes=3)
+
+        logs = list(RoomEventLog.objects.filter(room=room))
+        assert [log.version for log in logs if log.snapshot is not None] == [1, 5]
+        assert all(log.delta is not None for log in logs if log.snapshot is None)
+
+    def test_delta_only_has_changed_fields(self):
+        room, states = _run_session(passes=1)
+
+        passed = RoomEventLog.objects.get(room=room, version=2)
+
+        assert passed.event_type == "pass_stick"
+        assert passed.snapshot is None
+        assert "talking_order" not in passed.delta
+        assert passed.delta["turn_state"] == states[1].turn_state.value
+        assert passed.delta["version"] == 2
+
+
+@pytest.mark.django_db
+class TestReplay:
+    def test_rebuilds_every_version(self):
+        with patch("totem.rooms.event_log.SNAPSHOT_INTERVAL", 4):
+            room, states = _run_session(passes=4)
+
+        assert [replay(room, state.version) for state in states] == states
+
+    def test_unknown_version_raises(self):
+        room, states = _run_session(passes=1)
+
+        with pytest.raises(RoomEventLog.DoesNotExist):
+            replay(room, 0)
+        with pytest.raises(RoomEventLog.DoesNotExist):
+            replay(room, states[-1].version + 1)
+
+
+@pytest.mark.django_db
+class TestArchive:
+    def test_folds_log_into_one_record_that_replays(self):
+        with patch("totem.rooms.event_log.SNAPSHOT_INTERVAL", 4):
+            room, states = _run_session(passes=3)
+
+        archive = archive_room(room)
+
+        assert archive is not None
+        assert not RoomEventLog.objects.filter(room=room).exists()
+        assert [event["version"] for event in archive.events] == [state.version for state in states]
+        assert archive.events[1]["event_type"] == "pass_stick"
+        assert [replay(room, state.version) for state in states] == states
+
+    def test_archives_only_rooms_ended_long_enough_ago(self):
+        old_room, _ = _run_session(passes=1)
+        recent_room, _ = _run_session(passes=1)
+        Room.objects.filter(pk=old_room.pk).update(date_modified=timezone.now() - ARCHIVE_AFTER - timedelta(hours=1))
+
+        assert archive_ended_rooms() == 1
+
+        assert RoomArchive.objects.filter(room=old_room).exists()
+        assert not RoomArchive.objects.filter(room=recent_room).exists()
+        assert RoomEventLog.objects.filter(room=recent_room).exists()
+        assert archive_ended_rooms() == 0
+
+    def test_active_rooms_are_not_archived(self):
+        keeper = UserFactory()
+        room, slug = _setup_room(keeper, [keeper])
+        apply_event(slug, keeper.slug, StartRoomEvent(), 0, {keeper.slug})
+        Room.objects.filter(pk=room.pk).update(date_modified=timezone.now() - ARCHIVE_AFTER - timedelta(hours=1))
+
+        assert archive_ended_rooms() == 0
+
+
+@pytest.mark.django_db
+class TestReplayCheck:
+    def test_logged_events_replay_cleanly(self):
+        with patch("totem.rooms.event_log.SNAPSHOT_INTERVAL", 4):
+            room, states = _run_session(passes=3)
+
+        result = check_room(room)
+
+        assert result.checked == len(states) - 1
+        assert result.mismatches == []
+
+    def test_archived_events_replay_cleanly(self):
+        room, states = _run_session(passes=2)
+        archive_room(room)
+
+        result = check_room(room)
+
+        assert result.checked == len(states) - 1
+        assert result.mismatches == []
+
+    def test_reports_state_that_does_not_match(self):
+        room, _ = _run_session(passes=1)
+        log = RoomEventLog.objects.get(room=room, version=2)
+        log.delta = {**log.delta, "round_number": 7}
+        log.save()
+
+        result = check_room(room)
+
+        assert [mismatch.version for mismatch in result.mismatches] == [2]
+        assert result.mismatches[0].expected.round_number == 7
+        assert result.mismatches[0].actual is not None
+        assert result.mismatches[0].actual.round_number == 2
+
+    def test_command_fails_on_mismatch(self):
+        room, _ = _run_session(passes=1)
+        RoomEventLog.objects.filter(room=room, version=2).update(delta={"turn_state": "idle", "version": 2})
+
+        with pytest.raises(CommandError):
+            call_command("replay_room_events", room.session.slug, stdout=StringIO(), stderr=StringIO())
@@ -1,17 +1,31 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.test import override_settings
 from livekit import api
 
 from totem.rooms.livekit import (
+    MAX_CONCURRENT_MUTES,
+    MAX_PARTICIPANTS,
+    ROOM_EMPTY_TIMEOUT_SECONDS,
     LiveKitConfigurationError,
+    RoomEffects,
+    _mute_all_participants,
+    aapply_room_effects,
+    aget_connected_participants,
+    apply_room_effects,
+    client,
     create_access_token,
+    create_rooms,
     get_connected_participants,
+    get_connected_participants_by_room,
     mute_all_participants,
     mute_participant,
     remove_participant,
 )
+from totem.rooms.schemas import RemoveReason
 from totem.users.tests.factories import UserFactory
 
 LK_SETTINGS = {
@@ -32,24 +46,113 @@ def _make_participant(identity: str, has_audio: bool = True) -> MagicMock:
         track = MagicMock()
         track.type = api.TrackType.AUDIO
         track.sid = "track-123"
+        track.muted = False
         participant.tracks = [track]
     else:
         participant.tracks = []
     return participant
 
 
+async def _hang(*args, **kwargs):
+    """A LiveKit call that never answers."""
+    await asyncio.Event().wait()
+
+
 def _make_mock_lkapi() -> MagicMock:
     mock = MagicMock()
     mock.room.get_participant = AsyncMock()
     mock.room.mute_published_track = AsyncMock()
     mock.room.list_participants = AsyncMock()
+    mock.room.list_rooms = AsyncMock()
     mock.room.remove_participant = AsyncMock()
-    # Support async context manager: async with _get_api() as lkapi
-    mock.__aenter__ = AsyncMock(return_value=mock)
-    mock.__aexit__ = AsyncMock(return_value=False)
+    mock.room.update_room_metadata = AsyncMock()
+    mock.room.create_room = AsyncMock()
+    mock.aclose = AsyncMock()
     return mock
 
 
+@pytest.fixture(autouse=True)
+def fresh_client():
+    """The LiveKit client is process-wide; give every test its own, built from that test's mocks."""
+    yield
+    client.close()
+    client.latency.clear()
+
+
+# ---------------------------------------------------------------------------
+# LiveKitClient
+# ---------------------------------------------------------------------------
+
+
+def _empty_room() -> MagicMock:
+    return MagicMock(participants=[])
+
+
+@pytest.mark.enable_socket
+class TestLiveKitClient:
+    @override_settings(**LK_SETTINGS)
+    def test_reuses_one_api_across_calls(self):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_participants.return_value = _empty_room()
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi) as mock_cls:
+            get_connected_participants("room-1")
+            mute_all_participants("room-1")
+            get_connected_participants("room-2")
+
+        mock_cls.assert_called_once()
+        mock_lkapi.aclose.assert_not_called()
+
+    @override_settings(**LK_SETTINGS)
+    def test_async_callers_share_the_client(self):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_participants.return_value = _empty_room()
+
+        async def from_another_loop():
+            return await aget_connected_participants("room-1")
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi) as mock_cls:
+            get_connected_participants("room-1")
+            identities = asyncio.run(from_another_loop())
+
+        assert identities == set()
+        mock_cls.assert_called_once()
+        assert client.latency["get_connected_participants"].calls == 2
+
+    @override_settings(**LK_SETTINGS)
+    def test_close_releases_the_session_and_next_call_reconnects(self):
+        first, second = _make_mock_lkapi(), _make_mock_lkapi()
+        first.room.list_participants.return_value = _empty_room()
+        second.room.list_participants.return_value = _empty_room()
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", side_effect=[first, second]):
+            get_connected_participants("room-1")
+            client.close()
+            get_connected_participants("room-1")
+
+        first.aclose.assert_awaited_once()
+        second.room.list_participants.assert_awaited_once()
+
+    @override_settings(**LK_SETTINGS)
+    def test_records_latency_per_call(self):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_participants.return_value = _empty_room()
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            get_connected_participants("room-1")
+            get_connected_participants("room-2")
+            mute_all_participants("room-1")
+
+        assert client.latency["get_connected_participants"].calls == 2
+        assert client.latency["mute_all_participants"].calls == 1
+        assert client.latency["get_connected_participants"].max_seconds >= 0
+
+    @override_settings(LIVEKIT_API_KEY=None, LIVEKIT_API_SECRET=None)
+    def test_raises_when_not_configured(self):
+        with pytest.raises(LiveKitConfigurationError):
+            mute_all_participants("room-1")
+
+
 # ---------------------------------------------------------------------------
 # create_access_token
 # ---------------------------------------------------------------------------
@@ -69,6 +172,33 @@ class TestCreateAccessToken:
         assert isinstance(token, str)
         assert len(token) > 0
 
+    @override_settings(**LK_SETTINGS)
+    def test_reuses_cached_token(self):
+        user = UserFactory()
+
+        with patch("totem.rooms.livekit.api.AccessToken", wraps=api.AccessToken) as mock_token:
+            first = create_access_token(user, "room-1")
+            second = create_access_token(user, "room-1")
+            other_room = create_access_token(user, "room-2")
+
+        assert first == second
+        assert other_room != first
+        assert mock_token.call_count == 2
+
+    @override_settings(**LK_SETTINGS)
+    def test_reissues_after_name_change(self):
+        user = UserFactory(name="Before")
+        first = create_access_token(user, "room-1")
+
+        user.name = "After"
+        second = create_access_token(user, "room-1")
+
+        assert second != first
+        assert (
+            api.TokenVerifier(LK_SETTINGS["LIVEKIT_API_KEY"], LK_SETTINGS["LIVEKIT_API_SECRET"]).verify(second).name
+            == "After"
+        )
+
     @override_settings(LIVEKIT_API_KEY=None, LIVEKIT_API_SECRET=None)
     def test_raises_when_not_configured(self):
         user = UserFactory()
@@ -127,14 +257,142 @@ class TestGetConnectedParticipants:
 
     @override_settings(**LK_SETTINGS)
     def test_returns_none_when_livekit_unreachable(self):
-        with patch(
-            "totem.rooms.livekit._get_connected_participants",
-            side_effect=api.TwirpError(code="500", status=1, msg="livekit unavailable"),
-        ):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_participants.side_effect = api.TwirpError(code="500", status=1, msg="livekit unavailable")
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
             identities = get_connected_participants("room-1")
 
         assert identities is None
 
+    @override_settings(**LK_SETTINGS)
+    def test_returns_none_when_livekit_hangs(self):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_participants.side_effect = _hang
+
+        with (
+            patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi),
+            patch("totem.rooms.livekit.RPC_TIMEOUT_SECONDS", 0.1),
+        ):
+            assert get_connected_participants("room-1") is None
+            assert async_to_sync(aget_connected_participants)("room-1") is None
+
+
+def _make_room(name: str, num_participants: int) -> MagicMock:
+    room = MagicMock()
+    room.name = name
+    room.num_participants = num_participants
+    return room
+
+
+@pytest.mark.enable_socket
+class TestGetConnectedParticipantsByRoom:
+    @override_settings(**LK_SETTINGS)
+    def test_only_queries_occupied_rooms(self):
+        participant = _make_participant("user-1")
+        participant.state = api.ParticipantInfo.State.ACTIVE
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_rooms.return_value = MagicMock(rooms=[_make_room("room-1", 1), _make_room("room-2", 0)])
+        mock_lkapi.room.list_participants.return_value = MagicMock(participants=[participant])
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi) as mock_cls:
+            presence = get_connected_participants_by_room(["room-1", "room-2", "room-3"])
+
+        assert presence == {"room-1": {"user-1"}, "room-2": set(), "room-3": set()}
+        mock_cls.assert_called_once()
+        mock_lkapi.room.list_rooms.assert_awaited_once()
+        mock_lkapi.room.list_participants.assert_awaited_once()
+        assert mock_lkapi.room.list_participants.call_args[0][0].room == "room-1"
+
+    @override_settings(**LK_SETTINGS)
+    def test_failed_room_lookup_returns_none_for_that_room(self):
+        participant = _make_participant("user-1")
+        participant.state = api.ParticipantInfo.State.ACTIVE
+
+        async def list_participants(request):
+            if request.room == "room-2":
+                raise api.TwirpError(code="500", status=1, msg="livekit unavailable")
+            return MagicMock(participants=[participant])
+
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_rooms.return_value = MagicMock(rooms=[_make_room("room-1", 1), _make_room("room-2", 1)])
+        mock_lkapi.room.list_participants.side_effect = list_participants
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            presence = get_connected_participants_by_room(["room-1", "room-2"])
+
+        assert presence == {"room-1": {"user-1"}, "room-2": None}
+
+    @override_settings(**LK_SETTINGS)
+    def test_returns_none_for_every_room_when_livekit_unreachable(self):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_rooms.side_effect = api.TwirpError(code="500", status=1, msg="livekit unavailable")
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            presence = get_connected_participants_by_room(["room-1", "room-2"])
+
+        assert presence == {"room-1": None, "room-2": None}
+
+    @override_settings(**LK_SETTINGS)
+    def test_returns_none_for_every_room_when_livekit_hangs(self):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_rooms.side_effect = _hang
+
+        with (
+            patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi),
+            patch("totem.rooms.livekit.RPC_TIMEOUT_SECONDS", 0.1),
+        ):
+            presence = get_connected_participants_by_room(["room-1", "room-2"])
+
+        assert presence == {"room-1": None, "room-2": None}
+
+    def test_no_rooms_makes_no_calls(self):
+        with patch("totem.rooms.livekit._get_api") as mock_get_api:
+            assert get_connected_participants_by_room([]) == {}
+
+        mock_get_api.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# create_rooms
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.enable_socket
+class TestCreateRooms:
+    @override_settings(**LK_SETTINGS)
+    def test_creates_each_room_with_join_configuration(self):
+        mock_lkapi = _make_mock_lkapi()
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            created = create_rooms(["room-1", "room-2"])
+
+        assert created == {"room-1", "room-2"}
+        requests = [call[0][0] for call in mock_lkapi.room.create_room.call_args_list]
+        assert sorted(request.name for request in requests) == ["room-1", "room-2"]
+        assert all(request.max_participants == MAX_PARTICIPANTS for request in requests)
+        assert all(request.empty_timeout == ROOM_EMPTY_TIMEOUT_SECONDS for request in requests)
+
+    @override_settings(**LK_SETTINGS)
+    def test_failed_room_is_left_out(self):
+        async def create_room(request):
+            if request.name == "room-2":
+                raise api.TwirpError(code="500", status=1, msg="livekit unavailable")
+
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.create_room.side_effect = create_room
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            created = create_rooms(["room-1", "room-2"])
+
+        assert created == {"room-1"}
+
+    def test_no_rooms_makes_no_calls(self):
+        with patch("totem.rooms.livekit._get_api") as mock_get_api:
+            assert create_rooms([]) == set()
+
+        mock_get_api.assert_not_called()
+
 
 # ---------------------------------------------------------------------------
 # mute_participant
@@ -221,6 +479,167 @@ class TestMuteAllParticipants:
 
         assert mock_lkapi.room.mute_published_track.call_count == 2
 
+    @override_settings(**LK_SETTINGS)
+    def test_skips_tracks_already_muted(self):
+        muted = _make_participant("user-1")
+        muted.tracks[0].muted = True
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_participants.return_value = MagicMock(participants=[muted, _make_participant("user-2")])
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            mute_all_participants("room-1")
+
+        mock_lkapi.room.mute_published_track.assert_awaited_once()
+        assert mock_lkapi.room.mute_published_track.call_args[0][0].identity == "user-2"
+
+    @override_settings(**LK_SETTINGS)
+    def test_bounds_concurrent_mutes(self):
+        in_flight = peak = 0
+
+        async def mute(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        participants = [_make_participant(f"user-{i}") for i in range(MAX_CONCURRENT_MUTES * 2)]
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.list_participants.return_value = MagicMock(participants=participants)
+        mock_lkapi.room.mute_published_track.side_effect = mute
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            mute_all_participants("room-1")
+
+        assert mock_lkapi.room.mute_published_track.await_count == len(participants)
+        assert peak == MAX_CONCURRENT_MUTES
+
+    @override_settings(**LK_SETTINGS)
+    def test_coalesces_requests_made_during_a_sweep(self):
+        participants = [_make_participant(f"user-{i}") for i in range(1, 4)]
+        for participant in participants:
+            participant.state = api.ParticipantInfo.State.ACTIVE
+        sweeping = asyncio.Event()
+        release = asyncio.Event()
+
+        async def mute(request):
+            sweeping.set()
+            await release.wait()
+
+        async def burst(lkapi):
+            # user-1 takes the stick, then user-2 and user-3 while the first sweep is still muting.
+            first = asyncio.ensure_future(_mute_all_participants(lkapi, "room-1", "user-1", participants))
+            await sweeping.wait()
+            rest = [
+                asyncio.ensure_future(_mute_all_participants(lkapi, "room-1", slug, participants))
+                for slug in ("user-2", "user-3")
+            ]
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(first, *rest)
+
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.mute_published_track.side_effect = mute
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            client.run(burst)
+
+        muted = [call[0][0].identity for call in mock_lkapi.room.mute_published_track.call_args_list]
+        # Two sweeps instead of three, the second leaving the last speaker unmuted.
+        assert sorted(muted[:2]) == ["user-2", "user-3"]
+        assert sorted(muted[2:]) == ["user-1", "user-2"]
+        assert client.mute_sweeps == {}
+
+
+# ---------------------------------------------------------------------------
+# apply_room_effects
+# ---------------------------------------------------------------------------
+
+
+def _state() -> MagicMock:
+    state = MagicMock()
+    state.model_dump_json.return_value = "{}"
+    return state
+
+
+@pytest.mark.enable_socket
+class TestApplyRoomEffects:
+    @override_settings(**LK_SETTINGS)
+    def test_publishes_and_mutes_with_given_participants(self):
+        keeper = _make_participant("keeper")
+        keeper.state = api.ParticipantInfo.State.ACTIVE
+        user = _make_participant("user-1")
+        user.state = api.ParticipantInfo.State.ACTIVE
+        mock_lkapi = _make_mock_lkapi()
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            apply_room_effects(
+                "room-1", RoomEffects(state=_state(), mute_all=True, mute_except="keeper"), participants=[keeper, user]
+            )
+
+        mock_lkapi.room.update_room_metadata.assert_awaited_once()
+        mock_lkapi.room.list_participants.assert_not_called()
+        mock_lkapi.room.mute_published_track.assert_awaited_once()
+        assert mock_lkapi.room.mute_published_track.call_args[0][0].identity == "user-1"
+
+    @override_settings(**LK_SETTINGS)
+    def test_publish_only_by_default(self):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.send_data = AsyncMock()
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            apply_room_effects("room-1", RoomEffects(state=_state()))
+
+        mock_lkapi.room.update_room_metadata.assert_awaited_once()
+        mock_lkapi.room.list_participants.assert_not_called()
+        mock_lkapi.room.send_data.assert_not_called()
+
+    @override_settings(**LK_SETTINGS)
+    def test_async_waits_for_effects(self):
+        mock_lkapi = _make_mock_lkapi()
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            asyncio.run(aapply_room_effects("room-1", RoomEffects(state=_state(), mute_all=True), participants=[]))
+
+        mock_lkapi.room.update_room_metadata.assert_awaited_once()
+        mock_lkapi.room.list_participants.assert_not_called()
+
+    @override_settings(**LK_SETTINGS)
+    def test_failed_publish_does_not_stop_remove_or_raise(self):
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.send_data = AsyncMock()
+        mock_lkapi.room.update_room_metadata.side_effect = api.TwirpError(code="500", status=1, msg="down")
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            apply_room_effects("room-1", RoomEffects(state=_state(), remove="user-1", remove_reason=RemoveReason.BAN))
+
+        mock_lkapi.room.send_data.assert_awaited_once()
+        assert mock_lkapi.room.send_data.call_args[0][0].destination_identities == ["user-1"]
+
+    @override_settings(**LK_SETTINGS)
+    def test_runs_effects_concurrently(self):
+        # Each call waits for the other to start, so this only finishes if they overlap.
+        started = 0
+        both_started = asyncio.Event()
+
+        async def rendezvous(*args, **kwargs):
+            nonlocal started
+            started += 1
+            if started == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=5)
+
+        mock_lkapi = _make_mock_lkapi()
+        mock_lkapi.room.send_data = AsyncMock()
+        mock_lkapi.room.update_room_metadata.side_effect = rendezvous
+        mock_lkapi.room.send_data.side_effect = rendezvous
+
+        with patch("totem.rooms.livekit.api.LiveKitAPI", return_value=mock_lkapi):
+            apply_room_effects("room-1", RoomEffects(state=_state(), remove="user-1"))
+
+        assert started == 2
+        mock_lkapi.room.remove_participant.assert_not_called()
+
 
 # ---------------------------------------------------------------------------
 # remove_participant
@@ -0,0 +1,491 @@
+"""
+Load tests for the rooms API.
+
+Runs scripted rooms against the real app over HTTP, fully offline: the app is
+served in-process on localhost the way production runs it under granian (one
+worker, GRANIAN_BLOCKING_THREADS Python threads taking requests off a queue),
+against the test database, with LiveKit replaced by FakeLiveKit. Every
+participant is a client thread that joins, polls the state with its ETag and
+passes the stick when it's their turn; keepers start their room.
+
+Reports throughput, p50/p99 latency and database queries per endpoint, and
+how saturated the blocking thread pool was. Clients and server share one
+process and one GIL, so absolute numbers run pessimistic; compare runs with
+each other, not with production.
+
+The same clients can also drive granian itself in a subprocess, with either
+interface (see GRANIAN_INTERFACE in compose/production/django/start), to
+compare WSGI with the async views under ASGI. Only client-side numbers are
+available there. Short runs are part of the normal suite; the full ones are
+benchmarks:
+
+    TOTEM_BENCHMARKS=1 pytest totem/rooms/tests/test_load.py -s
+"""
+
+from __future__ import annotations
+
+import datetime
+import http.client
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from unittest.mock import patch
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import pytest
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from totem.api.auth import generate_jwt_token
+from totem.rooms.livekit import MAX_PARTICIPANTS, client
+from totem.rooms.schemas import RoomStatus, TurnState
+from totem.spaces.models import Space
+from totem.spaces.tests.factories import SessionFactory
+from totem.users.models import User
+from totem.users.tests.factories import UserFactory
+
+from .fake_livekit import FakeLiveKit
+
+BLOCKING_THREADS = 4  # GRANIAN_BLOCKING_THREADS in compose/production/django/start
+CONN_MAX_AGE = 60  # production default
+# CONN_MAX_AGE by granian interface, as compose/production/django/start sets it.
+GRANIAN_CONN_MAX_AGE = {"wsgi": CONN_MAX_AGE, "asgi": 0}
+REPO_ROOT = Path(__file__).resolve().parents[3]
+LIVEKIT_API_KEY = "load-test-key"
+LIVEKIT_API_SECRET = "load-test-secret-load-test-secret-load-test-secret"
+BASE = "/api/mobile/protected/rooms"
+ENDPOINT = re.compile(rf"^{BASE}/[\w-]+/([\w-]+)")
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+@dataclass
+class LoadStats:
+    latency: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))  # seconds, by endpoint
+    queries: dict[str, list[int]] = field(default_factory=lambda: defaultdict(list))
+    statuses: dict[str, list[int]] = field(default_factory=lambda: defaultdict(list))
+    queue_wait: list[float] = field(default_factory=list)  # seconds a request waited for a thread
+    busy_seconds: float = 0.0
+    max_busy: int = 0
+    livekit_calls: dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class BlockingPoolServer(WSGIServer):
+    """
+    A WSGI server shaped like one granian worker: connections are accepted on
+    one thread and queued for a fixed pool of Python threads, so a slow
+    request holds a thread and the rest queue behind it.
+    """
+
+    def __init__(self, stats: LoadStats, threads: int = BLOCKING_THREADS):
+        super().__init__(("127.0.0.1", 0), _QuietHandler)
+        self.stats = stats
+        self.threads = threads
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix="blocking")
+        self._busy = 0
+        self.set_app(self._counting_app(get_wsgi_application()))
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self.server_address[:2]
+        return str(host), port
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address, time.perf_counter())
+
+    def _handle(self, request, client_address, queued_at: float) -> None:
+        started = time.perf_counter()
+        with self.stats.lock:
+            self.stats.queue_wait.append(started - queued_at)
+            self._busy += 1
+            self.stats.max_busy = max(self.stats.max_busy, self._busy)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self.stats.lock:
+                self._busy -= 1
+                self.stats.busy_seconds += time.perf_counter() - started
+
+    def _counting_app(self, app):
+        def counted(environ, start_response):
+            queries = 0
+
+            def count(execute, sql, params, many, context):
+                nonlocal queries
+                queries += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count):
+                response = app(environ, start_response)
+            match = ENDPOINT.match(environ["PATH_INFO"])
+            with self.stats.lock:
+                self.stats.queries[match.group(1) if match else environ["PATH_INFO"]].append(queries)
+            return response
+
+        return counted
+
+    def close(self) -> None:
+        # Each pool thread holds a persistent database connection; close them all.
+        barrier = threading.Barrier(self.threads)
+
+        def close_connection():
+            barrier.wait(timeout=5)
+            connection.close()
+
+        for _ in range(self.threads):
+            self.pool.submit(close_connection)
+        self.pool.shutdown()
+        self.server_close()
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class RoomClient:
+    """One participant's app: joins, polls state and passes the stick when it's their turn."""
+
+    def __init__(self, address: tuple[str, int], stats: LoadStats, user: User, session_slug: str):
+        self.address = address
+        self.stats = stats
+        self.slug = user.slug
+        self.session_slug = session_slug
+        self.token = generate_jwt_token(user)
+        self.etag = ""
+        self.state: dict | None = None
+
+    def request(self, method: str, action: str, body: dict | None = None) -> tuple[int, dict | None]:
+        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
+        if action == "state" and self.etag:
+            headers["If-None-Match"] = self.etag
+        conn = http.client.HTTPConnection(*self.address, timeout=30)
+        started = time.perf_counter()
+        try:
+            conn.request(method, f"{BASE}/{self.session_slug}/{action}", json.dumps(body) if body else None, headers)
+            resp = conn.getresponse()
+            payload = resp.read()
+        finally:
+            conn.close()
+        with self.stats.lock:
+            self.stats.latency[action].append(time.perf_counter() - started)
+            self.stats.statuses[action].append(resp.status)
+        if action == "state" and resp.status == 200:
+            self.etag = resp.getheader("ETag") or ""
+        return resp.status, json.loads(payload) if payload else None
+
+    def poll(self) -> dict | None:
+        status, body = self.request("GET", "state")
+        if status == 200:
+            self.state = body
+        return self.state
+
+    def send(self, event: dict) -> None:
+        assert self.state is not None
+        status, body = self.request("POST", "event", {"event": event, "last_seen_version": self.state["version"]})
+        if status == 200:
+            self.state = body
+
+    def run(self, livekit: FakeLiveKit, is_keeper: bool, room_size: int, deadline: float, poll_interval: float):
+        status, _ = self.request("POST", "join")
+        if status != 200:
+            return
+        livekit.connect(self.session_slug, self.slug)
+        while time.perf_counter() < deadline:
+            state = self.poll()
+            if state is None:
+                break
+            if state["status"] == RoomStatus.WAITING_ROOM:
+                # Keepers start once everyone is in.
+                present = len(livekit.rooms[self.session_slug].participants)
+                if is_keeper and present == room_size:
+                    self.send({"type": "start_room"})
+            elif state["status"] == RoomStatus.ACTIVE:
+                if state["turn_state"] == TurnState.SPEAKING and state["current_speaker"] == self.slug:
+                    self.send({"type": "pass_stick"})
+                elif state["turn_state"] == TurnState.PASSING and state["next_speaker"] == self.slug:
+                    self.send({"type": "accept_stick"})
+            time.sleep(poll_interval)
+
+
+def _make_sessions(rooms: int, room_size: int) -> list[tuple[str, list[User]]]:
+    """LiveKit sessions that started five minutes ago, as (slug, attendees); the first attendee keeps."""
+    sessions = []
+    for _ in range(rooms):
+        users = [UserFactory() for _ in range(room_size)]
+        session = SessionFactory(
+            space__author=users[0],
+            space__meeting_provider=Space.MeetingProviderChoices.LIVEKIT,
+            start=timezone.now() - datetime.timedelta(minutes=5),
+        )
+        session.attendees.add(*users)
+        sessions.append((session.slug, users))
+    return sessions
+
+
+def _drive(
+    address: tuple[str, int],
+    stats: LoadStats,
+    livekit: FakeLiveKit,
+    sessions: list[tuple[str, list[User]]],
+    duration: float,
+    poll_interval: float,
+) -> None:
+    """Run a client thread per attendee against the app at `address` for `duration` seconds."""
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(
+            target=RoomClient(address, stats, user, slug).run,
+            args=(livekit, user == users[0], len(users), deadline, poll_interval),
+        )
+        for slug, users in sessions
+        for user in users
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_rooms(rooms: int, room_size: int, duration: float, poll_interval: float, livekit_latency: float) -> LoadStats:
+    """Run `rooms` rooms of `room_size` participants against the app for `duration` seconds."""
+    stats = LoadStats()
+    sessions = _make_sessions(rooms, room_size)
+
+    with (
+        FakeLiveKit(latency=livekit_latency) as livekit,
+        patch.dict(connection.settings_dict, {"CONN_MAX_AGE": CONN_MAX_AGE}),
+    ):
+        server = BlockingPoolServer(stats)
+        serving = threading.Thread(target=server.serve_forever, daemon=True)
+        serving.start()
+        client.close()  # reconnect to the fake
+        try:
+            with _livekit_settings(livekit.url):
+                _drive(server.address, stats, livekit, sessions, duration, poll_interval)
+        finally:
+            server.shutdown()
+            server.close()
+            client.close()
+        stats.livekit_calls = dict(livekit.calls)
+    return stats
+
+
+def run_rooms_on_granian(
+    interface: str,
+    rooms: int,
+    room_size: int,
+    duration: float,
+    poll_interval: float,
+    livekit_latency: float,
+    workdir: Path,
+) -> LoadStats:
+    """run_rooms against granian serving the app with `interface` ("wsgi" or "asgi") in a subprocess."""
+    stats = LoadStats()
+    sessions = _make_sessions(rooms, room_size)
+    with FakeLiveKit(latency=livekit_latency) as livekit, granian(interface, livekit.url, workdir) as address:
+        _drive(address, stats, livekit, sessions, duration, poll_interval)
+        stats.livekit_calls = dict(livekit.calls)
+    return stats
+
+
+@contextmanager
+def granian(interface: str, livekit_url: str, workdir: Path) -> Iterator[tuple[str, int]]:
+    """
+    Serve the app with granian in a subprocess, tuned like
+    compose/production/django/start, against this test database and `livekit_url`.
+    """
+    settings_module = f"load_settings_{interface}"
+    overrides = {
+        "ALLOWED_HOSTS": ["*"],
+        "LIVEKIT_URL": livekit_url,
+        "LIVEKIT_API_KEY": LIVEKIT_API_KEY,
+        "LIVEKIT_API_SECRET": LIVEKIT_API_SECRET,
+    }
+    (workdir / f"{settings_module}.py").write_text(
+        "from config.settings.test import *  # noqa: F403\n"
+        + "".join(f"{name} = {value!r}\n" for name, value in overrides.items())
+        + f"DATABASES['default'].update(NAME={connection.settings_dict['NAME']!r}, "
+        f"CONN_MAX_AGE={GRANIAN_CONN_MAX_AGE[interface]})\n"
+    )
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": settings_module,
+        "PYTHONPATH": os.pathsep.join([str(workdir), str(REPO_ROOT)]),
+    }
+    log = (workdir / f"granian-{interface}.log").open("w")
+    # Blocking threads run the sync views and middleware under WSGI. Under ASGI
+    # Python runs on the event loop, and sync work goes to Django's own threads.
+    blocking_threads = BLOCKING_THREADS if interface == "wsgi" else 1
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "granian",
+            "--interface",
+            interface,
+            f"config.{interface}:application",
+            *("--host", "127.0.0.1", "--port", str(port), "--workers", "1"),
+            *("--runtime-mode", "mt", "--runtime-threads", "2", "--blocking-threads", str(blocking_threads)),
+            *("--backpressure", "512", "--http", "1", "--no-ws", "--no-access-log"),
+        ],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    try:
+        _wait_until_serving(server, ("127.0.0.1", port), workdir / f"granian-{interface}.log")
+        yield "127.0.0.1", port
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+        log.close()
+
+
+def _wait_until_serving(server: subprocess.Popen, address: tuple[str, int], log: Path, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"granian exited with {server.returncode}:\n{log.read_text()}")
+        conn = http.client.HTTPConnection(*address, timeout=5)
+        try:
+            conn.request("GET", f"{BASE}/none/state")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+        finally:
+            conn.close()
+    raise RuntimeError(f"granian did not start serving within {timeout}s:\n{log.read_text()}")
+
+
+def _livekit_settings(url: str):
+    return override_settings(
+        LIVEKIT_URL=url,
+        LIVEKIT_API_KEY=LIVEKIT_API_KEY,
+        LIVEKIT_API_SECRET=LIVEKIT_API_SECRET,
+        ALLOWED_HOSTS=["*"],
+    )
+
+
+def report(benchmark_report, name: str, stats: LoadStats, duration: float) -> None:
+    for endpoint, latency in sorted(stats.latency.items()):
+        metrics = {
+            "requests": len(latency),
+            "per_s": len(latency) / duration,
+            "p50_ms": statistics.median(latency) * 1000,
+            "p99_ms": _percentile(latency, 0.99) * 1000,
+        }
+        if queries := stats.queries.get(endpoint):
+            metrics.update(queries_mean=statistics.fmean(queries), queries_max=max(queries))
+        benchmark_report(
+            f"{name} {endpoint}", **metrics, errors=sum(status >= 500 for status in stats.statuses[endpoint])
+        )
+    if stats.queue_wait:  # only known when served in-process
+        benchmark_report(
+            f"{name} blocking threads",
+            utilization=stats.busy_seconds / (BLOCKING_THREADS * duration),
+            max_busy=stats.max_busy,
+            queue_wait_p50_ms=_percentile(stats.queue_wait, 0.5) * 1000,
+            queue_wait_p99_ms=_percentile(stats.queue_wait, 0.99) * 1000,
+        )
+    benchmark_report(f"{name} livekit calls", **stats.livekit_calls)
+
+
+@pytest.mark.enable_socket
+@pytest.mark.allow_hosts(["127.0.0.1", "postgres"])
+@pytest.mark.django_db(transaction=True)
+def test_room_runs_under_load():
+    stats = run_rooms(rooms=1, room_size=3, duration=3.0, poll_interval=0.05, livekit_latency=0.0)
+
+    assert stats.statuses["join"] == [200, 200, 200]
+    assert all(status < 500 for statuses in stats.statuses.values() for status in statuses)
+    assert stats.statuses["event"].count(200) > 2  # started, then passed the stick around
+    assert stats.livekit_calls["UpdateRoomMetadata"] == stats.statuses["event"].count(200)
+    assert stats.livekit_calls["MutePublishedTrack"] > 0
+    assert 304 in stats.statuses["state"]
+
+
+@pytest.mark.benchmark
+@pytest.mark.enable_socket
+@pytest.mark.allow_hosts(["127.0.0.1", "postgres"])
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_ten_full_rooms(benchmark_report):
+    """10 keepers each running a full room, polling once a second, with 20ms to LiveKit."""
+    duration = 20.0
+    stats = run_rooms(rooms=10, room_size=MAX_PARTICIPANTS, duration=duration, poll_interval=1.0, livekit_latency=0.02)
+
+    report(benchmark_report, "10 rooms x 10", stats, duration)
+    assert stats.latency["event"]
+
+
+@pytest.mark.enable_socket
+@pytest.mark.allow_hosts(["127.0.0.1", "postgres"])
+@pytest.mark.django_db(transaction=True)
+def test_room_runs_under_asgi(tmp_path):
+    stats = run_rooms_on_granian(
+        "asgi", rooms=1, room_size=3, duration=3.0, poll_interval=0.05, livekit_latency=0.0, workdir=tmp_path
+    )
+
+    assert stats.statuses["join"] == [200, 200, 200]
+    assert all(status < 500 for statuses in stats.statuses.values() for status in statuses)
+    assert stats.statuses["event"].count(200) > 2
+    assert stats.livekit_calls["UpdateRoomMetadata"] == stats.statuses["event"].count(200)
+
+
+@pytest.mark.benchmark
+@pytest.mark.enable_socket
+@pytest.mark.allow_hosts(["127.0.0.1", "postgres"])
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("livekit_latency", [0.1, 0.5])
+def test_benchmark_wsgi_vs_asgi(benchmark_report, tmp_path, livekit_latency: float):
+    """
+    The ten full rooms under granian's WSGI and ASGI interfaces. Under WSGI a
+    request waiting on LiveKit holds one of the blocking threads; under ASGI it
+    holds nothing, but every request pays for a thread handoff and a new
+    database connection. Which wins depends on how far away LiveKit is.
+    """
+    duration = 20.0
+    for interface in ("wsgi", "asgi"):
+        stats = run_rooms_on_granian(
+            interface,
+            rooms=10,
+            room_size=MAX_PARTICIPANTS,
+            duration=duration,
+            poll_interval=1.0,
+            livekit_latency=livekit_latency,
+            workdir=tmp_path,
+        )
+        report(benchmark_report, f"granian {interface} 10 rooms x 10, LiveKit {livekit_latency}s", stats, duration)
+        assert stats.latency["event"]
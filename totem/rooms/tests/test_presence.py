@@ -0,0 +1,211 @@
+import base64
+import hashlib
+import json
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from livekit import api
+
+from totem.rooms.models import Room, RoomPresence
+from totem.rooms.presence import (
+    PRESENCE_MAX_AGE,
+    cached_connected,
+    event_time,
+    participant_joined,
+    participant_left,
+    record_snapshot,
+)
+from totem.spaces.tests.factories import SessionFactory
+from totem.users.models import User
+
+from .test_livekit import LK_SETTINGS
+
+WEBHOOKS = Path(__file__).parent / "fixtures" / "livekit_webhooks"
+WEBHOOK_URL = "/webhooks/livekit/"
+
+
+def _load(name: str) -> str:
+    return (WEBHOOKS / f"{name}.json").read_text()
+
+
+def _sign(body: str) -> str:
+    digest = base64.b64encode(hashlib.sha256(body.encode()).digest()).decode()
+    return (
+        api.AccessToken(LK_SETTINGS["LIVEKIT_API_KEY"], LK_SETTINGS["LIVEKIT_API_SECRET"]).with_sha256(digest).to_jwt()
+    )
+
+
+def _deliver(client: Client, name: str):
+    body = _load(name)
+    return client.post(WEBHOOK_URL, data=body, content_type="application/webhook+json", HTTP_AUTHORIZATION=_sign(body))
+
+
+@pytest.mark.django_db
+class TestPresenceCache:
+    def test_fresh_snapshot_is_returned(self):
+        record_snapshot("room-1", {"a", "b"})
+
+        assert cached_connected("room-1") == {"a", "b"}
+
+    def test_stale_or_missing_entry_returns_none(self):
+        record_snapshot("room-1", {"a"}, at=timezone.now() - PRESENCE_MAX_AGE - timedelta(seconds=1))
+
+        assert cached_connected("room-1") is None
+        assert cached_connected("room-2") is None
+
+    def test_events_update_snapshot(self):
+        start = timezone.now() - timedelta(minutes=1)
+        record_snapshot("room-1", {"a"}, at=start)
+
+        participant_joined("room-1", "b", start + timedelta(seconds=10))
+        participant_left("room-1", "a", start + timedelta(seconds=20))
+
+        assert cached_connected("room-1") == {"b"}
+
+    def test_events_do_not_keep_an_old_snapshot_fresh(self):
+        # A lost participant_left must not outlive PRESENCE_MAX_AGE, however many events follow.
+        start = timezone.now() - PRESENCE_MAX_AGE - timedelta(minutes=1)
+        record_snapshot("room-1", {"ghost"}, at=start)
+
+        participant_joined("room-1", "b", timezone.now())
+
+        assert cached_connected("room-1") is None
+        assert RoomPresence.objects.get(room_name="room-1").connected == ["b", "ghost"]
+
+    def test_out_of_order_event_is_ignored(self):
+        now = timezone.now().replace(microsecond=0)
+        record_snapshot("room-1", set(), at=now)
+        participant_left("room-1", "a", now + timedelta(seconds=5))
+
+        participant_joined("room-1", "a", now + timedelta(seconds=2))
+
+        assert RoomPresence.objects.get(room_name="room-1").connected == []
+
+    def test_event_without_snapshot_is_ignored(self):
+        participant_joined("room-1", "a", timezone.now())
+
+        assert not RoomPresence.objects.exists()
+
+
+@pytest.fixture
+def livekit_settings(settings):
+    for name, value in LK_SETTINGS.items():
+        setattr(settings, name, value)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("livekit_settings")
+class TestLiveKitWebhook:
+    def test_recorded_session_lifecycle(self, client: Client):
+        assert _deliver(client, "room_started").status_code == 200
+        presence = RoomPresence.objects.get(room_name="test-session")
+        assert presence.connected == []
+        assert presence.synced_at == event_time(1760000000)
+
+        _deliver(client, "participant_joined")
+        presence.refresh_from_db()
+        assert presence.connected == ["keeper-slug"]
+        assert presence.synced_at == event_time(1760000010)
+
+        _deliver(client, "participant_left")
+        presence.refresh_from_db()
+        assert presence.connected == []
+
+        _deliver(client, "participant_joined")  # redelivered late, older than what we have
+        _deliver(client, "room_finished")
+        presence.refresh_from_db()
+        assert presence.connected == []
+        assert presence.synced_at == event_time(1760000030)
+
+    def test_rejects_bad_signature(self, client: Client):
+        body = _load("room_started")
+        tampered = json.dumps({**json.loads(body), "event": "room_finished"})
+
+        resp = client.post(
+            WEBHOOK_URL, data=tampered, content_type="application/webhook+json", HTTP_AUTHORIZATION=_sign(body)
+        )
+
+        assert resp.status_code == 401
+        assert not RoomPresence.objects.exists()
+
+    def test_rejects_unsigned_request(self, client: Client):
+        resp = client.post(WEBHOOK_URL, data=_load("room_started"), content_type="application/webhook+json")
+
+        assert resp.status_code == 401
+
+    def test_get_not_allowed(self, client: Client):
+        assert client.get(WEBHOOK_URL).status_code == 405
+
+
+@pytest.mark.django_db
+class TestRoomEndpointsUsePresenceCache:
+    def test_post_event_skips_livekit_when_cache_is_fresh(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+        record_snapshot(session.slug, {user.slug})
+
+        with (
+            patch("totem.rooms.api.aget_participants") as mock_get,
+            patch("totem.rooms.api.aapply_room_effects") as mock_effects,
+        ):
+            resp = client.post(
+                f"/api/mobile/protected/rooms/{session.slug}/event",
+                data={"event": {"type": "start_room"}, "last_seen_version": 0},
+                content_type="application/json",
+            )
+
+        assert resp.status_code == 200
+        assert resp.json()["current_speaker"] == user.slug
+        mock_get.assert_not_called()
+        assert mock_effects.call_args[1]["participants"] is None
+
+    def test_post_event_falls_back_to_livekit_and_caches_result(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+        record_snapshot(session.slug, set(), at=timezone.now() - PRESENCE_MAX_AGE - timedelta(minutes=1))
+        participants = [api.ParticipantInfo(identity=user.slug, state=api.ParticipantInfo.State.ACTIVE)]
+
+        with (
+            patch("totem.rooms.api.aget_participants", return_value=participants) as mock_get,
+            patch("totem.rooms.api.aapply_room_effects"),
+        ):
+            resp = client.post(
+                f"/api/mobile/protected/rooms/{session.slug}/event",
+                data={"event": {"type": "start_room"}, "last_seen_version": 0},
+                content_type="application/json",
+            )
+
+        assert resp.status_code == 200
+        mock_get.assert_called_once_with(session.slug)
+        assert cached_connected(session.slug) == {user.slug}
+
+    def test_post_event_falls_back_to_livekit_after_max_age_despite_events(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+        record_snapshot(session.slug, {"ghost"}, at=timezone.now() - PRESENCE_MAX_AGE - timedelta(minutes=1))
+        participant_joined(session.slug, user.slug, timezone.now())
+        participants = [api.ParticipantInfo(identity=user.slug, state=api.ParticipantInfo.State.ACTIVE)]
+
+        with (
+            patch("totem.rooms.api.aget_participants", return_value=participants) as mock_get,
+            patch("totem.rooms.api.aapply_room_effects"),
+        ):
+            resp = client.post(
+                f"/api/mobile/protected/rooms/{session.slug}/event",
+                data={"event": {"type": "start_room"}, "last_seen_version": 0},
+                content_type="application/json",
+            )
+
+        assert resp.status_code == 200
+        mock_get.assert_called_once_with(session.slug)
+        assert cached_connected(session.slug) == {user.slug}
@@ -1,63 +1,77 @@
+from unittest.mock import patch
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from totem.rooms.models import Room
 from totem.rooms.schemas import (
     AcceptStickEvent,
+    ActiveDetail,
     BanParticipantEvent,
+    EndedDetail,
     EndReason,
     EndRoomEvent,
     ErrorCode,
     ForcePassStickEvent,
     PassStickEvent,
     ReorderEvent,
+    RoomState,
     RoomStatus,
     StartRoomEvent,
     TransitionError,
     TurnState,
     UnbanParticipantEvent,
+    WaitingRoomDetail,
+)
+from totem.rooms.state_machine import (
+    TalkingOrder,
+    _reconcile_talking_order,
+    _require_keeper_in_room,
+    apply_event,
+    transition,
 )
-from totem.rooms.state_machine import _next_in_order, _reconcile_talking_order, _require_keeper_in_room, apply_event
 from totem.spaces.tests.factories import SessionFactory
 from totem.users.models import User
 from totem.users.tests.factories import UserFactory
 
 # ---------------------------------------------------------------------------
-# Pure helper: _next_in_order
+# Pure helper: TalkingOrder.next_after
 # ---------------------------------------------------------------------------
 
 
 class TestNextInOrder:
     def test_returns_next_connected(self):
         order = ["a", "b", "c"]
-        assert _next_in_order(order, "a", {"a", "b", "c"}) == "b"
+        assert TalkingOrder(order).next_after("a", {"a", "b", "c"}) == "b"
 
     def test_wraps_around(self):
         order = ["a", "b", "c"]
-        assert _next_in_order(order, "c", {"a", "b", "c"}) == "a"
+        assert TalkingOrder(order).next_after("c", {"a", "b", "c"}) == "a"
 
     def test_skips_disconnected(self):
         order = ["a", "b", "c"]
-        assert _next_in_order(order, "a", {"a", "c"}) == "c"
+        assert TalkingOrder(order).next_after("a", {"a", "c"}) == "c"
 
     def test_returns_self_if_only_connected(self):
         order = ["a", "b", "c"]
-        assert _next_in_order(order, "a", {"a"}) == "a"
+        assert TalkingOrder(order).next_after("a", {"a"}) == "a"
 
     def test_returns_none_if_nobody_connected(self):
         order = ["a", "b", "c"]
-        assert _next_in_order(order, "a", set()) is None
+        assert TalkingOrder(order).next_after("a", set()) is None
 
     def test_returns_none_if_after_not_in_order(self):
         order = ["a", "b", "c"]
-        assert _next_in_order(order, "x", {"a", "b", "c"}) is None
+        assert TalkingOrder(order).next_after("x", {"a", "b", "c"}) is None
 
     def test_empty_order(self):
-        assert _next_in_order([], "a", {"a"}) is None
+        assert TalkingOrder([]).next_after("a", {"a"}) is None
 
     def test_two_people_alternates(self):
         order = ["a", "b"]
-        assert _next_in_order(order, "a", {"a", "b"}) == "b"
-        assert _next_in_order(order, "b", {"a", "b"}) == "a"
+        assert TalkingOrder(order).next_after("a", {"a", "b"}) == "b"
+        assert TalkingOrder(order).next_after("b", {"a", "b"}) == "a"
 
 
 # ---------------------------------------------------------------------------
@@ -105,6 +119,17 @@ class TestReconcileTalkingOrder:
         _reconcile_talking_order(room, set())
         assert room.talking_order == ["a", "b", "c"]
 
+    def test_removes_duplicates(self):
+        room = self._make_room("a", ["a", "b", "a", "c", "b"])
+        order = _reconcile_talking_order(room, {"a", "b", "c"})
+        assert room.talking_order == ["a", "b", "c"]
+        assert order.slugs == room.talking_order
+
+    def test_empty_order_with_keeper_connected(self):
+        room = self._make_room("a", [])
+        _reconcile_talking_order(room, {"a", "b"})
+        assert room.talking_order == ["a", "b"]
+
     def test_fixes_current_speaker_on_disconnect(self):
         room = self._make_room(
             "a",
@@ -164,14 +189,14 @@ class TestRequireKeeperInRoom:
         room = self._make_room("keeper", ["user-1", "user-2"])
 
         with pytest.raises(TransitionError) as exc_info:
-            _require_keeper_in_room(room)
+            _require_keeper_in_room(room, TalkingOrder(room.talking_order))
 
         assert exc_info.value.code == ErrorCode.KEEPER_NOT_IN_ROOM
 
     def test_allows_when_keeper_present_in_talking_order(self):
         room = self._make_room("keeper", ["keeper", "user-1"])
 
-        _require_keeper_in_room(room)
+        _require_keeper_in_room(room, TalkingOrder(room.talking_order))
 
 
 # ---------------------------------------------------------------------------
@@ -882,6 +907,37 @@ class TestAuthorization:
             apply_event(slug, outsider.slug, StartRoomEvent(), 0, {keeper.slug})
         assert exc_info.value.code == ErrorCode.NOT_IN_ROOM
 
+    def test_attendee_checked_from_room_row(self):
+        keeper, user1 = UserFactory(), UserFactory()
+        _, slug = _setup_room(keeper, [keeper, user1])
+        apply_event(slug, keeper.slug, StartRoomEvent(), 0, {keeper.slug, user1.slug})
+
+        with CaptureQueriesContext(connection) as queries:
+            apply_event(slug, keeper.slug, PassStickEvent(), 1, {keeper.slug, user1.slug})
+
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        assert "spaces_session_attendees" not in sql
+
+    def test_room_attendees_follow_session_attendees(self):
+        keeper, user1, user2 = UserFactory(), UserFactory(), UserFactory()
+        room, slug = _setup_room(keeper, [keeper, user1])
+        session = room.session
+        assert room.attendees == sorted([keeper.slug, user1.slug])
+
+        session.attendees.add(user2)
+        user1.sessions_attending.remove(session)
+        room.refresh_from_db()
+        assert room.attendees == sorted([keeper.slug, user2.slug])
+
+        with pytest.raises(TransitionError) as exc_info:
+            apply_event(slug, user1.slug, StartRoomEvent(), 0, {keeper.slug})
+        assert exc_info.value.code == ErrorCode.NOT_IN_ROOM
+
+        user2.sessions_attending.clear()
+        session.attendees.clear()
+        room.refresh_from_db()
+        assert room.attendees == []
+
     def test_room_not_found(self):
         keeper = UserFactory()
         with pytest.raises(TransitionError) as exc_info:
@@ -961,3 +1017,94 @@ class TestEventLog:
         assert log.event_type == "start_room"
         assert log.actor == keeper.slug
         assert log.version == 1
+
+
+# ---------------------------------------------------------------------------
+# Optimistic concurrency
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.django_db
+class TestOptimisticWrite:
+    def test_writes_changed_columns_without_row_lock(self):
+        keeper, user1 = UserFactory(), UserFactory()
+        _, slug = _setup_room(keeper, [keeper, user1])
+        connected = {keeper.slug, user1.slug}
+        state = apply_event(slug, keeper.slug, StartRoomEvent(), 0, connected)
+
+        with CaptureQueriesContext(connection) as ctx:
+            apply_event(slug, keeper.slug, PassStickEvent(), state.version, connected)
+
+        sqls = [query["sql"] for query in ctx.captured_queries]
+        assert not any("FOR UPDATE" in sql for sql in sqls)
+        (update,) = [sql for sql in sqls if sql.startswith('UPDATE "rooms_room"')]
+        assert '"turn_state"' in update
+        assert '"talking_order"' not in update
+        assert '"state_version" = 1' in update.split("WHERE")[1]
+
+    def test_conflicting_event_is_rechecked_under_lock(self):
+        keeper, user1 = UserFactory(), UserFactory()
+        _, slug = _setup_room(keeper, [keeper, user1])
+        connected = {keeper.slug, user1.slug}
+        state = apply_event(slug, keeper.slug, StartRoomEvent(), 0, connected)
+
+        def transition_after_competitor(*args):
+            # Another request passes the stick between our read and our write.
+            patcher.stop()
+            apply_event(slug, keeper.slug, PassStickEvent(), state.version, connected)
+            return transition(*args)
+
+        patcher = patch("totem.rooms.state_machine.transition", side_effect=transition_after_competitor)
+        patcher.start()
+        with pytest.raises(TransitionError) as exc_info:
+            apply_event(slug, keeper.slug, EndRoomEvent(reason=EndReason.KEEPER_ENDED), state.version, connected)
+
+        assert exc_info.value.code == ErrorCode.STALE_VERSION
+        room = Room.objects.for_session(slug).get()
+        assert room.state_version == state.version + 1
+        assert room.turn_state == TurnState.PASSING
+        assert list(room.events.values_list("event_type", flat=True)) == ["start_room", "pass_stick"]
+
+
+# ---------------------------------------------------------------------------
+# In-memory core: transition
+# ---------------------------------------------------------------------------
+
+
+class TestTransition:
+    def _state(self, **kwargs) -> RoomState:
+        return RoomState(
+            session_slug="session",
+            version=3,
+            status=RoomStatus.WAITING_ROOM,
+            turn_state=TurnState.IDLE,
+            status_detail=WaitingRoomDetail(),
+            talking_order=["keeper", "a", "b"],
+            keeper="keeper",
+            round_number=0,
+            **kwargs,
+        )
+
+    def test_runs_without_database_and_leaves_input_untouched(self):
+        state = self._state()
+
+        new = transition(state, "keeper", StartRoomEvent(), {"keeper", "a", "b"})
+
+        assert new.version == 4
+        assert new.status == RoomStatus.ACTIVE
+        assert new.status_detail == ActiveDetail()
+        assert (new.current_speaker, new.next_speaker) == ("keeper", "a")
+        assert state == self._state()
+
+    def test_end_sets_ended_detail(self):
+        state = self._state()
+
+        new = transition(state, "keeper", EndRoomEvent(reason=EndReason.KEEPER_ENDED), {"keeper"})
+
+        assert new.status_detail == EndedDetail(reason=EndReason.KEEPER_ENDED)
+
+    def test_invalid_transition_raises(self):
+        with pytest.raises(TransitionError) as exc_info:
+            transition(self._state(), "a", StartRoomEvent(), {"keeper", "a"})
+
+        assert exc_info.value.code == ErrorCode.NOT_KEEPER
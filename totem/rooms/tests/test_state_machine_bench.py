@@ -0,0 +1,287 @@
+"""
+Fuzzing and benchmarks for the room state machine.
+
+The fuzz harness drives transition() with a seeded random sequence of events,
+actors and connection changes and checks invariants after every accepted
+transition; a short run is part of the normal suite. The benchmarks are
+skipped unless TOTEM_BENCHMARKS=1 and print their numbers:
+
+    TOTEM_BENCHMARKS=1 pytest totem/rooms/tests/test_state_machine_bench.py
+"""
+
+import random
+import statistics
+import threading
+import time
+
+import pytest
+from django.db import connection
+
+from totem.rooms.models import Room
+from totem.rooms.schemas import (
+    AcceptStickEvent,
+    ActiveDetail,
+    BanParticipantEvent,
+    EndedDetail,
+    EndReason,
+    EndRoomEvent,
+    ErrorCode,
+    ForcePassStickEvent,
+    PassStickEvent,
+    ReorderEvent,
+    RoomEvent,
+    RoomState,
+    RoomStatus,
+    StartRoomEvent,
+    TransitionError,
+    TurnState,
+    UnbanParticipantEvent,
+    WaitingRoomDetail,
+)
+from totem.rooms.state_machine import apply_event, transition
+from totem.users.tests.factories import UserFactory
+
+from .test_state_machine import _setup_room
+
+KEEPER = "keeper"
+PARTICIPANTS = [KEEPER, *(f"user-{i}" for i in range(9))]
+
+
+def _initial_state() -> RoomState:
+    return RoomState(
+        session_slug="session",
+        version=0,
+        status=RoomStatus.WAITING_ROOM,
+        turn_state=TurnState.IDLE,
+        status_detail=WaitingRoomDetail(),
+        talking_order=list(PARTICIPANTS),
+        keeper=KEEPER,
+        round_number=0,
+    )
+
+
+def _random_step(rng: random.Random, state: RoomState, connected: set[str]) -> tuple[str, RoomEvent, set[str]]:
+    """A plausible (actor, event, connected) triple: mostly stick passing, sometimes churn and keeper actions."""
+    if rng.random() < 0.1:
+        connected = connected ^ {rng.choice(PARTICIPANTS[1:])}
+    roll = rng.random()
+    if roll < 0.35:
+        return state.current_speaker or KEEPER, PassStickEvent(), connected
+    if roll < 0.7:
+        return state.next_speaker or KEEPER, AcceptStickEvent(), connected
+    keeper_events: list[RoomEvent] = [
+        StartRoomEvent(),
+        ForcePassStickEvent(),
+        PassStickEvent(prompt="round prompt"),
+        ReorderEvent(talking_order=rng.sample(state.talking_order, len(state.talking_order))),
+        BanParticipantEvent(participant_slug=rng.choice(PARTICIPANTS[1:])),
+        UnbanParticipantEvent(participant_slug=rng.choice(PARTICIPANTS[1:])),
+    ]
+    if rng.random() < 0.01:
+        keeper_events.append(EndRoomEvent(reason=EndReason.KEEPER_ENDED))
+    return rng.choice([KEEPER, *PARTICIPANTS[1:]]), rng.choice(keeper_events), connected
+
+
+def _check_invariants(before: RoomState, after: RoomState) -> None:
+    assert after.version == before.version + 1
+    assert len(after.talking_order) == len(set(after.talking_order))
+    assert not set(after.banned_participants) & set(after.talking_order)
+    match after.status:
+        case RoomStatus.WAITING_ROOM:
+            assert isinstance(after.status_detail, WaitingRoomDetail)
+        case RoomStatus.ACTIVE:
+            assert isinstance(after.status_detail, ActiveDetail)
+            assert after.turn_state != TurnState.IDLE
+        case RoomStatus.ENDED:
+            assert isinstance(after.status_detail, EndedDetail)
+            assert after.turn_state == TurnState.IDLE
+            assert after.current_speaker is None and after.next_speaker is None
+
+
+def fuzz(seed: int, steps: int) -> tuple[int, int]:
+    """Run `steps` random events from a fresh room. Returns (accepted, rejected)."""
+    rng = random.Random(seed)
+    state = _initial_state()
+    connected = set(PARTICIPANTS)
+    accepted = rejected = 0
+    for _ in range(steps):
+        actor, event, connected = _random_step(rng, state, connected)
+        # Banned participants are removed from LiveKit and can't rejoin, so they're never connected.
+        present = (connected | {KEEPER}) - set(state.banned_participants)
+        try:
+            new = transition(state, actor, event, present)
+        except TransitionError:
+            rejected += 1
+            continue
+        _check_invariants(state, new)
+        state = new
+        accepted += 1
+        if state.status == RoomStatus.ENDED:
+            state = _initial_state()
+    return accepted, rejected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_fuzz_keeps_invariants(seed: int):
+    accepted, _ = fuzz(seed, steps=500)
+
+    assert accepted > 0
+
+
+@pytest.mark.benchmark
+def test_benchmark_transition_throughput(benchmark_report):
+    steps = 50_000
+    started = time.perf_counter()
+    accepted, rejected = fuzz(seed=0, steps=steps)
+    elapsed = time.perf_counter() - started
+
+    benchmark_report(
+        "transition (in memory)",
+        steps=steps,
+        accepted=accepted,
+        rejected=rejected,
+        steps_per_s=steps / elapsed,
+    )
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def _participant(
+    slug: str, actor: str, connected: set[str], deadline: float, stats: dict[str, list], eager: bool = False
+) -> None:
+    """
+    Keep taking and passing the stick in `slug` until `deadline`, like a client
+    reacting to state. An `eager` participant doesn't wait for their turn and
+    fires at every version they see, so most of their events conflict.
+    """
+    locked_at: list[float] = []
+
+    def time_lock(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        # The room row is locked from SELECT ... FOR UPDATE or the UPDATE, whichever comes first.
+        if "FOR UPDATE" in sql or sql.startswith('UPDATE "rooms_room"'):
+            locked_at.append(time.perf_counter())
+        return result
+
+    try:
+        with connection.execute_wrapper(time_lock):
+            while time.perf_counter() < deadline:
+                room = Room.objects.for_session(slug).get()
+                if room.turn_state == TurnState.SPEAKING and (eager or actor == room.current_speaker):
+                    event: RoomEvent = PassStickEvent()
+                elif room.turn_state == TurnState.PASSING and (eager or actor == room.next_speaker):
+                    event = AcceptStickEvent()
+                else:
+                    time.sleep(0.005)
+                    continue
+                locked_at.clear()
+                started = time.perf_counter()
+                try:
+                    apply_event(slug, actor, event, room.state_version, connected)
+                except TransitionError as e:
+                    stats["stale" if e.code == ErrorCode.STALE_VERSION else "rejected"].append(1)
+                    stats["attempt_latency"].append(time.perf_counter() - started)
+                    continue
+                finished = time.perf_counter()
+                stats["latency"].append(finished - started)
+                stats["attempt_latency"].append(finished - started)
+                if locked_at:
+                    stats["lock_hold"].append(finished - locked_at[0])
+    finally:
+        connection.close()
+
+
+def _run_participants(rooms: int, participants: int, duration: float, eager: bool) -> dict[str, list]:
+    stats: dict[str, list] = {"latency": [], "attempt_latency": [], "lock_hold": [], "stale": [], "rejected": []}
+    setups = []
+    for _ in range(rooms):
+        users = [UserFactory() for _ in range(participants)]
+        _, slug = _setup_room(users[0], users)
+        connected = {user.slug for user in users}
+        apply_event(slug, users[0].slug, StartRoomEvent(), 0, connected)
+        setups += [(slug, user.slug, connected) for user in users]
+
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=_participant, args=(*setup, deadline, stats, eager)) for setup in setups]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("rooms,participants", [(1, 10), (8, 10)])
+def test_benchmark_apply_event_under_concurrency(benchmark_report, rooms: int, participants: int):
+    duration = 5.0
+    stats = _run_participants(rooms, participants, duration, eager=False)
+
+    latency, lock_hold = stats["latency"], stats["lock_hold"]
+    benchmark_report(
+        f"apply_event ({rooms} rooms x {participants} participants)",
+        transitions_per_s=len(latency) / duration,
+        stale=len(stats["stale"]),
+        rejected=len(stats["rejected"]),
+        latency_p50_ms=statistics.median(latency) * 1000,
+        latency_p95_ms=_percentile(latency, 0.95) * 1000,
+        latency_p99_ms=_percentile(latency, 0.99) * 1000,
+        lock_hold_p50_ms=statistics.median(lock_hold) * 1000,
+        lock_hold_p95_ms=_percentile(lock_hold, 0.95) * 1000,
+    )
+    assert latency
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_apply_event_contention(benchmark_report):
+    """Everyone in the room fires at every version, like several people tapping accept at once."""
+    duration = 5.0
+    stats = _run_participants(rooms=1, participants=10, duration=duration, eager=True)
+
+    attempts = stats["attempt_latency"]
+    benchmark_report(
+        "apply_event contention (1 room x 10 eager participants)",
+        transitions_per_s=len(stats["latency"]) / duration,
+        attempts=len(attempts),
+        stale=len(stats["stale"]),
+        rejected=len(stats["rejected"]),
+        attempt_p50_ms=statistics.median(attempts) * 1000,
+        attempt_p99_ms=_percentile(attempts, 0.99) * 1000,
+        lock_hold_p99_ms=_percentile(stats["lock_hold"], 0.99) * 1000,
+    )
+    assert stats["latency"]
+
+
+@pytest.mark.benchmark
+def test_benchmark_transition_cost_by_room_size(benchmark_report):
+    """
+    Passing and accepting the stick in a webinar of 1000 should cost close to
+    a circle of 10. What's left that grows is building the talking order index
+    and diffing `connected` against it, one C-level pass over the inputs.
+    """
+    per_event: dict[int, float] = {}
+    for size in (10, 100, 1000):
+        slugs = [KEEPER, *(f"user-{i}" for i in range(size - 1))]
+        connected = set(slugs)
+        state = transition(
+            _initial_state().model_copy(update={"talking_order": slugs}), KEEPER, StartRoomEvent(), connected
+        )
+        steps = 5_000
+        for _ in range(100):  # warm up
+            state = transition(state, state.current_speaker or KEEPER, PassStickEvent(), connected)
+            state = transition(state, state.next_speaker or KEEPER, AcceptStickEvent(), connected)
+        started = time.perf_counter()
+        for _ in range(steps // 2):
+            state = transition(state, state.current_speaker or KEEPER, PassStickEvent(), connected)
+            state = transition(state, state.next_speaker or KEEPER, AcceptStickEvent(), connected)
+        per_event[size] = (time.perf_counter() - started) / steps
+        benchmark_report(f"transition pass/accept ({size} participants)", us_per_event=per_event[size] * 1e6)
+
+    # 100x the participants; the old list scans were quadratic here.
+    assert per_event[1000] < per_event[10] * 20
@@ -0,0 +1,221 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from config.websocket import websocket_application
+from totem.api.auth import generate_jwt_token
+from totem.rooms import state_cache
+from totem.rooms.models import Room
+from totem.rooms.stream import CLOSE_FORBIDDEN, CLOSE_UNAUTHORIZED, StateHub, _conninfo, _state, notify_state
+from totem.spaces.tests.factories import SessionFactory
+from totem.users.tests.factories import UserFactory
+
+
+def _payload(session_slug: str, version: int) -> str:
+    return json.dumps({"session_slug": session_slug, "version": version})
+
+
+def _socket(path: str, events: list[dict], query_string: bytes = b"") -> list[dict]:
+    """Run the websocket app with `events` as the client's messages; returns what the server sent."""
+    sent: list[dict] = []
+
+    async def run():
+        inbound: asyncio.Queue[dict] = asyncio.Queue()
+        for event in events:
+            inbound.put_nowait(event)
+
+        async def send(message):
+            sent.append(message)
+            await asyncio.sleep(0)
+
+        scope = {"type": "websocket", "path": path, "query_string": query_string, "headers": []}
+        await asyncio.wait_for(websocket_application(scope, inbound.get, send), timeout=5)
+
+    async_to_sync(run)()
+    return sent
+
+
+CONNECT = {"type": "websocket.connect"}
+PING = {"type": "websocket.receive", "text": "ping"}
+DISCONNECT = {"type": "websocket.disconnect", "code": 1000}
+
+
+@pytest.mark.enable_socket
+class TestStateHub:
+    def test_dispatches_to_subscribers_of_the_room(self):
+        async def run():
+            hub = StateHub()
+            with patch.object(StateHub, "_listen", new=AsyncMock()):
+                mine = hub.subscribe("room-1")
+                other = hub.subscribe("room-2")
+            hub.dispatch(_payload("room-1", 1))
+            return mine.qsize(), other.qsize()
+
+        assert async_to_sync(run)() == (1, 0)
+
+    def test_slow_subscriber_drops_oldest_state(self):
+        async def run():
+            hub = StateHub()
+            with patch.object(StateHub, "_listen", new=AsyncMock()), patch("totem.rooms.stream.SUBSCRIBER_BUFFER", 2):
+                queue = hub.subscribe("room-1")
+            for version in range(1, 4):
+                hub.dispatch(_payload("room-1", version))
+            return [json.loads(queue.get_nowait())["version"] for _ in range(queue.qsize())]
+
+        assert async_to_sync(run)() == [2, 3]
+
+    def test_unsubscribe_stops_delivery(self):
+        async def run():
+            hub = StateHub()
+            with patch.object(StateHub, "_listen", new=AsyncMock()):
+                queue = hub.subscribe("room-1")
+            hub.unsubscribe("room-1", queue)
+            hub.dispatch(_payload("room-1", 1))
+            return queue.qsize()
+
+        assert async_to_sync(run)() == 0
+
+
+@pytest.mark.enable_socket
+@pytest.mark.django_db(transaction=True)
+def test_notify_is_delivered_to_listener_on_commit():
+    session = SessionFactory()
+    room = Room.objects.get_or_create_for_session(session)
+    state = room.to_state()
+
+    async def run():
+        hub = StateHub()
+        queue = hub.subscribe(session.slug)
+        # The listener connects in the background; notify until it's listening.
+        for _ in range(50):
+            await sync_to_async(notify_state)(state)
+            try:
+                await asyncio.wait_for(queue.get(), timeout=0.1)
+                break
+            except TimeoutError:
+                pass
+        else:
+            pytest.fail("listener never received a notification")
+        while not queue.empty():
+            queue.get_nowait()
+
+        atomic = transaction.atomic()
+        await sync_to_async(atomic.__enter__)()
+        await sync_to_async(notify_state)(state)
+        await asyncio.sleep(0.3)
+        before_commit = queue.qsize()
+        await sync_to_async(atomic.__exit__)(None, None, None)
+        received = await asyncio.wait_for(queue.get(), timeout=5)
+        hub._listener.cancel()
+        return before_commit, json.loads(received)
+
+    before_commit, received = async_to_sync(run)()
+
+    assert before_commit == 0
+    assert received["session_slug"] == session.slug
+    assert received["version"] == state.version
+
+
+@pytest.mark.django_db
+def test_notify_carries_only_the_version():
+    session = SessionFactory()
+    room = Room.objects.get_or_create_for_session(session)
+    room.round_message = "x" * 10_000
+    room.save()
+
+    # Postgres rejects payloads of 8000 bytes or more; the state body would be.
+    with CaptureQueriesContext(connection) as queries:
+        notify_state(room.to_state())
+
+    assert "xxx" not in queries[0]["sql"]
+
+
+@pytest.mark.django_db
+def test_state_reads_the_database_when_the_cache_is_behind():
+    session = SessionFactory()
+    room = Room.objects.get_or_create_for_session(session)
+    state_cache.set_state(room.to_state())
+    Room.objects.filter(pk=room.pk).update(state_version=room.state_version + 1, round_message="next")
+
+    assert _state(session.slug, room.state_version)[0] == room.state_version
+    version, body = _state(session.slug, room.state_version + 1)
+
+    assert version == room.state_version + 1
+    assert json.loads(body)["round_message"] == "next"
+
+
+def test_listener_connects_with_the_database_options():
+    options = {"sslmode": "require", "isolation_level": 1}
+    with patch.dict(settings.DATABASES["default"], {"OPTIONS": options}):
+        conninfo = _conninfo()
+
+    assert "sslmode=require" in conninfo
+    assert "isolation_level" not in conninfo
+
+
+@pytest.mark.enable_socket
+# The socket closes stale connections, which would end a test's own transaction.
+@pytest.mark.django_db(transaction=True)
+@patch.object(StateHub, "_listen", new=AsyncMock())
+class TestRoomStateSocket:
+    def test_rejects_missing_token(self):
+        session = SessionFactory()
+        Room.objects.get_or_create_for_session(session)
+
+        sent = _socket(f"/ws/rooms/{session.slug}/", [CONNECT])
+
+        assert sent == [{"type": "websocket.close", "code": CLOSE_UNAUTHORIZED}]
+
+    def test_rejects_non_attendee(self):
+        user = UserFactory()
+        session = SessionFactory()
+        Room.objects.get_or_create_for_session(session)
+
+        sent = _socket(
+            f"/ws/rooms/{session.slug}/", [CONNECT], query_string=f"token={generate_jwt_token(user)}".encode()
+        )
+
+        assert sent == [{"type": "websocket.close", "code": CLOSE_FORBIDDEN}]
+
+    def test_sends_current_state_then_answers_ping(self):
+        user = UserFactory()
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+
+        sent = _socket(
+            f"/ws/rooms/{session.slug}/",
+            [CONNECT, PING, DISCONNECT],
+            query_string=f"token={generate_jwt_token(user)}".encode(),
+        )
+
+        assert sent[0] == {"type": "websocket.accept"}
+        assert json.loads(sent[1]["text"])["session_slug"] == session.slug
+        assert sent[2] == {"type": "websocket.send", "text": "pong!"}
+
+    def test_closes_stale_connections_around_database_work(self):
+        user = UserFactory()
+        session = SessionFactory(space__author=user)
+        session.attendees.add(user)
+        Room.objects.get_or_create_for_session(session)
+
+        with patch("totem.rooms.stream.close_old_connections") as close:
+            _socket(
+                f"/ws/rooms/{session.slug}/",
+                [CONNECT, DISCONNECT],
+                query_string=f"token={generate_jwt_token(user)}".encode(),
+            )
+
+        # Before and after authenticating, and reading the current state.
+        assert close.call_count == 4
+
+    def test_other_paths_keep_ping_pong(self):
+        sent = _socket("/ws/", [CONNECT, PING, DISCONNECT])
+
+        assert sent == [{"type": "websocket.accept"}, {"type": "websocket.send", "text": "pong!"}]
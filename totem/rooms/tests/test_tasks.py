@@ -3,13 +3,23 @@ from unittest.mock import patch
 
 import pytest
 from django.utils import timezone
+from livekit import api
 
+from totem.rooms.livekit import LiveKitConfigurationError
 from totem.rooms.models import Room
 from totem.rooms.schemas import EndReason, RoomStatus, TurnState
-from totem.rooms.tasks import end_sessions_without_keeper
+from totem.rooms.tasks import PREWARM_AHEAD, end_sessions_without_keeper, prewarm_rooms
+from totem.spaces.models import Space
 from totem.spaces.tests.factories import SessionFactory, SpaceFactory
 from totem.users.tests.factories import UserFactory
 
+LIVEKIT = Space.MeetingProviderChoices.LIVEKIT
+
+
+def _presence(connected):
+    """Stand-in for get_connected_participants_by_room reporting the same presence for every room."""
+    return lambda room_names: dict.fromkeys(room_names, connected)
+
 
 def _make_active_session_without_keeper():
     """Create a session that started 10 min ago with a keeper who hasn't joined."""
@@ -30,8 +40,8 @@ class TestEndSessions:
 
         with (
             patch(
-                "totem.rooms.tasks.get_connected_participants",
-                return_value=set(session.joined.values_list("slug", flat=True)),
+                "totem.rooms.tasks.get_connected_participants_by_room",
+                side_effect=_presence(set(session.joined.values_list("slug", flat=True))),
             ),
             patch("totem.rooms.tasks.publish_state"),
         ):
@@ -53,8 +63,8 @@ class TestEndSessions:
 
         with (
             patch(
-                "totem.rooms.tasks.get_connected_participants",
-                return_value=set(session.joined.values_list("slug", flat=True)),
+                "totem.rooms.tasks.get_connected_participants_by_room",
+                side_effect=_presence(set(session.joined.values_list("slug", flat=True))),
             ),
             patch("totem.rooms.tasks.publish_state"),
         ):
@@ -74,8 +84,8 @@ class TestEndSessions:
 
         with (
             patch(
-                "totem.rooms.tasks.get_connected_participants",
-                return_value=set(session.joined.values_list("slug", flat=True)),
+                "totem.rooms.tasks.get_connected_participants_by_room",
+                side_effect=_presence(set(session.joined.values_list("slug", flat=True))),
             ),
             patch("totem.rooms.tasks.publish_state") as mock_publish,
         ):
@@ -92,8 +102,8 @@ class TestEndSessions:
 
         with (
             patch(
-                "totem.rooms.tasks.get_connected_participants",
-                return_value=set(session.joined.values_list("slug", flat=True)),
+                "totem.rooms.tasks.get_connected_participants_by_room",
+                side_effect=_presence(set(session.joined.values_list("slug", flat=True))),
             ),
             patch("totem.rooms.tasks.publish_state"),
         ):
@@ -111,8 +121,8 @@ class TestEndSessions:
 
         with (
             patch(
-                "totem.rooms.tasks.get_connected_participants",
-                return_value=set(session.joined.values_list("slug", flat=True)),
+                "totem.rooms.tasks.get_connected_participants_by_room",
+                side_effect=_presence(set(session.joined.values_list("slug", flat=True))),
             ),
             patch("totem.rooms.tasks.publish_state") as mock_publish,
         ):
@@ -138,7 +148,7 @@ class TestEndSessions:
                 raise Exception("LiveKit down")
 
         with (
-            patch("totem.rooms.tasks.get_connected_participants", return_value=set()),
+            patch("totem.rooms.tasks.get_connected_participants_by_room", side_effect=_presence(set())),
             patch("totem.rooms.tasks.publish_state", side_effect=flaky_publish),
         ):
             count = end_sessions_without_keeper()
@@ -151,7 +161,7 @@ class TestEndSessions:
         room = Room.objects.get_or_create_for_session(session)
 
         with (
-            patch("totem.rooms.tasks.get_connected_participants", return_value=set()),
+            patch("totem.rooms.tasks.get_connected_participants_by_room", side_effect=_presence(set())),
             patch("totem.rooms.tasks.publish_state") as mock_publish,
         ):
             count = end_sessions_without_keeper()
@@ -170,7 +180,7 @@ class TestEndSessions:
         room = Room.objects.get_or_create_for_session(session)
 
         with (
-            patch("totem.rooms.tasks.get_connected_participants", return_value=None),
+            patch("totem.rooms.tasks.get_connected_participants_by_room", side_effect=_presence(None)),
             patch("totem.rooms.tasks.publish_state") as mock_publish,
         ):
             count = end_sessions_without_keeper()
@@ -181,3 +191,81 @@ class TestEndSessions:
         room.refresh_from_db()
         assert room.status != RoomStatus.ENDED
         mock_publish.assert_not_called()
+
+    def test_fetches_presence_for_all_sessions_in_one_batch(self):
+        session1, _ = _make_active_session_without_keeper()
+        session2, keeper2 = _make_active_session_without_keeper()
+
+        with (
+            patch(
+                "totem.rooms.tasks.get_connected_participants_by_room",
+                return_value={session1.slug: None, session2.slug: {keeper2.slug}},
+            ) as mock_presence,
+            patch("totem.rooms.tasks.publish_state"),
+        ):
+            count = end_sessions_without_keeper()
+
+        mock_presence.assert_called_once()
+        assert set(mock_presence.call_args[0][0]) == {session1.slug, session2.slug}
+        assert count == 0
+
+
+@pytest.mark.django_db
+class TestPrewarmRooms:
+    def test_creates_rooms_for_sessions_starting_soon(self):
+        keeper, attendee = UserFactory(), UserFactory()
+        soon = SessionFactory(
+            space__author=keeper, start=timezone.now() + timedelta(minutes=20), space__meeting_provider=LIVEKIT
+        )
+        soon.attendees.add(keeper, attendee)
+        later = SessionFactory(
+            start=timezone.now() + PREWARM_AHEAD + timedelta(minutes=10), space__meeting_provider=LIVEKIT
+        )
+        cancelled = SessionFactory(
+            start=timezone.now() + timedelta(minutes=20), cancelled=True, space__meeting_provider=LIVEKIT
+        )
+
+        with patch("totem.rooms.tasks.create_rooms"):
+            assert prewarm_rooms() == 1
+
+        room = Room.objects.get(session=soon)
+        assert room.keeper == keeper.slug
+        assert sorted(room.talking_order) == sorted([keeper.slug, attendee.slug])
+        assert room.attendees == sorted([keeper.slug, attendee.slug])
+        assert not Room.objects.filter(session__in=[later, cancelled]).exists()
+
+    def test_skips_sessions_not_on_livekit(self):
+        start = timezone.now() + timedelta(minutes=20)
+        livekit = SessionFactory(start=start, space__meeting_provider=LIVEKIT)
+        google_meet = SessionFactory(start=start, space__meeting_provider=Space.MeetingProviderChoices.GOOGLE_MEET)
+
+        with patch("totem.rooms.tasks.create_rooms") as mock_create:
+            assert prewarm_rooms() == 1
+
+        mock_create.assert_called_once_with([livekit.slug])
+        assert not Room.objects.filter(session=google_meet).exists()
+
+    def test_existing_rooms_are_left_alone(self):
+        session = SessionFactory(start=timezone.now() + timedelta(minutes=20), space__meeting_provider=LIVEKIT)
+        room = Room.objects.get_or_create_for_session(session)
+
+        with patch("totem.rooms.tasks.create_rooms") as mock_create:
+            assert prewarm_rooms() == 0
+
+        mock_create.assert_called_once_with([])
+        assert Room.objects.get(session=session).pk == room.pk
+
+    def test_livekit_not_configured_still_creates_rooms(self):
+        SessionFactory(start=timezone.now() + timedelta(minutes=20), space__meeting_provider=LIVEKIT)
+
+        with patch("totem.rooms.tasks.create_rooms", side_effect=LiveKitConfigurationError):
+            assert prewarm_rooms() == 1
+
+    @pytest.mark.parametrize("error", [TimeoutError(), api.TwirpError(code="500", status=1, msg="unavailable")])
+    def test_livekit_failure_still_creates_rooms(self, error):
+        session = SessionFactory(start=timezone.now() + timedelta(minutes=20), space__meeting_provider=LIVEKIT)
+
+        with patch("totem.rooms.tasks.create_rooms", side_effect=error):
+            assert prewarm_rooms() == 1
+
+        assert Room.objects.filter(session=session).exists()
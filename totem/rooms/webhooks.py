@@ -0,0 +1,48 @@
+"""
+LiveKit webhook receiver.
+
+LiveKit POSTs room and participant events here, signed with our API secret.
+We only use them to keep the presence cache (presence.py) current.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from livekit import api
+
+from . import presence
+
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@require_POST
+def livekit_webhook(request: HttpRequest) -> HttpResponse:
+    if not settings.LIVEKIT_API_KEY or not settings.LIVEKIT_API_SECRET:
+        return HttpResponse(status=503)
+
+    receiver = api.WebhookReceiver(api.TokenVerifier(settings.LIVEKIT_API_KEY, settings.LIVEKIT_API_SECRET))
+    try:
+        event = receiver.receive(request.body.decode(), request.headers.get("Authorization", ""))
+    except Exception:
+        logger.warning("Rejected LiveKit webhook", exc_info=True)
+        return HttpResponse(status=401)
+
+    room_name = event.room.name
+    at = presence.event_time(event.created_at)
+    match event.event:
+        case "room_started":
+            presence.record_snapshot(room_name, set(), at)
+        case "participant_joined":
+            presence.participant_joined(room_name, event.participant.identity, at)
+        case "participant_left":
+            presence.participant_left(room_name, event.participant.identity, at)
+        case "room_finished":
+            presence.room_finished(room_name, at)
+
+    return HttpResponse(status=200)
@@ -1,20 +1,22 @@
 from datetime import datetime
+from typing import cast
 
 from django.http import HttpRequest
 from django.shortcuts import get_object_or_404
 from ninja import Field, FilterSchema, Router, Schema
-from ninja.pagination import paginate
 from ninja.params.functions import Query
 
+from totem.api.pagination import KeysetInput, paginate_queryset
 from totem.spaces.schemas import (
     FilterOptionsSchema,
+    PagedSessionListSchema,
     SessionDetailSchema,
-    SessionListSchema,
     SessionsFilterSchema,
     SpaceDetailSchema,
 )
 from totem.users.models import User
 
+from . import catalog
 from .filters import (
     all_upcoming_recommended_sessions,
     get_upcoming_sessions_for_spaces_list,
@@ -27,10 +29,10 @@ from .models import Session, Space
 router = Router()
 
 
-@router.get("/", response={200: list[SessionListSchema]}, tags=["events"], url_name="events_list")
-@paginate
-def list_events(request, filters: SessionsFilterSchema = Query()):
-    return all_upcoming_recommended_sessions(request.user, category=filters.category, author=filters.author)
+@router.get("/", response={200: PagedSessionListSchema}, tags=["events"], url_name="events_list")
+def list_events(request, filters: SessionsFilterSchema = Query(), pagination: KeysetInput = Query()):
+    sessions = all_upcoming_recommended_sessions(request.user, category=filters.category, author=filters.author)
+    return paginate_queryset(sessions, pagination)
 
 
 @router.get(
@@ -40,12 +42,22 @@ def list_events(request, filters: SessionsFilterSchema = Query()):
     url_name="events_filter_options",
 )
 def filter_options(request):
-    events = all_upcoming_recommended_sessions(request.user)
-    # get distinct categories that have events
-    categories = set(events.values_list("space__categories__name", "space__categories__slug").distinct())
+    if request.user.is_staff:
+        events = all_upcoming_recommended_sessions(request.user)
+        # get distinct categories that have events
+        categories = set(events.values_list("space__categories__name", "space__categories__slug").distinct())
+        # get distinct authors that have events
+        authors = set(events.values_list("space__author__name", "space__author__slug").distinct())
+    else:
+        # The same sessions as all_upcoming_recommended_sessions, from the shared catalog snapshot.
+        events = [
+            event
+            for event in catalog.upcoming_sessions()
+            if not event.cancelled and event.listed and cast(catalog.ListedSession, event).attendee_count < event.seats
+        ]
+        categories = {(c.name, c.slug) for event in events for c in event.space.categories.all()}
+        authors = {(event.space.author.name, event.space.author.slug) for event in events}
     categories = [{"name": name, "slug": slug} for name, slug in categories if name]
-    # get distinct authors that have events
-    authors = set(events.values_list("space__author__name", "space__author__slug").distinct())
     authors = [{"name": name, "slug": slug} for name, slug in authors if name]
     return {"categories": categories, "authors": authors}
 
@@ -0,0 +1,161 @@
+"""
+The public upcoming catalog, shared by the listing endpoints.
+
+The web and mobile space lists, the recommendations, the filter options and
+the mobile summary all show the same public data: the sessions that haven't
+ended in published spaces, with their spaces, authors, categories and counts.
+It's loaded once into a snapshot that every request in the process reads;
+endpoints filter it and add the viewer's own bits (ViewerContext) on top.
+
+The snapshot is tagged with a version token kept in the cache. Saving or
+deleting a session, space or category, and changing attendees, who joined,
+subscribers or categories, replaces the token (see signals.py), and the next
+read rebuilds. With the LocMemCache we run in production the token only
+reaches this process, so changes made elsewhere (the cron tasks, the shell)
+show up within CATALOG_TTL; a shared cache backend makes invalidation reach
+every process with no other change. Writes that skip signals, like
+QuerySet.update(), and edits to an author's profile (users are saved on
+every login, which would rebuild all the time) are also only picked up by
+the TTL.
+
+Snapshot instances are shared between requests and threads: treat them as
+read-only.
+"""
+
+from __future__ import annotations
+
+import datetime
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Protocol, cast
+
+from django.core.cache import cache
+from django.db.models import Count, DateTimeField, ExpressionWrapper, F, Prefetch, QuerySet
+from django.utils import timezone
+
+from totem.users.models import User
+
+from .models import Session, Space
+
+CATALOG_TTL = 60  # seconds
+_VERSION_KEY = "spaces:catalog:version"
+
+
+class ListedSession(Protocol):
+    """What load() and the listing querysets annotate a Session with."""
+
+    attendee_count: int
+
+
+class ListedSpace(Protocol):
+    """What load() and the listing querysets set on a Space."""
+
+    subscriber_count: int
+    upcoming_sessions: list[Session]
+
+
+def end_time() -> ExpressionWrapper:
+    """Session.end() as a database expression, to filter on."""
+    return ExpressionWrapper(
+        F("start") + F("duration_minutes") * datetime.timedelta(minutes=1),
+        output_field=DateTimeField(),
+    )
+
+
+def authors() -> QuerySet[User]:
+    """Space authors with the circle count PublicUserSchema shows, counted in the same query."""
+    return cast("QuerySet[User]", User.objects.annotate(circle_count=Count("sessions_joined")))
+
+
+def load(sessions: QuerySet[Session]) -> list[Session]:
+    """
+    The sessions in `sessions` that haven't ended, by start, with what the
+    listings show: `attendee_count`, and their spaces with `subscriber_count`,
+    authors, categories and `upcoming_sessions`, the space's sessions among
+    these that haven't ended. Callers drop the ones that have started since.
+    """
+    loaded: list[Session] = list(
+        sessions.annotate(end_time=end_time(), attendee_count=Count("attendees"))
+        .filter(end_time__gt=timezone.now())
+        .prefetch_related(
+            Prefetch("space", queryset=Space.objects.annotate(subscriber_count=Count("subscribed"))),
+            Prefetch("space__author", queryset=authors()),
+            "space__categories",
+        )
+        .order_by("start", "pk")
+    )
+    for session in loaded:
+        space = cast(ListedSpace, session.space)
+        if not hasattr(space, "upcoming_sessions"):
+            space.upcoming_sessions = []
+        space.upcoming_sessions.append(session)
+    return loaded
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    version: str
+    expires: float  # time.monotonic()
+    sessions: tuple[Session, ...]
+
+
+_snapshot: _Snapshot | None = None
+_lock = threading.Lock()
+
+
+def _version() -> str:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # Evicted or never set: start a new version, or take the one another process just started.
+        cache.add(_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _current() -> _Snapshot:
+    global _snapshot
+    # Read the version before loading, so a change committed while we load leaves the snapshot stale.
+    version = _version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version and snapshot.expires > time.monotonic():
+        return snapshot
+    with _lock:
+        # Another thread may have rebuilt it while we waited.
+        snapshot = _snapshot
+        if snapshot is not None and snapshot.version == version and snapshot.expires > time.monotonic():
+            return snapshot
+        sessions = load(Session.objects.filter(space__published=True))
+        _snapshot = _Snapshot(version, time.monotonic() + CATALOG_TTL, tuple(sessions))
+        return _snapshot
+
+
+def invalidate() -> None:
+    """Make every process that shares the cache rebuild its snapshot on the next read."""
+    cache.set(_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def sessions() -> list[Session]:
+    """The sessions in published spaces that haven't ended, including ones in progress, by start."""
+    now = timezone.now()
+    return [session for session in _current().sessions if session.end() > now]
+
+
+def upcoming_sessions() -> list[Session]:
+    """The sessions in published spaces that haven't started, by start."""
+    now = timezone.now()
+    return [session for session in _current().sessions if session.start >= now]
+
+
+def spaces(sessions: list[Session] | None = None, now: datetime.datetime | None = None) -> list[Space]:
+    """
+    The spaces with a session that hasn't started by `now`, by the start of
+    the next one; of `sessions` if given.
+    """
+    now = now or timezone.now()
+    by_pk: dict[int, Space] = {}
+    for session in _current().sessions if sessions is None else sessions:
+        if session.start >= now:
+            by_pk.setdefault(session.space_id, session.space)
+    return list(by_pk.values())
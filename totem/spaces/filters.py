@@ -1,13 +1,14 @@
 import datetime
 
-from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models import Count, F, Prefetch, Q
 from django.urls import reverse
 from django.utils import timezone
 
 from totem.spaces.schemas import NextSessionSchema, SessionDetailSchema, SessionSpaceSchema, SpaceDetailSchema
 from totem.users.models import User
 
-from .models import Session, Space, SpaceCategory
+from . import catalog
+from .models import Session, Space
 
 
 def other_sessions_in_space(user: User | None, session: Session, limit: int = 10):
@@ -59,12 +60,13 @@ def all_upcoming_recommended_sessions(user: User | None, category: str | None =
 def upcoming_recommended_sessions(user: User | None, categories: list[str] | None = None, author: str | None = None):
     sessions = (
         Session.objects.filter(start__gte=timezone.now(), cancelled=False, listed=True)
-        .select_related("space")
-        .prefetch_related("space__author", "space__categories", "space__subscribed")
-        .annotate(
-            attendee_count=Count("attendees", distinct=True),
-            subscriber_count=Count("space__subscribed", distinct=True),
+        .prefetch_related(
+            # Counted per space, not joined into the session rows, which would multiply them by the subscribers.
+            Prefetch("space", queryset=Space.objects.annotate(subscriber_count=Count("subscribed"))),
+            "space__author",
+            "space__categories",
         )
+        .annotate(attendee_count=Count("attendees", distinct=True))
         .order_by("start")
     )
     if not user or not user.is_staff:
@@ -82,24 +84,14 @@ def upcoming_recommended_sessions(user: User | None, categories: list[str] | Non
     return sessions
 
 
-def get_upcoming_sessions_for_spaces_list():
+def get_upcoming_sessions_for_spaces_list() -> list[Session]:
     """Get all upcoming events for spaces listing, including spaces with full events.
 
     Specifically designed for the spaces list API endpoint.
     Does NOT filter by seat availability, ensuring all spaces with upcoming events are shown.
+    Read from the shared catalog snapshot, see totem.spaces.catalog.
     """
-    first_category_subquery = SpaceCategory.objects.filter(space=OuterRef("space_id")).values("name")[:1]
-    return (
-        Session.objects.filter(start__gte=timezone.now(), cancelled=False, listed=True, space__published=True)
-        .select_related("space")
-        .prefetch_related("space__author", "space__categories", "space__subscribed")
-        .annotate(
-            attendee_count=Count("attendees", distinct=True),
-            subscriber_count=Count("space__subscribed", distinct=True),
-            first_category=Subquery(first_category_subquery),
-        )
-        .order_by("start")
-    )
+    return [session for session in catalog.upcoming_sessions() if not session.cancelled and session.listed]
 
 
 def all_upcoming_recommended_spaces(user: User | None, category: str | None = None):
@@ -140,6 +132,12 @@ def upcoming_sessions_by_author(user: User, author: User, exclude_event: Session
     return upcoming_sessions
 
 
+def _subscriber_count(space: Space) -> int:
+    if hasattr(space, "subscriber_count"):
+        return space.subscriber_count
+    return space.subscribed.count()
+
+
 def session_detail_schema(session: Session, user: User):
     space: Space = session.space
     start = session.start
@@ -158,7 +156,7 @@ def session_detail_schema(session: Session, user: User):
         seats_left=session.seats_left(),
         duration=session.duration_minutes,
         recurring=space.recurring,
-        subscribers=space.subscribed.count(),
+        subscribers=_subscriber_count(space),
         start=start,
         attending=attending,
         open=session.open,
@@ -208,7 +206,7 @@ def space_detail_schema(space: Space, user: User, session: Session | None = None
         author=space.author,
         category=category_name,
         next_event=next_session_schema,
-        subscribers=space.subscribed.count(),
+        subscribers=_subscriber_count(space),
         price=space.price,
         recurring=space.recurring,
     )
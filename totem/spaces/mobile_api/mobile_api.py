@@ -1,24 +1,28 @@
-import datetime
+from functools import partial
 
 from django.db import transaction
-from django.db.models import Count, DateTimeField, ExpressionWrapper, F
+from django.db.models import Count
 from django.http import HttpRequest
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from ninja import Query, Router, Status
 from ninja.errors import AuthorizationError
-from ninja.pagination import paginate
 
+from totem.api.pagination import KeysetInput, paginate_list
 from totem.onboard.models import OnboardModel
 from totem.spaces.mobile_api.mobile_filters import (
+    Catalog,
+    ViewerContext,
     get_upcoming_spaces_list,
     session_detail_schema,
+    session_list_prefetches,
     space_detail_schema,
+    space_key,
     upcoming_recommended_sessions,
-    upcoming_recommended_spaces,
 )
 from totem.spaces.mobile_api.mobile_schemas import (
     MobileSpaceDetailSchema,
+    PagedMobileSpaceDetailSchema,
     SessionDetailSchema,
     SessionFeedbackSchema,
     SpaceSchema,
@@ -49,32 +53,34 @@ def list_subscriptions(request: HttpRequest):
     return Space.objects.filter(subscribed=request.user)
 
 
-@spaces_router.get("/", response={200: list[MobileSpaceDetailSchema]}, url_name="mobile_spaces_list")
-@paginate
-def list_spaces(request):
-    spaces = get_upcoming_spaces_list()
-    return [space_detail_schema(space, request.user) for space in spaces]
+@spaces_router.get("/", response={200: PagedMobileSpaceDetailSchema}, url_name="mobile_spaces_list")
+def list_spaces(request, pagination: KeysetInput = Query()):
+    now = timezone.now()
+    page = paginate_list(get_upcoming_spaces_list(now), pagination, key=partial(space_key, now=now))
+    ctx = ViewerContext.for_user(request.user)
+    return page.map(lambda space: space_detail_schema(space, ctx))
 
 
 @spaces_router.get("/space/{space_slug}", response={200: MobileSpaceDetailSchema}, url_name="spaces_detail")
 def get_space_detail(request: HttpRequest, space_slug: str):
     user: User = request.user  # type: ignore
     space = get_object_or_404(Space, slug=space_slug)
-    return space_detail_schema(space, user)
+    return space_detail_schema(space, ViewerContext.for_user(user))
 
 
 @spaces_router.get("/keeper/{slug}/", response={200: list[MobileSpaceDetailSchema]}, url_name="keeper_spaces")
 def get_keeper_spaces(request: HttpRequest, slug: str):
     user: User = request.user  # type: ignore
-    spaces = get_upcoming_spaces_list().filter(author__slug=slug)
-    return [space_detail_schema(space, user) for space in spaces]
+    spaces = [space for space in get_upcoming_spaces_list() if space.author.slug == slug]
+    ctx = ViewerContext.for_user(user)
+    return [space_detail_schema(space, ctx) for space in spaces]
 
 
 @spaces_router.get("/session/{event_slug}", response={200: SessionDetailSchema}, url_name="session_detail")
 def get_session_detail(request: HttpRequest, event_slug: str):
     user: User = request.user  # type: ignore
     session = get_object_or_404(Session, slug=event_slug)
-    return session_detail_schema(session, user)
+    return session_detail_schema(session, ViewerContext.for_user(user))
 
 
 @spaces_router.post("/session/{event_slug}/feedback", response={204: None}, url_name="session_feedback")
@@ -104,10 +110,16 @@ def post_session_feedback(request: HttpRequest, event_slug: str, payload: Sessio
 def get_sessions_history(request: HttpRequest):
     user: User = request.user  # type: ignore
 
-    session_history_query = user.sessions_joined.filter(space__published=True, cancelled=False).order_by("-start")
+    session_history_query = (
+        user.sessions_joined.filter(space__published=True, cancelled=False)
+        .prefetch_related(*session_list_prefetches())
+        .annotate(attendee_count=Count("attendees"))
+        .order_by("-start")
+    )
     session_history = session_history_query.all()[0:10]
 
-    sessions = [session_detail_schema(session, user) for session in session_history]
+    ctx = ViewerContext.for_user(user)
+    sessions = [session_detail_schema(session, ctx) for session in session_history]
 
     return sessions
 
@@ -118,7 +130,8 @@ def get_recommended_spaces(request: HttpRequest, limit: int = 3, categories: lis
 
     recommended_sessions = upcoming_recommended_sessions(user, categories=categories)[:limit]
 
-    sessions = [session_detail_schema(session, user) for session in recommended_sessions]
+    ctx = ViewerContext.for_user(user)
+    sessions = [session_detail_schema(session, ctx) for session in recommended_sessions]
     return sessions
 
 
@@ -130,26 +143,12 @@ def get_recommended_spaces(request: HttpRequest, limit: int = 3, categories: lis
 )
 def get_spaces_summary(request: HttpRequest):
     user: User = request.user  # type: ignore
-
-    spaces_qs = get_upcoming_spaces_list()
+    ctx = ViewerContext.for_user(user)
+    catalog = Catalog.load(ctx)
 
     # The upcoming events that the user is subscribed to
-    end_time_expression = ExpressionWrapper(
-        F("start") + F("duration_minutes") * datetime.timedelta(minutes=1),
-        output_field=DateTimeField(),
-    )
-    upcoming_sessions = (
-        Session.objects.annotate(end_time=end_time_expression)
-        .filter(attendees=user, cancelled=False, end_time__gt=timezone.now())
-        .select_related("space")
-        .prefetch_related("space__author", "space__categories", "attendees", "space__subscribed")
-        .annotate(
-            attendee_count=Count("attendees", distinct=True),
-            subscriber_count=Count("space__subscribed", distinct=True),
-        )
-        .order_by("start")
-    )
-    upcoming = [session_detail_schema(event, user) for event in upcoming_sessions]
+    upcoming_sessions = catalog.attending(ctx)
+    upcoming = [session_detail_schema(event, ctx) for event in upcoming_sessions]
     upcoming_space_slugs = {event.space.slug for event in upcoming_sessions}
 
     # The recommended spaces based on the user's onboarding.
@@ -164,16 +163,23 @@ def get_spaces_summary(request: HttpRequest):
     except OnboardModel.DoesNotExist:
         # If no onboard model, just use empty categories set
         pass
-    # Add categories from user's previously joined spaces (single query)
-    previous_category_names = spaces_qs.filter(subscribed=user).values_list("categories__name", flat=True).distinct()
-    categories_set.update(name for name in previous_category_names if name)
-    recommended_spaces = upcoming_recommended_spaces(user, categories=list(categories_set))
+    # Add categories from user's previously joined spaces
+    categories_set.update(catalog.category_names(ctx.subscribed))
+
+    # for_you and explore mostly list the same spaces; build each space's schema once.
+    space_schemas: dict[int, MobileSpaceDetailSchema] = {}
+
+    def space_schema(space: Space) -> MobileSpaceDetailSchema:
+        if space.pk not in space_schemas:
+            space_schemas[space.pk] = space_detail_schema(space, ctx)
+        return space_schemas[space.pk]
+
     for_you = [
-        space_detail_schema(space, user) for space in recommended_spaces if space.slug not in upcoming_space_slugs
+        space_schema(space)
+        for space in catalog.recommended(ctx, categories_set)
+        if space.slug not in upcoming_space_slugs
     ]
-
-    spaces = spaces_qs
-    explore = [space_detail_schema(space, user) for space in spaces if space.slug not in upcoming_space_slugs]
+    explore = [space_schema(space) for space in catalog.published() if space.slug not in upcoming_space_slugs]
 
     return SummarySpacesSchema(
         upcoming=upcoming,
@@ -197,7 +203,7 @@ def rsvp_confirm(request: HttpRequest, event_slug: str):
             event.space.subscribe(user)
     except SessionException as e:
         raise AuthorizationError(message=str(e))
-    return session_detail_schema(event, user)
+    return session_detail_schema(event, ViewerContext.for_user(user))
 
 
 @spaces_router.delete(
@@ -213,4 +219,4 @@ def rsvp_cancel(request: HttpRequest, event_slug: str):
         event.remove_attendee(user)
     except SessionException as e:
         raise AuthorizationError(message=str(e))
-    return session_detail_schema(event, user)
+    return session_detail_schema(event, ViewerContext.for_user(user))
@@ -1,7 +1,16 @@
-from django.db.models import Count, F, Prefetch, Q, QuerySet
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass, field
+from functools import partial
+from operator import attrgetter
+from typing import cast
+
+from django.db.models import Count, Prefetch, QuerySet
 from django.urls import reverse
 from django.utils import timezone
 
+from totem.spaces import catalog
 from totem.spaces.mobile_api.mobile_schemas import (
     MobileSpaceDetailSchema,
     NextSessionSchema,
@@ -9,167 +18,244 @@ from totem.spaces.mobile_api.mobile_schemas import (
 )
 from totem.spaces.models import Session, Space
 from totem.users.models import User
+from totem.utils.utils import full_url
 
 
-def get_upcoming_spaces_list() -> QuerySet[Space]:
-    """Get all published spaces with upcoming events."""
-    return (
-        Space.objects.filter(published=True, sessions__start__gte=timezone.now())
-        .distinct()
-        .select_related("author")
-        .prefetch_related(
-            "categories",
-            "subscribed",
-            Prefetch(
-                "sessions",
-                queryset=Session.objects.filter(start__gte=timezone.now())
-                .order_by("start")
-                .prefetch_related("attendees"),
-                to_attr="upcoming_sessions",
-            ),
-        )
-        .annotate(subscriber_count=Count("subscribed", distinct=True))
-    )
+def _upcoming_sessions(sessions: QuerySet[Session] | None = None) -> QuerySet[Session]:
+    sessions = Session.objects.all() if sessions is None else sessions
+    return sessions.filter(start__gte=timezone.now()).order_by("start").annotate(attendee_count=Count("attendees"))
 
 
-def upcoming_recommended_spaces(user: User | None, categories: list[str] | None = None, author: str | None = None):
-    spaces = (
-        Space.objects.filter(sessions__start__gte=timezone.now())
-        .distinct()
-        .select_related("author")
-        .prefetch_related(
-            "categories",
-            "subscribed",
-            Prefetch(
-                "sessions",
-                queryset=Session.objects.filter(start__gte=timezone.now())
-                .order_by("start")
-                .prefetch_related("attendees"),
-                to_attr="upcoming_sessions",
-            ),
-        )
-        .annotate(subscriber_count=Count("subscribed", distinct=True))
-    )
-    if not user or not user.is_staff:
-        spaces = spaces.filter(published=True)
-    if categories:
-        spaces = spaces.filter(Q(categories__slug__in=categories) | Q(categories__name__in=categories))
-    if author:
-        spaces = spaces.filter(author__slug=author)
-    return spaces
-
-
-def upcoming_recommended_sessions(user: User | None, categories: list[str] | None = None, author: str | None = None):
-    events = (
-        Session.objects.filter(start__gte=timezone.now(), cancelled=False, listed=True)
-        .select_related("space")
-        .prefetch_related(
-            "space__author",
-            "space__categories",
-            "space__subscribed",
-            Prefetch(
-                "space__sessions",
-                queryset=Session.objects.filter(start__gte=timezone.now())
-                .order_by("start")
-                .prefetch_related("attendees"),
-                to_attr="upcoming_sessions",
-            ),
+def session_list_prefetches() -> list[str | Prefetch]:
+    """What session_detail_schema reads from a listed session's space, fetched once for the whole list."""
+    return [
+        Prefetch("space", queryset=Space.objects.annotate(subscriber_count=Count("subscribed"))),
+        Prefetch("space__author", queryset=catalog.authors()),
+        "space__categories",
+        Prefetch("space__sessions", queryset=_upcoming_sessions(), to_attr="upcoming_sessions"),
+    ]
+
+
+def space_key(space: Space, now: datetime.datetime) -> tuple[datetime.datetime, int]:
+    """
+    (start of the next session, id), the order spaces are listed and paged in.
+    Needs `upcoming_sessions`.
+
+    The key depends on `now`: when a space's next session starts between two
+    page requests, the space moves to its following session and may be listed
+    again on a later page. Keys only move later, so no space is skipped.
+    """
+    upcoming = cast(catalog.ListedSpace, space).upcoming_sessions
+    return min(session.start for session in upcoming if session.start >= now), space.pk
+
+
+def get_upcoming_spaces_list(now: datetime.datetime | None = None) -> list[Space]:
+    """Get all published spaces with upcoming events, by space_key."""
+    now = now or timezone.now()
+    return sorted(catalog.spaces(now=now), key=partial(space_key, now=now))
+
+
+def upcoming_recommended_sessions(
+    user: User | None, categories: list[str] | None = None, author: str | None = None
+) -> list[Session]:
+    if user and user.is_staff:
+        # Staff also see unpublished spaces, which the catalog leaves out.
+        sessions = catalog.load(Session.objects.all())
+    else:
+        sessions = catalog.sessions()
+    now = timezone.now()
+    return [
+        session
+        for session in sessions
+        if session.start >= now
+        and not session.cancelled
+        and session.listed
+        # are there any seats?
+        and cast(catalog.ListedSession, session).attendee_count < session.seats
+        and (
+            not categories or any(c.slug in categories or c.name in categories for c in session.space.categories.all())
         )
-        .annotate(
-            attendee_count=Count("attendees", distinct=True),
-            subscriber_count=Count("space__subscribed", distinct=True),
+        and (not author or session.space.author.slug == author)
+    ]
+
+
+URL_SLUG_PLACEHOLDER = "~slug~"
+
+
+@dataclass
+class ViewerContext:
+    """
+    What the schema builders need to know about who is looking, loaded once
+    per request: the sessions they attend and joined and the spaces they
+    subscribe to, as id sets. Together with the counts the listing querysets
+    annotate, building a schema costs no queries of its own, so a response
+    costs the same number of queries however many sessions it lists.
+
+    Also caches, for the request, the URL patterns the schemas link to and
+    rendered markdown, which the summary needs for the same space several times.
+    """
+
+    user: User
+    attending: frozenset[int] = frozenset()  # session ids
+    joined: frozenset[int] = frozenset()  # session ids
+    subscribed: frozenset[int] = frozenset()  # space ids
+    _urls: dict[str, tuple[str, str]] = field(default_factory=dict, repr=False)
+    _content: dict[tuple[type, int], str] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def for_user(cls, user: User) -> ViewerContext:
+        if not user.is_authenticated:
+            return cls(user)
+        return cls(
+            user,
+            attending=frozenset(user.sessions_attending.values_list("pk", flat=True)),
+            joined=frozenset(user.sessions_joined.values_list("pk", flat=True)),
+            subscribed=frozenset(user.subscribed_spaces.values_list("pk", flat=True)),
         )
-        .order_by("start")
-    )
-    if not user or not user.is_staff:
-        events = events.filter(space__published=True)
-    # are there any seats?
-    events = events.filter(attendee_count__lt=F("seats"))
-    # filter category
-    if categories:
-        events = events.filter(Q(space__categories__slug__in=categories) | Q(space__categories__name__in=categories))
-    # filter author
-    if author:
-        events = events.filter(space__author__slug=author)
-    return events.distinct().order_by("start")
-
-
-def session_detail_schema(session: Session, user: User):
-    space: Space = session.space
-    start = session.start
 
-    if user.is_authenticated:
-        if hasattr(space, "_prefetched_objects_cache") and "subscribed" in space._prefetched_objects_cache:
-            subscribed = any(sub.pk == user.pk for sub in space.subscribed.all())
+    def url(self, viewname: str, kwarg: str, slug: str) -> str:
+        """reverse(viewname, kwargs={kwarg: slug}), resolving each pattern once. Slugs need no quoting."""
+        if viewname not in self._urls:
+            prefix, _, suffix = reverse(viewname, kwargs={kwarg: URL_SLUG_PLACEHOLDER}).partition(URL_SLUG_PLACEHOLDER)
+            self._urls[viewname] = (prefix, suffix)
+        prefix, suffix = self._urls[viewname]
+        return f"{prefix}{slug}{suffix}"
+
+    def content_html(self, obj: Space | Session) -> str:
+        key = (type(obj), obj.pk)
+        if key not in self._content:
+            self._content[key] = obj.content_html
+        return self._content[key]
+
+    def is_attending(self, session: Session) -> bool:
+        return session.pk in self.attending
+
+    def can_join(self, session: Session) -> bool:
+        if not self.user.is_authenticated:
+            return False
+        return session.can_join(self.user, attending=session.pk in self.attending, joined=session.pk in self.joined)
+
+
+@dataclass
+class Catalog:
+    """
+    Everything the summary shows: every session that hasn't ended in a space
+    the viewer can see, with their spaces, authors, categories and counts,
+    mostly from the shared catalog snapshot (totem.spaces.catalog). The
+    summary's sections are filters over it, so spaces that appear in several
+    sections are fetched once.
+    """
+
+    sessions: list[Session]  # by start
+    spaces: list[Space]  # with an upcoming session, by the start of the next one
+
+    @classmethod
+    def load(cls, ctx: ViewerContext) -> Catalog:
+        if ctx.user.is_staff:
+            sessions = catalog.load(Session.objects.all())
         else:
-            subscribed = space.subscribed.filter(pk=user.pk).exists()
-    else:
-        subscribed = None
-    ended = session.ended()
+            # The public part comes from the shared snapshot. Unpublished spaces only show up in the
+            # viewer's own upcoming sessions, loaded for them alone.
+            sessions = catalog.sessions()
+            if ctx.attending:
+                attended_spaces = Session.objects.filter(pk__in=ctx.attending).values("space_id")
+                own = catalog.load(Session.objects.filter(space__published=False, space_id__in=attended_spaces))
+                sessions = sorted([*sessions, *own], key=attrgetter("start", "pk"))
+        return cls(sessions=sessions, spaces=catalog.spaces(sessions))
 
-    if hasattr(space, "_prefetched_objects_cache") and "attendees" in space._prefetched_objects_cache:
-        attending = any(attendee.pk == user.pk for attendee in session.attendees.all())
-    else:
-        attending = session.attendees.filter(pk=user.pk).exists()
+    def attending(self, ctx: ViewerContext) -> list[Session]:
+        """The viewer's sessions that haven't ended, including ones in progress."""
+        return [session for session in self.sessions if session.pk in ctx.attending and not session.cancelled]
+
+    def published(self) -> list[Space]:
+        return [space for space in self.spaces if space.published]
+
+    def recommended(self, ctx: ViewerContext, categories: set[str]) -> list[Space]:
+        """Spaces in any of `categories`, by name or slug, or every space when there are none. Staff also see unpublished ones."""
+        spaces = self.spaces if ctx.user.is_staff else self.published()
+        if not categories:
+            return spaces
+        return [
+            space
+            for space in spaces
+            if any(category.slug in categories or category.name in categories for category in space.categories.all())
+        ]
+
+    def category_names(self, space_ids: frozenset[int]) -> set[str]:
+        return {
+            category.name
+            for space in self.published()
+            if space.pk in space_ids
+            for category in space.categories.all()
+            if category.name
+        }
+
+
+def _seats_left(session: Session) -> int:
+    if hasattr(session, "attendee_count"):
+        return max(0, session.seats - session.attendee_count)
+    return session.seats_left()
+
+
+def session_detail_schema(session: Session, ctx: ViewerContext):
+    space: Space = session.space
+    subscribed = space.pk in ctx.subscribed if ctx.user.is_authenticated else None
 
     return SessionDetailSchema(
         slug=session.slug,
         title=session.title,
-        space=space_detail_schema(space, user),
-        content=session.content_html,
-        seats_left=session.seats_left(),
+        space=space_detail_schema(space, ctx),
+        content=ctx.content_html(session),
+        seats_left=_seats_left(session),
         duration=session.duration_minutes,
-        start=start,
-        attending=attending,
+        start=session.start,
+        attending=ctx.is_attending(session),
         open=session.open,
         started=session.started(),
         cancelled=session.cancelled,
-        joinable=session.can_join(user),
-        ended=ended,
-        rsvp_url=reverse("spaces:rsvp", kwargs={"session_slug": session.slug}),
-        join_url=reverse("spaces:join", kwargs={"session_slug": session.slug}),
-        cal_link=session.cal_link(),
-        subscribe_url=reverse("mobile-api:spaces_subscribe", kwargs={"space_slug": space.slug}),
+        joinable=ctx.can_join(session),
+        ended=session.ended(),
+        rsvp_url=ctx.url("spaces:rsvp", "session_slug", session.slug),
+        join_url=ctx.url("spaces:join", "session_slug", session.slug),
+        cal_link=full_url(ctx.url("spaces:session_detail", "session_slug", session.slug)),
+        subscribe_url=ctx.url("mobile-api:spaces_subscribe", "space_slug", space.slug),
         subscribed=subscribed,
         user_timezone=str("UTC"),
         meeting_provider=space.meeting_provider,
     )
 
 
-def next_session_schema(next_session: Session, user: User):
-    seats_left = next_session.seats_left()
-
-    if hasattr(next_session, "_prefetched_objects_cache") and "attendees" in next_session._prefetched_objects_cache:
-        attending = any(attendee.pk == user.pk for attendee in next_session.attendees.all())
-    else:
-        attending = next_session.attendees.filter(pk=user.pk).exists()
-
+def next_session_schema(next_session: Session, ctx: ViewerContext):
+    link = ctx.url("spaces:session_detail", "session_slug", next_session.slug)
     return NextSessionSchema(
         slug=next_session.slug,
         start=next_session.start,
         title=next_session.title,
-        link=next_session.get_absolute_url(),
-        seats_left=seats_left,
+        link=link,
+        seats_left=_seats_left(next_session),
         duration=next_session.duration_minutes,
         meeting_provider=next_session.space.meeting_provider,
-        cal_link=next_session.cal_link(),
-        attending=attending,
+        cal_link=full_url(link),
+        attending=ctx.is_attending(next_session),
         cancelled=next_session.cancelled,
         open=next_session.open,
-        joinable=next_session.can_join(user),
+        joinable=ctx.can_join(next_session),
     )
 
 
-def space_detail_schema(space: Space, user: User):
-    category = space.categories.first()
+def space_detail_schema(space: Space, ctx: ViewerContext):
+    # Lowest pk, like categories.first(), but from the prefetched categories when there are some.
+    category = min(space.categories.all(), key=attrgetter("pk"), default=None)
     category_name = category.name if category else None
 
     if hasattr(space, "upcoming_sessions"):
-        upcoming_sessions = space.upcoming_sessions
+        # May come from the catalog snapshot, so drop the sessions that have started since it was loaded.
+        now = timezone.now()
+        upcoming_sessions = [session for session in space.upcoming_sessions if session.start >= now]
     else:
-        upcoming_sessions = space.sessions.filter(start__gte=timezone.now()).order_by("start")
+        upcoming_sessions = list(_upcoming_sessions(space.sessions.all()))
 
-    next_events = [next_session_schema(event, user) for event in upcoming_sessions]
+    next_events = [next_session_schema(event, ctx) for event in upcoming_sessions]
 
     if hasattr(space, "subscriber_count"):
         subscribers = space.subscriber_count
@@ -181,7 +267,7 @@ def space_detail_schema(space: Space, user: User):
         title=space.title,
         image_link=space.image.url if space.image else None,
         short_description=space.short_description,
-        content=space.content_html,
+        content=ctx.content_html(space),
         author=space.author,
         category=category_name,
         subscribers=subscribers,
@@ -3,6 +3,7 @@ from enum import Enum
 
 from ninja import ModelSchema, Schema
 
+from totem.api.pagination import KeysetPageSchema
 from totem.spaces.models import Session, SessionFeedbackOptions, Space
 from totem.users.schemas import PublicUserSchema
 
@@ -66,6 +67,10 @@ class MobileSpaceDetailSchema(Schema):
     next_events: list[NextSessionSchema]
 
 
+class PagedMobileSpaceDetailSchema(KeysetPageSchema[MobileSpaceDetailSchema]):
+    pass
+
+
 class SessionDetailSchema(Schema):
     slug: str
     title: str
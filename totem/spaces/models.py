@@ -17,11 +17,13 @@ from imagekit.processors import ResizeToFit, Transpose
 from taggit.managers import TaggableManager
 
 from totem.email.emails import (
+    Email,
     missed_session_email,
     notify_session_advertisement,
     notify_session_signup,
     notify_session_starting,
     notify_session_tomorrow,
+    send_emails,
 )
 from totem.email.exceptions import EmailBounced
 from totem.notifications.notifications import (
@@ -157,6 +159,9 @@ class Space(AdminURLMixin, MarkdownMixin, SluggedModel):
     def subscribe_url(self, user, subscribe: bool) -> str:
         return SubscribeSpaceAction(user, parameters={"space_slug": self.slug, "subscribe": subscribe}).build_url()
 
+    def subscribe_urls(self, users, subscribe: bool) -> dict[int, str]:
+        return SubscribeSpaceAction.build_urls(users, parameters={"space_slug": self.slug, "subscribe": subscribe})
+
 
 class Session(AdminURLMixin, MarkdownMixin, SluggedModel):
     listed = models.BooleanField(
@@ -257,10 +262,13 @@ class Session(AdminURLMixin, MarkdownMixin, SluggedModel):
     def end(self):
         return self.start + datetime.timedelta(minutes=self.duration_minutes)
 
-    def can_join(self, user):
-        if self.cancelled or user not in self.attendees.all():
+    def can_join(self, user, *, attending: bool | None = None, joined: bool | None = None):
+        """Pass `attending` and `joined` when they're already known, e.g. from a ViewerContext, to skip the lookups."""
+        if attending is None:
+            attending = user in self.attendees.all()
+        if self.cancelled or not attending:
             return False
-        is_joined = user in self.joined.all()
+        is_joined = user in self.joined.all() if joined is None else joined
         now = timezone.now()
         grace_before = datetime.timedelta(minutes=60 if (user.is_staff or is_joined) else 15)
 
@@ -299,20 +307,43 @@ class Session(AdminURLMixin, MarkdownMixin, SluggedModel):
         short_date = self.start.astimezone(pytz.timezone("America/Los_Angeles")).strftime("%b %d")
         return f"<{full_url(user.get_admin_url())}|{user.name}> for <{full_url(self.get_admin_url())}|{self.space.title}> @ {start_time_in_pst}, {short_date}"
 
+    # Notification recipients are planned as set differences in SQL, so each kind costs
+    # a fixed number of queries no matter how many users it reaches.
+
+    def starting_recipients(self) -> QuerySet["User"]:
+        return self.attendees.all()
+
+    def missed_recipients(self) -> QuerySet["User"]:
+        # attendees - joined - author
+        return self.attendees.exclude(pk__in=self.joined.values("pk")).exclude(pk=self.space.author_id)
+
+    def advertisement_recipients(self) -> QuerySet["User"]:
+        # subscribed - attendees
+        return self.space.subscribed.exclude(pk__in=self.attendees.values("pk"))
+
+    def _send_emails(self, emails: dict["User", Email]) -> tuple[list["User"], list["User"]]:
+        """Send the emails in one batch. Returns (delivered, bounced) recipients."""
+        sent = send_emails(list(emails.values()))
+        delivered = [user for user, ok in zip(emails, sent) if ok]
+        bounced = [user for user, ok in zip(emails, sent) if not ok]
+        return delivered, bounced
+
     def notify(self, force=False):
         # Notify users who are attending that the space is about to start
         if force is False and self.notified:
             return
         self.notified = True
         self.save()
-        for user in self.attendees.all():
-            try:
-                notify_session_starting(self, user).send()
-                session_starting_notification(self, user).send()
-            except EmailBounced:
-                # If the email was blocked, remove the user from the session and space
-                self.attendees.remove(user)
-                self.space.unsubscribe(user)
+        recipients = list(self.starting_recipients())
+        join_urls = self.email_join_urls(recipients)
+        delivered, bounced = self._send_emails(
+            {user: notify_session_starting(self, user, join_url=join_urls[user.pk]) for user in recipients}
+        )
+        session_starting_notification(self, *delivered).send()
+        if bounced:
+            # If the email was blocked, remove the user from the session and space
+            self.attendees.remove(*bounced)
+            self.space.subscribed.remove(*bounced)
 
     def notify_tomorrow(self, force=False):
         # Notify users who are attending that the space is starting tomorrow
@@ -320,13 +351,12 @@ class Session(AdminURLMixin, MarkdownMixin, SluggedModel):
             return
         self.notified_tomorrow = True
         self.save()
-        for user in self.attendees.all():
-            try:
-                notify_session_tomorrow(self, user).send()
-            except EmailBounced:
-                # If the email was blocked, remove the user from the session and space
-                self.attendees.remove(user)
-                self.space.unsubscribe(user)
+        recipients = list(self.starting_recipients())
+        _, bounced = self._send_emails({user: notify_session_tomorrow(self, user) for user in recipients})
+        if bounced:
+            # If the email was blocked, remove the user from the session and space
+            self.attendees.remove(*bounced)
+            self.space.subscribed.remove(*bounced)
 
     def notify_missed(self, force=False):
         # Notify users who signed up but didn't join
@@ -336,16 +366,12 @@ class Session(AdminURLMixin, MarkdownMixin, SluggedModel):
         assert self.ended()
         self.notified_missed = True
         self.save()
-        for user in self.attendees.all():
-            if user == self.space.author:
-                continue
-            if user not in self.joined.all():
-                try:
-                    missed_session_email(self, user).send()
-                    missed_session_notification(self, user).send()
-                except EmailBounced:
-                    # If the email was blocked, unsubscribe the user from the space
-                    self.space.unsubscribe(user)
+        recipients = list(self.missed_recipients())
+        delivered, bounced = self._send_emails({user: missed_session_email(self, user) for user in recipients})
+        missed_session_notification(self, *delivered).send()
+        if bounced:
+            # If the email was blocked, unsubscribe the user from the space
+            self.space.subscribed.remove(*bounced)
 
     def advertise(self, force=False):
         # Notify users who are subscribed that a new event is available, if they aren't already attending.
@@ -353,14 +379,20 @@ class Session(AdminURLMixin, MarkdownMixin, SluggedModel):
             return
         self.advertised = True
         self.save()
-        for user in self.space.subscribed.all():
-            if self.can_attend(silent=True) and user not in self.attendees.all():
-                try:
-                    notify_session_advertisement(self, user).send()
-                    session_advertisement_notification(self, user).send()
-                except EmailBounced:
-                    # If the email was blocked, remove the user from the space
-                    self.space.unsubscribe(user)
+        if not self.can_attend(silent=True):
+            return
+        recipients = list(self.advertisement_recipients())
+        unsubscribe_urls = self.space.subscribe_urls(recipients, subscribe=False)
+        delivered, bounced = self._send_emails(
+            {
+                user: notify_session_advertisement(self, user, unsubscribe_url=unsubscribe_urls[user.pk])
+                for user in recipients
+            }
+        )
+        session_advertisement_notification(self, *delivered).send()
+        if bounced:
+            # If the email was blocked, remove the user from the space
+            self.space.subscribed.remove(*bounced)
 
     def cal_link(self):
         return full_url(self.get_absolute_url())
@@ -395,6 +427,9 @@ class Session(AdminURLMixin, MarkdownMixin, SluggedModel):
     def email_join_url(self, user):
         return JoinSessionAction(user=user, parameters={"session_slug": self.slug}).build_url()
 
+    def email_join_urls(self, users) -> dict[int, str]:
+        return JoinSessionAction.build_urls(users, parameters={"session_slug": self.slug})
+
     def jsonld(self):
         return jsonld.create_jsonld(self)
 
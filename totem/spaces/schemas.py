@@ -3,6 +3,7 @@ from enum import Enum
 
 from ninja import FilterSchema, ModelSchema, Schema
 
+from totem.api.pagination import KeysetPageSchema
 from totem.spaces.models import Session, Space
 from totem.users.schemas import PublicUserSchema
 
@@ -32,6 +33,10 @@ class SessionListSchema(ModelSchema):
         fields = ["start", "slug", "date_created", "date_modified", "title"]
 
 
+class PagedSessionListSchema(KeysetPageSchema[SessionListSchema]):
+    pass
+
+
 class SessionsFilterSchema(FilterSchema):
     category: str | None
     author: str | None
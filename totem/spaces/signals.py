@@ -0,0 +1,40 @@
+"""
+Invalidate the catalog snapshot (see catalog.py) when what it shows changes.
+
+Each change invalidates straight away and again on commit: a request that
+rebuilds in between still reads the data from before the transaction, and the
+second invalidation makes the next read pick up the committed change.
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog
+from .models import Session, Space, SpaceCategory
+
+
+def _invalidate() -> None:
+    catalog.invalidate()
+    transaction.on_commit(catalog.invalidate)
+
+
+@receiver(post_save, sender=Session)
+@receiver(post_save, sender=Space)
+@receiver(post_save, sender=SpaceCategory)
+@receiver(post_delete, sender=Session)
+@receiver(post_delete, sender=Space)
+@receiver(post_delete, sender=SpaceCategory)
+def invalidate_catalog(sender, **kwargs):
+    _invalidate()
+
+
+@receiver(m2m_changed, sender=Session.attendees.through)
+@receiver(m2m_changed, sender=Session.joined.through)
+@receiver(m2m_changed, sender=Space.subscribed.through)
+@receiver(m2m_changed, sender=Space.categories.through)
+def invalidate_catalog_m2m(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        _invalidate()
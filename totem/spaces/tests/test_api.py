@@ -1,8 +1,11 @@
 from datetime import timedelta
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
+from totem.api.pagination import MAX_PAGE_SIZE
 from totem.spaces.api import EventCalendarFilterSchema, SessionsFilterSchema
 from totem.spaces.tests.factories import SessionFactory, SpaceCategoryFactory, SpaceFactory
 from totem.users.tests.factories import UserFactory
@@ -14,7 +17,7 @@ class TestSessionListAPI:
             reverse("api-1:events_list"), SessionsFilterSchema(category="empty", author=""), format="json"
         )
         assert response.status_code == 200
-        assert response.json() == {"count": 0, "items": []}
+        assert response.json() == {"count": 0, "items": [], "next": None}
 
     def test_get_session_list(self, client, db):
         session = SessionFactory()
@@ -73,6 +76,55 @@ class TestSessionListAPI:
         assert response.status_code == 200
         assert len(response.json()["items"]) == 1
 
+    def test_get_session_list_pages_by_cursor(self, client, db):
+        start = timezone.now() + timedelta(days=1)
+        # Two sessions at the same time, so the cursor has to tell them apart by id.
+        sessions = [
+            SessionFactory(start=start),
+            SessionFactory(start=start),
+            SessionFactory(start=start + timedelta(1)),
+        ]
+        url = reverse("api-1:events_list")
+        params = SessionsFilterSchema(category="", author="").model_dump() | {"limit": 2}
+
+        first = client.get(url, params).json()
+        second = client.get(url, params | {"cursor": first["next"]}).json()
+
+        assert [item["slug"] for item in first["items"] + second["items"]] == [s.slug for s in sessions]
+        assert first["count"] == second["count"] == 3
+        assert second["next"] is None
+
+    def test_get_session_list_page_queries_do_not_grow(self, client, db):
+        start = timezone.now() + timedelta(days=1)
+        for days in range(6):
+            SessionFactory(start=start + timedelta(days=days))
+        url = reverse("api-1:events_list")
+        params = SessionsFilterSchema(category="", author="").model_dump() | {"limit": 2}
+
+        cursor = None
+        page_queries = []
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                page = client.get(url, params | ({"cursor": cursor} if cursor else {})).json()
+            page_queries.append(len(queries))
+            cursor = page["next"]
+            if cursor is None:
+                break
+
+        assert len(page_queries) == 3
+        assert page_queries[0] == page_queries[-1]
+
+    def test_get_session_list_bad_cursor(self, client, db):
+        params = SessionsFilterSchema(category="", author="").model_dump() | {"cursor": "not-a-cursor"}
+        response = client.get(reverse("api-1:events_list"), params)
+        assert response.status_code == 422
+
+    def test_get_session_list_limit_is_capped(self, client, db):
+        params = SessionsFilterSchema(category="", author="").model_dump()
+        url = reverse("api-1:events_list")
+        assert client.get(url, params | {"limit": MAX_PAGE_SIZE}).status_code == 200
+        assert client.get(url, params | {"limit": MAX_PAGE_SIZE + 1}).status_code == 422
+
 
 class TestFilterOptions:
     def test_get_filter_options(self, client, db):
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from totem.spaces import catalog
+from totem.spaces.models import Session
+from totem.spaces.tests.factories import SessionFactory, SpaceCategoryFactory
+from totem.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def _future(days: int = 1):
+    return timezone.now() + timedelta(days=days)
+
+
+def test_snapshot_is_shared_until_something_changes(django_assert_num_queries):
+    session = SessionFactory(start=_future())
+    assert catalog.upcoming_sessions() == [session]
+
+    with django_assert_num_queries(0):
+        assert catalog.upcoming_sessions() == [session]
+        assert catalog.spaces() == [session.space]
+
+
+def test_only_published_sessions_that_have_not_ended():
+    in_progress = SessionFactory(start=timezone.now() - timedelta(minutes=30), duration_minutes=60)
+    upcoming = SessionFactory(start=_future())
+    SessionFactory(start=timezone.now() - timedelta(hours=2), duration_minutes=60)
+    SessionFactory(start=_future(), space__published=False)
+
+    assert catalog.sessions() == [in_progress, upcoming]
+    assert catalog.upcoming_sessions() == [upcoming]
+    assert catalog.spaces() == [upcoming.space]
+
+
+def test_spaces_by_next_session():
+    later = SessionFactory(start=_future(3))
+    sooner = SessionFactory(start=_future(1))
+    SessionFactory(space=later.space, start=_future(5))
+
+    assert catalog.spaces() == [sooner.space, later.space]
+    assert catalog.spaces()[1].upcoming_sessions == [
+        later,
+        Session.objects.get(space=later.space, start__gt=later.start),
+    ]
+
+
+def test_saving_a_session_or_space_invalidates():
+    session = SessionFactory(start=_future())
+    assert catalog.upcoming_sessions() == [session]
+
+    other = SessionFactory(start=_future(2))
+    assert catalog.upcoming_sessions() == [session, other]
+
+    session.cancelled = True
+    session.save()
+    assert catalog.upcoming_sessions()[0].cancelled
+
+    other.space.published = False
+    other.space.save()
+    assert catalog.upcoming_sessions() == [session]
+
+    session.delete()
+    assert catalog.upcoming_sessions() == []
+
+
+def test_changing_attendees_subscribers_and_categories_invalidates():
+    session = SessionFactory(start=_future())
+    space = session.space
+    assert catalog.upcoming_sessions()[0].attendee_count == 0
+
+    user = UserFactory()
+    session.attendees.add(user)
+    assert catalog.upcoming_sessions()[0].attendee_count == 1
+
+    space.subscribed.add(user)
+    assert catalog.spaces()[0].subscriber_count == 1
+
+    space.categories.add(SpaceCategoryFactory(name="calm"))
+    assert [c.name for c in catalog.spaces()[0].categories.all()] == ["calm"]
+
+    # From the other side of the m2m too.
+    user.sessions_attending.remove(session)
+    assert catalog.upcoming_sessions()[0].attendee_count == 0
+
+
+def test_changes_without_signals_show_up_after_the_ttl(monkeypatch):
+    session = SessionFactory(start=_future())
+    catalog.upcoming_sessions()
+    Session.objects.filter(pk=session.pk).update(title="Renamed")
+    assert catalog.upcoming_sessions()[0].title != "Renamed"
+
+    monkeypatch.setattr(catalog, "CATALOG_TTL", 0)
+    catalog.invalidate()
+    catalog.upcoming_sessions()
+    Session.objects.filter(pk=session.pk).update(title="Renamed again")
+
+    assert catalog.upcoming_sessions()[0].title == "Renamed again"
+
+
+def test_rebuilds_when_the_version_is_evicted():
+    session = SessionFactory(start=_future())
+    catalog.upcoming_sessions()
+    Session.objects.filter(pk=session.pk).update(title="Renamed")
+
+    cache.clear()
+
+    assert catalog.upcoming_sessions()[0].title == "Renamed"
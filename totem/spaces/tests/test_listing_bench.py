@@ -0,0 +1,112 @@
+"""
+Memory benchmarks for the session and space listings.
+
+Listings show subscriber counts and whether the viewer subscribes, so they
+must not load the subscribers themselves: a popular space has thousands. The
+benchmark is skipped unless TOTEM_BENCHMARKS=1 and prints its numbers:
+
+    TOTEM_BENCHMARKS=1 pytest totem/spaces/tests/test_listing_bench.py
+"""
+
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from totem.api.auth import generate_jwt_token
+from totem.spaces import catalog
+from totem.spaces.models import Session, Space
+from totem.spaces.tests.factories import SessionFactory, SpaceFactory
+from totem.users.models import User
+from totem.users.tests.factories import UserFactory
+
+# Selecting user rows through the subscriptions table, which is what prefetching `subscribed` does.
+SUBSCRIBER_ROWS = 'FROM "users_user" INNER JOIN "spaces_space_subscribed"'
+
+
+def _listings(viewer: User, spaces: int, subscribers: int) -> None:
+    """
+    `spaces` published spaces with an upcoming and a past session each, all
+    with the same `subscribers`. The viewer subscribes, attends and joined.
+    """
+    users = User.objects.bulk_create(
+        User(email=f"subscriber-{i}@example.com", name=f"Subscriber {i}") for i in range(subscribers - 1)
+    )
+    users.append(viewer)
+    for i in range(spaces):
+        space = SpaceFactory()
+        Space.subscribed.through.objects.bulk_create(
+            Space.subscribed.through(space_id=space.pk, user_id=user.pk) for user in users
+        )
+        for days in (i + 1, -i - 1):
+            session = SessionFactory(space=space, start=timezone.now() + timedelta(days=days))
+            session.attendees.add(viewer)
+            session.joined.add(viewer)
+
+
+def _urls() -> dict[str, str]:
+    return {
+        "mobile spaces": reverse("mobile-api:mobile_spaces_list"),
+        "mobile recommended": reverse("mobile-api:recommended_spaces"),
+        "mobile summary": reverse("mobile-api:spaces_summary"),
+        "mobile history": reverse("mobile-api:sessions_history"),
+        "web spaces": reverse("api-1:spaces_list"),
+        "web events": f"{reverse('api-1:events_list')}?category=&author=",
+    }
+
+
+def _peak_bytes(client: Client, url: str) -> int:
+    catalog.invalidate()  # count loading the catalog too
+    tracemalloc.start()
+    try:
+        response = client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert response.status_code == 200, url
+    return peak
+
+
+@pytest.mark.django_db
+def test_listings_do_not_load_subscribers():
+    viewer = UserFactory()
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {generate_jwt_token(viewer)}")
+    _listings(viewer, spaces=2, subscribers=20)
+
+    for url in _urls().values():
+        catalog.invalidate()
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(url).status_code == 200
+        assert not [q["sql"] for q in queries if SUBSCRIBER_ROWS in q["sql"]], url
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_benchmark_listing_memory(benchmark_report):
+    """Peak allocation per request with 10k subscribers per space, against a prefetch of them for reference."""
+    viewer = UserFactory()
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {generate_jwt_token(viewer)}")
+    subscribers = 10_000
+    _listings(viewer, spaces=5, subscribers=subscribers)
+    urls = _urls()
+    for url in urls.values():
+        client.get(url)  # warm up imports, URL resolvers and the session
+
+    peaks = {name: _peak_bytes(client, url) for name, url in urls.items()}
+    for name, peak in peaks.items():
+        benchmark_report(f"{name} (5 spaces x {subscribers} subscribers)", peak_kib=peak / 1024)
+
+    tracemalloc.start()
+    try:
+        list(Session.objects.prefetch_related("space__subscribed"))
+        _, prefetch_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark_report(f"prefetching subscribers, for reference ({subscribers} per space)", peak_kib=prefetch_peak / 1024)
+
+    assert max(peaks.values()) < prefetch_peak
@@ -1,11 +1,18 @@
 from datetime import timedelta
+from functools import partial
+from unittest.mock import patch
 
 import pytest
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
+from totem.api.pagination import KeysetInput, paginate_list
 from totem.onboard.tests.factories import OnboardModelFactory
+from totem.spaces import catalog
+from totem.spaces.mobile_api.mobile_filters import get_upcoming_spaces_list, space_detail_schema, space_key
 from totem.spaces.models import SessionFeedback, SessionFeedbackOptions
 from totem.spaces.tests.factories import SessionFactory, SpaceCategoryFactory, SpaceFactory
 from totem.users.models import User
@@ -91,6 +98,45 @@ class TestMobileApiSpaces:
         assert response.status_code == 200
         assert len(response.json()["items"]) == 1
 
+    def test_list_spaces_pages_by_cursor(self, client_with_user: tuple[Client, User]):
+        client, _ = client_with_user
+        start = timezone.now() + timedelta(days=1)
+        events = [SessionFactory(start=start), SessionFactory(start=start), SessionFactory(start=start + timedelta(1))]
+        url = reverse("mobile-api:mobile_spaces_list")
+
+        with patch("totem.spaces.mobile_api.mobile_api.space_detail_schema", wraps=space_detail_schema) as build:
+            first = client.get(url, {"limit": 2}).json()
+            assert build.call_count == 2  # only the page's spaces are built
+            second = client.get(url, {"limit": 2, "cursor": first["next"]}).json()
+
+        assert [item["slug"] for item in first["items"] + second["items"]] == [e.space.slug for e in events]
+        assert first["count"] == 3
+        assert second["next"] is None
+
+    def test_list_spaces_repeats_but_never_skips_a_space_whose_session_started(self, db):
+        start = timezone.now() + timedelta(days=1)
+        moving = SessionFactory(start=start)
+        SessionFactory(space=moving.space, start=start + timedelta(days=3))
+        others = [SessionFactory(start=start + timedelta(days=days)) for days in (1, 2)]
+        pagination = KeysetInput(limit=1)
+
+        first = paginate_list(get_upcoming_spaces_list(), pagination, key=partial(space_key, now=timezone.now()))
+        # The moving space's first session has started by the time the rest are fetched.
+        later = start + timedelta(minutes=1)
+        rest = []
+        cursor = first.next
+        while cursor:
+            page = paginate_list(
+                get_upcoming_spaces_list(now=later),
+                KeysetInput(limit=1, cursor=cursor),
+                key=partial(space_key, now=later),
+            )
+            rest += page.items
+            cursor = page.next
+
+        assert first.items == [moving.space]
+        assert rest == [others[0].space, others[1].space, moving.space]
+
     def test_list_spaces_no_events(self, client_with_user: tuple[Client, User]):
         client, _ = client_with_user
         response = client.get(reverse("mobile-api:mobile_spaces_list"))
@@ -494,6 +540,55 @@ class TestMobileApiSpaces:
         assert upcoming_space.slug not in explore_slugs
         assert explore_space.slug in explore_slugs
 
+    def test_summary_unpublished_space_only_in_upcoming(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        unpublished_space = SpaceFactory(published=False)
+        attending_session = SessionFactory(space=unpublished_space, start=timezone.now() + timedelta(days=1))
+        attending_session.attendees.add(user)
+        later_session = SessionFactory(space=unpublished_space, start=timezone.now() + timedelta(days=8))
+
+        data = client.get(reverse("mobile-api:spaces_summary")).json()
+
+        assert [session["slug"] for session in data["upcoming"]] == [attending_session.slug]
+        next_events = data["upcoming"][0]["space"]["next_events"]
+        assert [event["slug"] for event in next_events] == [attending_session.slug, later_session.slug]
+        assert data["for_you"] == []
+        assert data["explore"] == []
+
+    def test_summary_queries_do_not_grow_with_catalog(self, client_with_user: tuple[Client, User]):
+        client, user = client_with_user
+        OnboardModelFactory(user=user)
+        category = SpaceCategoryFactory(name="self")
+
+        def add_spaces():
+            attending_space = SpaceFactory(categories=[category])
+            attending_space.subscribed.add(user, UserFactory())
+            session = SessionFactory(space=attending_space, start=timezone.now() + timedelta(days=2))
+            session.attendees.add(user, UserFactory())
+            session.joined.add(user)
+            SessionFactory(space=attending_space, start=timezone.now() + timedelta(days=9))
+            SessionFactory(space__categories=[category], start=timezone.now() + timedelta(days=3))
+            SessionFactory(start=timezone.now() + timedelta(days=4))
+
+        def summary_queries() -> int:
+            catalog.invalidate()  # count the snapshot's queries too
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(reverse("mobile-api:spaces_summary"))
+            assert response.status_code == 200
+            return len(queries)
+
+        add_spaces()
+        summary_queries()  # the first request also sets up the session
+        few = summary_queries()
+        for _ in range(4):
+            add_spaces()
+
+        assert summary_queries() == few
+        data = client.get(reverse("mobile-api:spaces_summary")).json()
+        assert len(data["upcoming"]) == 5
+        assert all(session["attending"] and session["subscribed"] for session in data["upcoming"])
+        assert len(data["explore"]) == 10
+
     def test_rsvp_confirm(self, client_with_user: tuple[Client, User]):
         client, user = client_with_user
         event = SessionFactory(space__published=True)
@@ -1,10 +1,14 @@
 import io
+from datetime import timedelta
 
 import pytest
 from django.core import mail
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from PIL import Image, ImageOps
 
 from totem.users.tests.factories import UserFactory
@@ -169,3 +173,78 @@ class TestSessionModel:
         space = SpaceFactory(meeting_provider=Space.MeetingProviderChoices.GOOGLE_MEET)
         session = SessionFactory(space=space, meeting_url=meeting_url)
         assert session.room_url() == meeting_url
+
+
+class TestSessionNotificationPlanning:
+    """Notification fan-out must cost the same number of queries regardless of audience size."""
+
+    @staticmethod
+    def _count_queries(fn) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        return len(ctx.captured_queries)
+
+    def _session_with_attendees(self, count: int):
+        session = SessionFactory()
+        session.attendees.add(*[UserFactory() for _ in range(count)])
+        return session
+
+    def _ended_session_with_attendees(self, count: int):
+        session = SessionFactory(start=timezone.now() - timedelta(hours=2))
+        session.attendees.add(*[UserFactory() for _ in range(count)])
+        return session
+
+    def _session_with_subscribers(self, count: int):
+        session = SessionFactory()
+        session.space.subscribed.add(*[UserFactory() for _ in range(count)])
+        return session
+
+    @pytest.mark.parametrize(
+        "make_session, method",
+        [
+            ("_session_with_attendees", "notify"),
+            ("_session_with_attendees", "notify_tomorrow"),
+            ("_ended_session_with_attendees", "notify_missed"),
+            ("_session_with_subscribers", "advertise"),
+        ],
+    )
+    def test_query_count_is_independent_of_audience(self, db, make_session, method):
+        small = getattr(self, make_session)(1)
+        large = getattr(self, make_session)(10)
+
+        small_queries = self._count_queries(getattr(small, method))
+        mail.outbox = []
+        large_queries = self._count_queries(getattr(large, method))
+
+        assert len(mail.outbox) == 10
+        assert large_queries == small_queries
+
+    def test_missed_recipients_exclude_joined_and_author(self, db):
+        session = SessionFactory(start=timezone.now() - timedelta(hours=2))
+        missed, joined = UserFactory(), UserFactory()
+        session.attendees.add(missed, joined, session.space.author)
+        session.joined.add(joined)
+
+        assert list(session.missed_recipients()) == [missed]
+
+        session.notify_missed()
+        assert [email.to for email in mail.outbox] == [[missed.email]]
+
+    def test_advertisement_recipients_exclude_attendees(self, db):
+        session = SessionFactory()
+        subscriber, attendee = UserFactory(), UserFactory()
+        session.space.subscribed.add(subscriber, attendee)
+        session.attendees.add(attendee)
+
+        assert list(session.advertisement_recipients()) == [subscriber]
+
+    def test_advertise_skips_full_session(self, db):
+        session = SessionFactory(seats=1)
+        session.attendees.add(UserFactory())
+        session.space.subscribed.add(UserFactory())
+
+        session.advertise()
+
+        assert mail.outbox == []
+        session.refresh_from_db()
+        assert session.advertised
@@ -36,11 +36,7 @@ def _get_space(slug: str) -> Space:
 
 def _get_session(slug: str) -> Session:
     try:
-        return (
-            Session.objects.select_related("space", "space__author")
-            .prefetch_related("attendees", "space__subscribed")
-            .get(slug=slug)
-        )
+        return Session.objects.select_related("space", "space__author").prefetch_related("attendees").get(slug=slug)
     except Session.DoesNotExist:
         raise Http404
 
@@ -1,5 +1,6 @@
 import urllib.parse
 from abc import ABC
+from collections.abc import Iterable
 from typing import Generic, TypeVar
 
 from django.conf import settings
@@ -40,6 +41,24 @@ class ActionBase(Generic[T], ABC):
         if expires_at is not None:
             kwargs["expires_at"] = expires_at
         token = ActionToken.objects.create(**kwargs)
+        return self._token_url(token)
+
+    @classmethod
+    def build_urls(cls, users: Iterable[User], parameters: T, expires_at=None) -> dict[int, str]:
+        """Build the same action for many users, creating all the tokens in one query. Keyed by user pk."""
+        actions = [cls(user, parameters) for user in users]
+        kwargs = {}
+        if expires_at is not None:
+            kwargs["expires_at"] = expires_at
+        tokens = ActionToken.objects.bulk_create(
+            [
+                ActionToken(user=action.user, action=action.action_id, parameters=action.parameters, **kwargs)
+                for action in actions
+            ]
+        )
+        return {action.user.pk: action._token_url(token) for action, token in zip(actions, tokens)}
+
+    def _token_url(self, token: ActionToken) -> str:
         link = self.get_url() + f"?token={token.token}"
         return urllib.parse.urljoin(settings.SITE_BASE_URL, link)
 
@@ -16,6 +16,9 @@ class PublicUserSchema(ModelSchema):
 
     @staticmethod
     def resolve_circle_count(obj: User) -> int:
+        # Listings annotate the count onto the authors they load, to count them all in one query.
+        if hasattr(obj, "circle_count"):
+            return obj.circle_count
         return obj.sessions_joined.count()
 
     class Meta:
@@ -1,3 +1,7 @@
+from datetime import timedelta
+
+from totem.jobs.scheduler import PeriodicTask
+
 from .models import ActionToken
 
 
@@ -5,4 +9,4 @@ def cleanup_actions():
     ActionToken.cleanup()
 
 
-tasks = [cleanup_actions]
+tasks = [PeriodicTask(cleanup_actions, interval=timedelta(days=1))]
@@ -1,10 +1,13 @@
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from sentry_sdk.crons.decorator import monitor
 
 from totem.email.tasks import tasks as email_tasks
+from totem.jobs.models import ScheduledTask, TaskRunStatus
+from totem.jobs.scheduler import DEFAULT_MAX_WORKERS, PeriodicTask, run_periodic_tasks
+from totem.jobs.tasks import tasks as job_tasks
 from totem.notifications.tasks import tasks as notification_tasks
 from totem.rooms.tasks import tasks as room_tasks
 from totem.spaces.tasks import tasks as space_tasks
@@ -14,21 +17,45 @@ from totem.users.tasks import tasks as user_tasks
 class Command(BaseCommand):
     help = "Run tasks for Totem."
 
+    def add_arguments(self, parser):
+        parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Tasks to run at once")
+        parser.add_argument("--status", action="store_true", help="Show the last run of each task and exit")
+
     def handle(self, *args, **options):
+        if options["status"]:
+            self._status()
+            return
         if settings.DEBUG:
-            self._doit()
+            self._doit(options["max_workers"])
         else:
             with monitor(monitor_slug="totem_tasks"):
-                self._doit()
+                self._doit(options["max_workers"])
 
-    def _doit(self):
+    def _doit(self, max_workers: int):
         print("Running tasks...")
-        run_tasks_impl()
+        outcomes = run_tasks_impl(max_workers)
+        for name, outcome in outcomes.items():
+            print(f"{name}: {outcome}")
+        failed = [
+            name for name, outcome in outcomes.items() if outcome in (TaskRunStatus.FAILED, TaskRunStatus.TIMEOUT)
+        ]
+        if failed:
+            raise CommandError(f"Tasks did not succeed: {', '.join(failed)}")
         print("Done.")
 
-
-def run_tasks_impl():
-    tasks: list[list[Callable]] = [space_tasks, email_tasks, notification_tasks, user_tasks, room_tasks]
-    for task_list in tasks:
-        for task in task_list:
-            task()
+    def _status(self):
+        for task in ScheduledTask.objects.all():
+            duration = f"{task.last_duration:.1f}s" if task.last_duration is not None else "-"
+            print(f"{task.name}: {task.last_status or '-'} in {duration}, last success {task.last_success or 'never'}")
+
+
+def run_tasks_impl(max_workers: int = DEFAULT_MAX_WORKERS) -> dict[str, str]:
+    tasks: Sequence[Sequence[PeriodicTask | Callable[[], object]]] = [
+        space_tasks,
+        email_tasks,
+        notification_tasks,
+        user_tasks,
+        room_tasks,
+        job_tasks,
+    ]
+    return run_periodic_tasks([task for task_list in tasks for task in task_list], max_workers=max_workers)
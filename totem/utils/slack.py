@@ -3,7 +3,7 @@ import logging
 import requests
 from django.conf import settings
 
-from .pool import global_pool
+from totem.jobs.queue import add_task
 
 logger = logging.getLogger(__name__)
 SLACK_API_URL_LOOKUP = "https://slack.com/api/users.lookupByEmail"
@@ -18,7 +18,7 @@ requests_session = requests.Session()
 
 
 def notify_slack(message: str, email_to_mention: str | None = None, channel: str | None = None):
-    global_pool.add_task(_notify_task, message, email_to_mention, channel)
+    add_task(_notify_task, message, email_to_mention, channel)
 
 
 def _notify_task(message: str, email_to_mention: str | None, channel: str | None):